@@ -0,0 +1,118 @@
+"""Per-second aggregation: row-at-a-time reference vs the columnar implementation.
+
+    uv run python benchmarks/bench_aggregate.py --events 1000000 10000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from lps.metrics import (
+    ErrorType,
+    EventColumns,
+    RequestEvent,
+    aggregate_columns,
+    aggregate_per_second,
+)
+from lps.metrics.models import ERROR_TYPES
+
+
+def reference_aggregate(events: list[RequestEvent], duration: int, start_mono: float) -> int:
+    """The original dict-of-lists implementation, reduced to its hot loops."""
+    buckets: dict[int, list[RequestEvent]] = defaultdict(list)
+    for event in events:
+        buckets[max(0, int(event.mono_time - start_mono))].append(event)
+    rows = 0
+    for second in range(duration):
+        bucket = buckets.get(second, [])
+        latencies = [e.latency_ms for e in bucket if e.latency_ms >= 0]
+        responses = [e.response_ms for e in bucket if e.latency_ms >= 0]
+        sum(1 for e in bucket if e.error_type is not None)
+        sum(1 for e in bucket if e.error_type is ErrorType.TIMEOUT)
+        if latencies:
+            for q in (50, 95, 99):
+                np.percentile(latencies, q)
+                np.percentile(responses, q)
+        rows += 1
+    return rows
+
+
+def synthetic_columns(count: int, duration: int, seed: int = 1) -> EventColumns:
+    rng = np.random.default_rng(seed)
+    intended = np.sort(rng.uniform(0.0, duration, count))
+    sent = intended + rng.exponential(0.002, count)
+    latency = rng.lognormal(2.0, 0.8, count)
+    return EventColumns(
+        wall_time=intended + 1.7e9,
+        mono_time=sent + latency / 1000.0,
+        latency_ms=latency,
+        status_code=np.full(count, 200, dtype=np.int16),
+        # No error, then timeout, connect, read and other errors (see ERROR_TYPES).
+        error_code=rng.choice(5, count, p=[0.97, 0.01, 0.01, 0.005, 0.005]).astype(np.int8),
+        bytes_sent=np.zeros(count, dtype=np.int32),
+        bytes_received=np.full(count, 512, dtype=np.int32),
+        intended_mono=intended,
+        sent_mono=sent,
+        connect_ms=np.zeros(count, dtype=np.float32),
+        ttfb_ms=np.zeros(count, dtype=np.float32),
+        request_id=np.arange(count, dtype=np.int64),
+        attempt=np.zeros(count, dtype=np.int8),
+    )
+
+
+def to_events(columns: EventColumns) -> list[RequestEvent]:
+    return [
+        RequestEvent(
+            run_id="bench",
+            wall_time=float(columns.wall_time[i]),
+            mono_time=float(columns.mono_time[i]),
+            latency_ms=float(columns.latency_ms[i]),
+            status_code=200,
+            error_type=ERROR_TYPES[columns.error_code[i]],
+            bytes_sent=0,
+            bytes_received=512,
+            intended_mono=float(columns.intended_mono[i]),
+            sent_mono=float(columns.sent_mono[i]),
+        )
+        for i in range(len(columns))
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--duration", type=int, default=1800)
+    parser.add_argument("--skip-reference", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'events':>12} {'reference':>12} {'from events':>12} {'columnar':>12} {'speedup':>8}")
+    for count in args.events:
+        columns = synthetic_columns(count, args.duration)
+        rates = [count / args.duration] * args.duration
+
+        started = time.perf_counter()
+        aggregate_columns("bench", columns, rates, 0.0)
+        columnar = time.perf_counter() - started
+
+        reference = from_events = float("nan")
+        if not args.skip_reference:
+            events = to_events(columns)
+            started = time.perf_counter()
+            reference_aggregate(events, args.duration, 0.0)
+            reference = time.perf_counter() - started
+            started = time.perf_counter()
+            aggregate_per_second("bench", events, rates, 0.0)
+            from_events = time.perf_counter() - started
+            del events
+        print(
+            f"{count:>12,} {reference:>11.2f}s {from_events:>11.2f}s {columnar:>11.2f}s"
+            f" {reference / columnar:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Request throughput against a local keep-alive server: httpx vs the raw asyncio client.
+
+    uv run python benchmarks/bench_client.py --requests 20000 --concurrency 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import time
+from typing import Any
+
+from lps.config import ClientEngine, RetryConfig, RunConfig, TargetConfig, TransportConfig
+from lps.loadgen.client import send_request
+from lps.loadgen.retry import RetryPolicy
+from lps.loadgen.templates import build_request_pool
+from lps.loadgen.transport import open_transport
+
+_BODY = b"x" * 512
+
+
+async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    head = b"HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n" % len(_BODY)
+    try:
+        while True:
+            request = await reader.readuntil(b"\r\n\r\n")
+            writer.write(head if request.startswith(b"HEAD ") else head + _BODY)
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+def _serve(port: Any) -> None:
+    async def main() -> None:
+        server = await asyncio.start_server(_handle, "127.0.0.1", 0, backlog=1024)
+        port.value = server.sockets[0].getsockname()[1]
+        await server.serve_forever()
+
+    asyncio.run(main())
+
+
+async def run_engine(
+    url: str,
+    engine: ClientEngine,
+    requests: int,
+    concurrency: int,
+    depth: int,
+) -> float:
+    config = RunConfig(
+        target=TargetConfig(base_url=url),
+        pattern=None,  # type: ignore[arg-type]
+        duration_sec=1,
+        transport=TransportConfig(engine=engine, pipeline_depth=depth),
+    )
+    pool = build_request_pool(config.target, seed=1)
+    retry = RetryPolicy(RetryConfig())
+    remaining = requests
+
+    async def worker(transport: Any) -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            response = await send_request(transport, "bench", pool.next(), retry)
+            assert response.success
+
+    async with open_transport(config, pool) as transport:
+        await transport.warm_up(concurrency)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(transport) for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--pipeline-depth", type=int, default=1)
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    port = ctx.Value("i", 0)
+    server = ctx.Process(target=_serve, args=(port,), daemon=True)
+    server.start()
+    while port.value == 0:
+        time.sleep(0.05)
+    url = f"http://127.0.0.1:{port.value}/"
+    try:
+        rates = {}
+        for engine in (ClientEngine.HTTPX, ClientEngine.RAW):
+            rates[engine] = asyncio.run(
+                run_engine(url, engine, args.requests, args.concurrency, args.pipeline_depth)
+            )
+            print(f"{engine.value:>6}: {rates[engine]:>10,.0f} req/s")
+        print(f"speedup: {rates[ClientEngine.RAW] / rates[ClientEngine.HTTPX]:.1f}x")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
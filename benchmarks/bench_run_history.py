@@ -0,0 +1,130 @@
+"""Single-run load time as stored runs accumulate: run-id text columns vs run keys.
+
+    uv run python benchmarks/bench_run_history.py --runs 500 --events-per-run 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import statistics
+import tempfile
+import time
+import uuid
+from dataclasses import fields
+from pathlib import Path
+
+import duckdb
+import numpy as np
+import pandas as pd
+from bench_aggregate import synthetic_columns
+
+from lps.metrics import PerSecondMetrics
+from lps.storage import Storage
+
+_DURATION = 300
+
+
+def per_second_rows(run_id: str) -> list[PerSecondMetrics]:
+    return [
+        PerSecondMetrics(run_id, second, 50.0, 50.0, 5.0, 9.0, 12.0, 0.0, 0.0)
+        for second in range(_DURATION)
+    ]
+
+
+class ReferenceStore:
+    """The previous layout: every per-run table carries the run id as text."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.con = duckdb.connect(str(db_path))
+        self.con.execute(
+            """
+            CREATE TABLE request_events (
+                run_id TEXT, wall_time DOUBLE, mono_time DOUBLE, latency_ms DOUBLE,
+                status_code INTEGER, error_code TINYINT, bytes_sent INTEGER,
+                bytes_received INTEGER, intended_mono DOUBLE, sent_mono DOUBLE
+            )
+            """
+        )
+        self.con.execute(
+            "CREATE TABLE per_second ("
+            + ", ".join(
+                f"{f.name} {'TEXT' if f.name == 'run_id' else 'DOUBLE'}"
+                for f in fields(PerSecondMetrics)
+            )
+            + ")"
+        )
+
+    def append(self, run_id: str, events_df: pd.DataFrame, per_df: pd.DataFrame) -> None:
+        self.con.execute(
+            """
+            INSERT INTO request_events BY NAME
+            SELECT ?::TEXT AS run_id, * EXCLUDE (connect_ms, ttfb_ms, request_id, attempt)
+            FROM events_df
+            """,
+            [run_id],
+        )
+        self.con.execute("INSERT INTO per_second BY NAME SELECT * FROM per_df")
+
+    def load(self, run_id: str) -> int:
+        events = self.con.execute(
+            "SELECT * FROM request_events WHERE run_id = ?", [run_id]
+        ).fetchnumpy()
+        per_second = self.con.execute(
+            "SELECT * FROM per_second WHERE run_id = ? ORDER BY second", [run_id]
+        ).fetchdf()
+        return len(events["mono_time"]) + len(per_second)
+
+
+def load_ms(load, run_ids: list[str], reads: int) -> float:  # type: ignore[no-untyped-def]
+    timings = []
+    for run_id in run_ids[:reads]:
+        started = time.perf_counter()
+        load(run_id)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    return statistics.median(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=500)
+    parser.add_argument("--events-per-run", type=int, default=20_000)
+    parser.add_argument("--checkpoints", type=int, nargs="+", default=[10, 50, 100, 250, 500])
+    parser.add_argument("--reads", type=int, default=20)
+    args = parser.parse_args()
+
+    columns = synthetic_columns(args.events_per_run, _DURATION)
+    events_df = pd.DataFrame({f.name: getattr(columns, f.name) for f in fields(columns)})
+    rng = np.random.default_rng(1)
+    print(f"{'runs':>6} {'events':>12} {'reference':>12} {'run keys':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = ReferenceStore(Path(tmp) / "reference.duckdb")
+        with Storage(Path(tmp) / "lps.duckdb") as storage:
+            run_ids: list[str] = []
+            for count in range(1, args.runs + 1):
+                run_id = uuid.uuid4().hex
+                run_ids.append(run_id)
+                rows = per_second_rows(run_id)
+                storage.append_event_columns(run_id, columns)
+                storage.save_per_second(rows)
+                per_df = pd.DataFrame(
+                    {f.name: [getattr(r, f.name) for r in rows] for f in fields(PerSecondMetrics)}
+                )
+                reference.append(run_id, events_df, per_df)
+                if count not in args.checkpoints:
+                    continue
+                sample = [str(r) for r in rng.choice(run_ids, size=args.reads)]
+
+                def load_keyed(run_id: str) -> int:
+                    events = storage.load_event_columns(run_id)
+                    return len(events) + len(storage.load_per_second(run_id))
+
+                print(
+                    f"{count:>6} {count * args.events_per_run:>12,}"
+                    f" {load_ms(reference.load, sample, args.reads):>10.2f}ms"
+                    f" {load_ms(load_keyed, sample, args.reads):>10.2f}ms"
+                )
+        reference.con.close()
+
+
+if __name__ == "__main__":
+    main()
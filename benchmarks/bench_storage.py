@@ -0,0 +1,129 @@
+"""Event ingest and read latency: per-call connections + row dicts vs the current Storage.
+
+    uv run python benchmarks/bench_storage.py --events 1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from dataclasses import fields
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+from bench_aggregate import synthetic_columns, to_events
+
+from lps.metrics import PerSecondMetrics, RequestEvent
+from lps.storage import Storage
+
+
+def reference_schema(db_path: Path) -> None:
+    """The original layout, with the run id as text on every row."""
+    with duckdb.connect(str(db_path)) as con:
+        con.execute(
+            """
+            CREATE TABLE request_events (
+                run_id TEXT, wall_time DOUBLE, mono_time DOUBLE, latency_ms DOUBLE,
+                status_code INTEGER, error_type TEXT, bytes_sent INTEGER,
+                bytes_received INTEGER, intended_mono DOUBLE, sent_mono DOUBLE
+            )
+            """
+        )
+        con.execute(
+            "CREATE TABLE per_second ("
+            + ", ".join(
+                f"{f.name} {'TEXT' if f.name == 'run_id' else 'DOUBLE'}"
+                for f in fields(PerSecondMetrics)
+            )
+            + ")"
+        )
+
+
+def reference_append(db_path: Path, events: list[RequestEvent]) -> None:
+    """The original insert path: one dict per event, a DataFrame, and a fresh connection."""
+    events_df = pd.DataFrame(
+        [
+            {
+                "run_id": e.run_id,
+                "wall_time": e.wall_time,
+                "mono_time": e.mono_time,
+                "latency_ms": e.latency_ms,
+                "status_code": e.status_code,
+                "error_type": e.error_type.value if e.error_type else None,
+                "bytes_sent": e.bytes_sent,
+                "bytes_received": e.bytes_received,
+                "intended_mono": e.intended_mono,
+                "sent_mono": e.sent_mono,
+            }
+            for e in events
+        ]
+    )
+    with duckdb.connect(str(db_path)) as con:
+        con.execute("INSERT INTO request_events BY NAME SELECT * FROM events_df")
+
+
+def reference_reads(db_path: Path, run_id: str, rounds: int) -> None:
+    for _ in range(rounds):
+        with duckdb.connect(str(db_path)) as con:
+            query = "SELECT * FROM per_second WHERE run_id = ? ORDER BY second"
+            con.execute(query, [run_id]).fetchdf()
+
+
+def timed(fn, *args) -> float:  # type: ignore[no-untyped-def]
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--events", type=int, nargs="+", default=[1_000_000])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--reads", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'events':>12} {'reference':>12} {'from events':>12} {'columns':>12}"
+        f" {'events/s':>12} {'speedup':>8}"
+    )
+    for count in args.events:
+        columns = synthetic_columns(count, 1800)
+        events = to_events(columns)
+        batches = [events[i : i + args.batch_size] for i in range(0, count, args.batch_size)]
+        with tempfile.TemporaryDirectory() as tmp:
+            reference_path = Path(tmp) / "reference.duckdb"
+            reference_schema(reference_path)
+            reference = timed(
+                lambda: [reference_append(reference_path, batch) for batch in batches]
+            )
+            with Storage(Path(tmp) / "bench.duckdb") as storage:
+                from_events = timed(lambda: [storage.append_events(batch) for batch in batches])
+                step = args.batch_size
+                column_batches = [
+                    columns.select(slice(i, i + step)) for i in range(0, count, step)
+                ]
+                direct = timed(
+                    lambda: [storage.append_event_columns("bench", b) for b in column_batches]
+                )
+        print(
+            f"{count:>12,} {reference:>11.2f}s {from_events:>11.2f}s {direct:>11.2f}s"
+            f" {count / direct:>12,.0f} {reference / from_events:>7.1f}x"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reference_path = Path(tmp) / "reference.duckdb"
+        reference_schema(reference_path)
+        fresh = timed(reference_reads, reference_path, "bench", args.reads)
+        with Storage(Path(tmp) / "bench.duckdb") as storage:
+            shared = timed(lambda: [storage.load_per_second("bench") for _ in range(args.reads)])
+    print(
+        f"{args.reads} load_per_second calls:"
+        f" fresh connection {fresh * 1000 / args.reads:.2f} ms/call,"
+        f" shared connection {shared * 1000 / args.reads:.2f} ms/call"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
-from lps.analysis.compare import Regression, compare_runs
-from lps.analysis.signals import SignalWindow, autoscaling_lag, overload_indicator, queueing_indicator
+from lps.analysis.compare import Regression, compare_histograms, compare_runs
+from lps.analysis.signals import (
+    SignalWindow,
+    autoscaling_lag,
+    overload_indicator,
+    queueing_indicator,
+)
 
 __all__ = [
     "Regression",
     "SignalWindow",
     "autoscaling_lag",
+    "compare_histograms",
     "compare_runs",
     "overload_indicator",
     "queueing_indicator",
@@ -3,6 +3,8 @@ from __future__ import annotations
 from dataclasses import dataclass
 import pandas as pd
 
+from lps.metrics.histogram import LatencyHistogram
+
 
 @dataclass(frozen=True, slots=True)
 class Regression:
@@ -55,3 +57,21 @@ def compare_runs(base: pd.DataFrame, candidate: pd.DataFrame) -> list[Regression
                 )
             )
     return regressions
+
+
+def compare_histograms(base: LatencyHistogram, candidate: LatencyHistogram) -> list[Regression]:
+    """Compare whole-run tail latency from merged histograms, not averaged per-second p99s."""
+    if base.total == 0 or candidate.total == 0:
+        return []
+    base_p99 = base.percentile(99)
+    cand_p99 = candidate.percentile(99)
+    delta = (cand_p99 - base_p99) / base_p99
+    if delta > 0.2:
+        return [
+            Regression(
+                metric="run_p99_ms",
+                delta_pct=delta * 100,
+                message="whole-run p99 latency increased materially",
+            )
+        ]
+    return []
@@ -2,19 +2,33 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import json
+import sys
 from dataclasses import asdict
 
 from lps.config import (
+    AdaptiveConfig,
+    ArrivalProcess,
+    BreakerScope,
     BurstyConfig,
+    CircuitBreakerConfig,
+    ClientEngine,
+    CompositeConfig,
     DiurnalConfig,
     LoadModel,
     PatternConfig,
     PatternType,
+    ReplayConfig,
+    RequestTemplate,
+    RetryConfig,
     RunConfig,
     TargetConfig,
+    TransportConfig,
     ViralSpikeConfig,
 )
+from lps.loadgen.distributed import Coordinator, run_agent
 from lps.loadgen.runner import run_experiment
+from lps.metrics import PerSecondMetrics
 from lps.storage import default_storage
 
 
@@ -36,6 +50,22 @@ def _build_pattern(args: argparse.Namespace) -> PatternConfig:
             shape=args.shape,
         )
         return PatternConfig(PatternType.DIURNAL, asdict(cfg))
+    if args.pattern == "composite":
+        if not args.expression:
+            msg = "--pattern composite needs --expression"
+            raise SystemExit(msg)
+        return PatternConfig(PatternType.COMPOSITE, asdict(CompositeConfig(args.expression)))
+    if args.pattern == "replay":
+        if not args.trace:
+            msg = "--pattern replay needs --trace"
+            raise SystemExit(msg)
+        cfg = ReplayConfig(
+            path=args.trace,
+            format=args.trace_format,
+            time_compression=args.time_compression,
+            rps_scale=args.rps_scale,
+        )
+        return PatternConfig(PatternType.REPLAY, asdict(cfg))
     cfg = ViralSpikeConfig(
         baseline_rps=args.baseline_rps,
         spike_multiplier=args.spike_multiplier,
@@ -46,19 +76,122 @@ def _build_pattern(args: argparse.Namespace) -> PatternConfig:
     return PatternConfig(PatternType.VIRAL, asdict(cfg))
 
 
-def main() -> None:
-    parser = argparse.ArgumentParser(description="Load Pattern Simulator")
+def _add_run_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument("--target", required=True, help="Target URL")
+    parser.add_argument("--templates", help="JSON file with a list of request templates")
+    parser.add_argument("--data-file", help="CSV or JSONL rows for ${column} fields in templates")
+    parser.add_argument(
+        "--engine",
+        choices=[e.value for e in ClientEngine],
+        default="httpx",
+        help="Client: httpx (HTTP/1.1), http2, raw (asyncio HTTP/1.1 fast path) or grpc",
+    )
+    parser.add_argument("--max-connections", type=int, default=1000, help="HTTP/1.1 pool size")
+    parser.add_argument(
+        "--http2-connections",
+        type=int,
+        default=1,
+        help="HTTP/2 connections or gRPC channels",
+    )
+    parser.add_argument(
+        "--streams-per-connection",
+        type=int,
+        default=100,
+        help="HTTP/2 or gRPC streams",
+    )
+    parser.add_argument(
+        "--pipeline-depth",
+        type=int,
+        default=1,
+        help="Raw engine: requests per connection",
+    )
+    parser.add_argument("--warm-up", type=int, default=0, help="Connections to open before t=0")
+    parser.add_argument(
+        "--stream-body",
+        action="store_true",
+        help="Count response bodies chunk by chunk instead of buffering them",
+    )
+    parser.add_argument("--body-digest", default="", help="hashlib algorithm to hash bodies with")
+    parser.add_argument(
+        "--expect-digest",
+        default="",
+        help="Hex digest every response body must match (sha256 unless --body-digest)",
+    )
+    parser.add_argument(
+        "--pool-size",
+        type=int,
+        default=4096,
+        help="Requests prepared before the run",
+    )
     parser.add_argument("--duration", type=int, default=300)
-    parser.add_argument("--pattern", choices=["bursty", "diurnal", "viral"], default="viral")
-    parser.add_argument("--load-model", choices=["open_loop", "closed_loop"], default="open_loop")
-    parser.add_argument("--workers", type=int, default=50)
+    parser.add_argument(
+        "--pattern",
+        choices=["bursty", "diurnal", "viral", "replay", "composite"],
+        default="viral",
+    )
+    parser.add_argument("--load-model", choices=[m.value for m in LoadModel], default="open_loop")
+    parser.add_argument(
+        "--arrival",
+        choices=[a.value for a in ArrivalProcess],
+        default="even",
+        help="Open-loop inter-arrival distribution",
+    )
+    parser.add_argument("--workers", type=int, default=50, help="Closed-loop: most workers at once")
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes")
     parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--resolution",
+        type=float,
+        default=1.0,
+        help="Schedule bin width in seconds, e.g. 0.1 or 0.01",
+    )
+    parser.add_argument(
+        "--live",
+        action="store_true",
+        help="Print each second's metrics as it closes",
+    )
+
+    parser.add_argument("--retries", type=int, default=0, help="Retries per failed request")
+    parser.add_argument(
+        "--retry-budget",
+        type=float,
+        default=0.2,
+        help="Retries allowed per first attempt across the run",
+    )
+    parser.add_argument("--no-retry-budget", action="store_true", help="Do not cap retries")
+    parser.add_argument("--breaker", action="store_true", help="Enable the circuit breaker")
+    parser.add_argument("--breaker-scope", choices=[s.value for s in BreakerScope], default="run")
+    parser.add_argument(
+        "--breaker-window",
+        type=int,
+        default=20,
+        help="Outcomes per breaker window",
+    )
+    parser.add_argument(
+        "--breaker-window-sec",
+        type=float,
+        default=None,
+        help="Use a time window of this many seconds instead",
+    )
+    parser.add_argument("--breaker-probes", type=int, default=1, help="Half-open trial requests")
+
+    parser.add_argument("--start-rps", type=float, default=10.0, help="Adaptive: first step's rate")
+    parser.add_argument("--step-rps", type=float, default=10.0, help="Adaptive: increase per step")
+    parser.add_argument("--step-sec", type=int, default=5, help="Adaptive: seconds per step")
+    parser.add_argument("--slo-p99-ms", type=float, default=500.0)
+    parser.add_argument("--slo-error-rate", type=float, default=0.01)
+    parser.add_argument(
+        "--max-breaches",
+        type=int,
+        default=3,
+        help="Adaptive: SLO breaches before stopping",
+    )
 
     parser.add_argument("--baseline-rps", type=float, default=20.0)
     parser.add_argument("--burst-rps", type=float, default=500.0)
-    parser.add_argument("--burst-duration-sec", type=int, default=10)
-    parser.add_argument("--burst-interval-sec", type=int, default=120)
+    parser.add_argument("--burst-duration-sec", type=float, default=10.0)
+    parser.add_argument("--burst-interval-sec", type=float, default=120.0)
     parser.add_argument("--jitter-pct", type=float, default=0.05)
 
     parser.add_argument("--min-rps", type=float, default=20.0)
@@ -71,21 +204,154 @@ def main() -> None:
     parser.add_argument("--peak-hold-sec", type=int, default=60)
     parser.add_argument("--decay-half-life-sec", type=int, default=60)
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--expression",
+        help=(
+            "Composite pattern, e.g. "
+            '"diurnal(20, 300, 86400) + shift(viral(0, 40, 30, 60, 60), 900)"'
+        ),
+    )
+
+    parser.add_argument("--trace", help="CSV trace to replay: timestamps, or timestamp,rps rows")
+    parser.add_argument("--trace-format", choices=["auto", "timestamps", "rates"], default="auto")
+    parser.add_argument("--time-compression", type=float, default=1.0)
+    parser.add_argument("--rps-scale", type=float, default=1.0)
+
 
+def _load_templates(path: str | None) -> tuple[RequestTemplate, ...]:
+    if not path:
+        return ()
+    with open(path, encoding="utf-8") as fh:
+        return tuple(RequestTemplate(**item) for item in json.load(fh))
+
+
+def _build_config(args: argparse.Namespace) -> RunConfig:
     pattern = _build_pattern(args)
-    target = TargetConfig(base_url=args.target)
-    config = RunConfig(
+    target = TargetConfig(
+        base_url=args.target,
+        templates=_load_templates(args.templates),
+        data_file=args.data_file,
+        pool_size=args.pool_size,
+    )
+    return RunConfig(
         target=target,
         pattern=pattern,
         duration_sec=args.duration,
         load_model=LoadModel(args.load_model),
+        arrival=ArrivalProcess(args.arrival),
         closed_loop_workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        processes=args.processes,
+        resolution_sec=args.resolution,
         seed=args.seed,
+        transport=TransportConfig(
+            engine=ClientEngine(args.engine),
+            max_connections=args.max_connections,
+            http2_connections=args.http2_connections,
+            streams_per_connection=args.streams_per_connection,
+            pipeline_depth=args.pipeline_depth,
+            warm_up_connections=args.warm_up,
+            stream_body=args.stream_body,
+            body_digest=args.body_digest or ("sha256" if args.expect_digest else ""),
+            expected_digest=args.expect_digest.lower(),
+        ),
+        retry=RetryConfig(
+            enabled=args.retries > 0,
+            max_retries=args.retries,
+            budget_ratio=None if args.no_retry_budget else args.retry_budget,
+        ),
+        circuit_breaker=CircuitBreakerConfig(
+            enabled=args.breaker,
+            window_size=args.breaker_window,
+            window_sec=args.breaker_window_sec,
+            half_open_probes=args.breaker_probes,
+            scope=BreakerScope(args.breaker_scope),
+        ),
+        adaptive=AdaptiveConfig(
+            start_rps=args.start_rps,
+            step_rps=args.step_rps,
+            step_sec=args.step_sec,
+            slo_p99_ms=args.slo_p99_ms,
+            max_error_rate=args.slo_error_rate,
+            max_breaches=args.max_breaches,
+        ),
+    )
+
+
+def _print_second(row: PerSecondMetrics) -> None:
+    print(
+        f"t={row.second:>5}s requested={row.requested_rps:8.1f} achieved={row.achieved_rps:8.1f} "
+        f"p50={row.p50_ms:7.1f}ms p99={row.p99_ms:7.1f}ms errors={row.error_rate:6.1%} "
+        f"dropped={row.dropped_rps:6.1f} amplification={row.amplification:4.2f}",
+        flush=True,
+    )
+
+
+def _parse_address(value: str) -> tuple[str, int]:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def _coordinator_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="lps coordinator",
+        description="Split a run across remote agents and collect their events",
     )
+    parser.add_argument("--listen", default="127.0.0.1:7070", help="host:port for agents")
+    parser.add_argument("--agents", type=int, required=True, help="Agents to wait for")
+    _add_run_arguments(parser)
+    args = parser.parse_args(argv)
+    host, port = _parse_address(args.listen)
+    coordinator = Coordinator(_build_config(args), default_storage(), args.agents, host, port)
+
+    async def run() -> str:
+        bound = await coordinator.start()
+        print(f"Waiting for {args.agents} agent(s) on {host}:{bound}")
+        return await coordinator.run(on_second=_print_second if args.live else None)
+
+    run_id = asyncio.run(run())
+    print(f"Run complete: {run_id}")
+
+
+def _agent_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="lps agent",
+        description="Generate load for a coordinator",
+    )
+    parser.add_argument("--coordinator", default="127.0.0.1:7070", help="Coordinator host:port")
+    parser.add_argument("--agent-id", default=None)
+    args = parser.parse_args(argv)
+    host, port = _parse_address(args.coordinator)
+    asyncio.run(run_agent(host, port, args.agent_id))
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "coordinator":
+        _coordinator_main(argv[1:])
+        return
+    if argv and argv[0] == "agent":
+        _agent_main(argv[1:])
+        return
+    parser = argparse.ArgumentParser(description="Load Pattern Simulator")
+    _add_run_arguments(parser)
+    args = parser.parse_args(argv)
+
+    config = _build_config(args)
     storage = default_storage()
-    run_id = asyncio.run(run_experiment(config, storage))
+    on_second = _print_second if args.live else None
+    run_id = asyncio.run(run_experiment(config, storage, on_second=on_second))
     print(f"Run complete: {run_id}")
+    if config.load_model is LoadModel.ADAPTIVE:
+        knee = storage.load_knee(run_id)
+        if knee is None:
+            print("No step met the SLO")
+        else:
+            print(
+                f"Knee: {knee['offered_rps']:.1f} rps offered, "
+                f"{knee['achieved_rps']:.1f} achieved, "
+                f"p99={knee['p99_ms']:.1f}ms errors={knee['error_rate']:.1%}"
+            )
 
 
 if __name__ == "__main__":
@@ -1,27 +1,43 @@
 from __future__ import annotations
 
 from lps.config.models import (
+    AdaptiveConfig,
+    ArrivalProcess,
+    BreakerScope,
     BurstyConfig,
     CircuitBreakerConfig,
+    ClientEngine,
+    CompositeConfig,
     DiurnalConfig,
     LoadModel,
     PatternConfig,
     PatternType,
+    ReplayConfig,
+    RequestTemplate,
     RetryConfig,
     RunConfig,
     TargetConfig,
+    TransportConfig,
     ViralSpikeConfig,
 )
 
 __all__ = [
+    "AdaptiveConfig",
+    "ArrivalProcess",
+    "BreakerScope",
     "BurstyConfig",
     "CircuitBreakerConfig",
+    "ClientEngine",
+    "CompositeConfig",
     "DiurnalConfig",
     "LoadModel",
     "PatternConfig",
     "PatternType",
+    "ReplayConfig",
+    "RequestTemplate",
     "RetryConfig",
     "RunConfig",
     "TargetConfig",
+    "TransportConfig",
     "ViralSpikeConfig",
 ]
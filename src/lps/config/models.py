@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Any, Mapping
@@ -9,12 +9,57 @@ from typing import Any, Mapping
 class LoadModel(str, Enum):
     OPEN_LOOP = "open_loop"
     CLOSED_LOOP = "closed_loop"
+    ADAPTIVE = "adaptive"  # search for the highest rate within an SLO, see AdaptiveConfig
+
+
+class ArrivalProcess(str, Enum):
+    """Inter-arrival distribution of open-loop requests around the scheduled rate."""
+
+    EVEN = "even"
+    POISSON = "poisson"
+    UNIFORM = "uniform"
+    PARETO = "pareto"
+
+
+class ClientEngine(str, Enum):
+    HTTPX = "httpx"  # HTTP/1.1 through httpx
+    HTTP2 = "http2"  # HTTP/2 through httpx, needs the h2 package
+    RAW = "raw"  # asyncio HTTP/1.1 fast path, see lps.loadgen.rawhttp
+    GRPC = "grpc"  # unary gRPC calls, needs the grpcio package
+
+
+class BreakerScope(str, Enum):
+    """Which requests share a circuit breaker."""
+
+    RUN = "run"  # one breaker for every request
+    TEMPLATE = "template"  # one per request template
+    HOST = "host"  # one per target host and port
 
 
 class PatternType(str, Enum):
     BURSTY = "bursty"
     DIURNAL = "diurnal"
     VIRAL = "viral_spike"
+    REPLAY = "replay"
+    COMPOSITE = "composite"
+
+
+@dataclass(frozen=True, slots=True)
+class RequestTemplate:
+    """One kind of request sent to the target, chosen in proportion to ``weight``.
+
+    ``path`` (joined to ``base_url`` unless absolute, query string included), header
+    values and ``body`` may reference columns of the target's data file as ``${name}``.
+    ``method`` defaults to the target's. With ``body_base64`` the body is base64-decoded
+    after substitution, for binary payloads such as serialized protobuf messages.
+    """
+
+    path: str = ""
+    method: str | None = None
+    headers: Mapping[str, str] = field(default_factory=dict)
+    body: str | None = None
+    weight: float = 1.0
+    body_base64: bool = False
 
 
 @dataclass(frozen=True, slots=True)
@@ -23,30 +68,100 @@ class TargetConfig:
     method: str = "GET"
     timeout_sec: float = 10.0
     headers: Mapping[str, str] = field(default_factory=dict)
+    templates: tuple[RequestTemplate, ...] = ()
+    data_file: str | None = None  # CSV with a header row, or JSONL
+    pool_size: int = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class TransportConfig:
+    """How requests reach the target.
+
+    HTTP/1.1 engines open up to ``max_connections``; ``http2`` and ``grpc`` multiplex up
+    to ``streams_per_connection`` requests over each of ``http2_connections``.
+    ``warm_up_connections`` are opened before t=0 so the first seconds of a run
+    do not pay for connection setup.
+
+    With ``stream_body`` responses are read chunk by chunk and only counted (the raw
+    engine always works this way). ``body_digest`` names a ``hashlib`` algorithm to
+    hash each body with; bodies that do not match ``expected_digest`` fail validation.
+    """
+
+    engine: ClientEngine = ClientEngine.HTTPX
+    max_connections: int = 1000
+    max_keepalive_connections: int = 200
+    http2_connections: int = 1
+    streams_per_connection: int = 100
+    pipeline_depth: int = 1  # requests in flight per connection (raw engine)
+    warm_up_connections: int = 0
+    stream_body: bool = False
+    body_digest: str = ""
+    expected_digest: str = ""
 
 
 @dataclass(frozen=True, slots=True)
 class RetryConfig:
+    """Retries of failed requests (transport errors, not HTTP error statuses).
+
+    Across the run, retries may add at most ``budget_ratio`` attempts per first attempt,
+    plus a reserve of ``budget_burst``; ``budget_ratio=None`` lifts the cap. With
+    ``jitter`` each backoff is drawn between ``base_delay_sec`` and three times the
+    previous one (decorrelated jitter), otherwise it doubles.
+    """
+
     enabled: bool = False
     max_retries: int = 2
     base_delay_sec: float = 0.2
     max_delay_sec: float = 2.0
+    budget_ratio: float | None = 0.2
+    budget_burst: int = 10
+    jitter: bool = True
+
+
+@dataclass(frozen=True, slots=True)
+class AdaptiveConfig:
+    """Max-throughput search for the ``adaptive`` load model.
+
+    The offered rate starts at ``start_rps`` and is held for ``step_sec`` seconds at a
+    time. After each step within the SLO (p99 and error rate) it rises by ``step_rps``.
+    After a step that breaches it, the rate is multiplied by ``backoff`` and the
+    increment is halved. The run stops after ``max_breaches`` breaches.
+    """
+
+    start_rps: float = 10.0
+    step_rps: float = 10.0
+    step_sec: int = 5
+    slo_p99_ms: float = 500.0
+    max_error_rate: float = 0.01
+    backoff: float = 0.5
+    max_breaches: int = 3
 
 
 @dataclass(frozen=True, slots=True)
 class CircuitBreakerConfig:
+    """Stops sending once the error rate over a sliding window reaches the threshold.
+
+    The window holds the last ``window_size`` outcomes or, with ``window_sec``, the
+    outcomes of the last ``window_sec`` seconds (tripping only after ``window_size`` of
+    them). After ``open_cooldown_sec`` the breaker lets ``half_open_probes`` trial
+    requests through and closes once they all succeed.
+    """
+
     enabled: bool = False
     window_size: int = 20
     error_rate_threshold: float = 0.5
     open_cooldown_sec: float = 5.0
+    window_sec: float | None = None
+    half_open_probes: int = 1
+    scope: BreakerScope = BreakerScope.RUN
 
 
 @dataclass(frozen=True, slots=True)
 class BurstyConfig:
     baseline_rps: float
     burst_rps: float
-    burst_duration_sec: int
-    burst_interval_sec: int
+    burst_duration_sec: float
+    burst_interval_sec: float
     jitter_pct: float = 0.05
 
 
@@ -67,6 +182,30 @@ class ViralSpikeConfig:
     decay_half_life_sec: int
 
 
+@dataclass(frozen=True, slots=True)
+class ReplayConfig:
+    """A recorded trace: one request timestamp per line, or ``timestamp,rps`` rows.
+
+    Timestamps are seconds (epoch or relative) and must be in time order.
+    ``time_compression`` of 2.0 replays the trace twice as fast; ``rps_scale``
+    multiplies the request volume.
+    """
+
+    path: str
+    format: str = "auto"  # auto | timestamps | rates
+    time_compression: float = 1.0
+    rps_scale: float = 1.0
+
+
+@dataclass(frozen=True, slots=True)
+class CompositeConfig:
+    """Patterns combined by an expression such as
+    ``diurnal(20, 300, 86400) + shift(viral(0, 40, 30, 60, 60), 900)``.
+    """
+
+    expression: str
+
+
 @dataclass(frozen=True, slots=True)
 class PatternConfig:
     pattern_type: PatternType
@@ -79,10 +218,16 @@ class RunConfig:
     pattern: PatternConfig
     duration_sec: int
     load_model: LoadModel = LoadModel.OPEN_LOOP
-    closed_loop_workers: int = 50
+    arrival: ArrivalProcess = ArrivalProcess.EVEN
+    closed_loop_workers: int = 50  # upper bound; the pool is sized to the rate
+    max_in_flight: int = 1000
+    processes: int = 1
+    resolution_sec: float = 1.0
     seed: int = 7
+    transport: TransportConfig = field(default_factory=TransportConfig)
     retry: RetryConfig = field(default_factory=RetryConfig)
     circuit_breaker: CircuitBreakerConfig = field(default_factory=CircuitBreakerConfig)
+    adaptive: AdaptiveConfig = field(default_factory=AdaptiveConfig)
     run_id: str | None = None
     created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
     notes: str = ""
@@ -92,8 +237,12 @@ class RunConfig:
             "run_id": self.run_id or "",
             "created_at": self.created_at.isoformat(),
             "duration_sec": self.duration_sec,
+            "resolution_sec": self.resolution_sec,
             "load_model": self.load_model.value,
+            "arrival": self.arrival.value,
             "closed_loop_workers": self.closed_loop_workers,
+            "max_in_flight": self.max_in_flight,
+            "processes": self.processes,
             "seed": self.seed,
             "notes": self.notes,
             "pattern": {
@@ -105,17 +254,71 @@ class RunConfig:
                 "method": self.target.method,
                 "timeout_sec": self.target.timeout_sec,
                 "headers": dict(self.target.headers),
+                "templates": [asdict(t) for t in self.target.templates],
+                "data_file": self.target.data_file,
+                "pool_size": self.target.pool_size,
             },
-            "retry": {
-                "enabled": self.retry.enabled,
-                "max_retries": self.retry.max_retries,
-                "base_delay_sec": self.retry.base_delay_sec,
-                "max_delay_sec": self.retry.max_delay_sec,
+            "transport": {
+                "engine": self.transport.engine.value,
+                "max_connections": self.transport.max_connections,
+                "max_keepalive_connections": self.transport.max_keepalive_connections,
+                "http2_connections": self.transport.http2_connections,
+                "streams_per_connection": self.transport.streams_per_connection,
+                "pipeline_depth": self.transport.pipeline_depth,
+                "warm_up_connections": self.transport.warm_up_connections,
+                "stream_body": self.transport.stream_body,
+                "body_digest": self.transport.body_digest,
+                "expected_digest": self.transport.expected_digest,
             },
+            "retry": asdict(self.retry),
             "circuit_breaker": {
-                "enabled": self.circuit_breaker.enabled,
-                "window_size": self.circuit_breaker.window_size,
-                "error_rate_threshold": self.circuit_breaker.error_rate_threshold,
-                "open_cooldown_sec": self.circuit_breaker.open_cooldown_sec,
+                **asdict(self.circuit_breaker),
+                "scope": self.circuit_breaker.scope.value,
             },
+            "adaptive": asdict(self.adaptive),
         }
+
+    @classmethod
+    def from_metadata(cls, meta: Mapping[str, Any]) -> RunConfig:
+        pattern = meta["pattern"]
+        target = meta["target"]
+        transport = meta.get("transport", {})
+        breaker = meta["circuit_breaker"]
+        return cls(
+            target=TargetConfig(
+                base_url=target["base_url"],
+                method=target["method"],
+                timeout_sec=target["timeout_sec"],
+                headers=dict(target["headers"]),
+                templates=tuple(RequestTemplate(**t) for t in target.get("templates", ())),
+                data_file=target.get("data_file"),
+                pool_size=target.get("pool_size", 4096),
+            ),
+            pattern=PatternConfig(PatternType(pattern["type"]), dict(pattern["params"])),
+            duration_sec=meta["duration_sec"],
+            resolution_sec=meta.get("resolution_sec", 1.0),
+            load_model=LoadModel(meta["load_model"]),
+            arrival=ArrivalProcess(meta.get("arrival", ArrivalProcess.EVEN.value)),
+            closed_loop_workers=meta["closed_loop_workers"],
+            max_in_flight=meta.get("max_in_flight", 1000),
+            processes=meta.get("processes", 1),
+            seed=meta["seed"],
+            transport=TransportConfig(
+                **{
+                    **transport,
+                    "engine": ClientEngine(transport.get("engine", ClientEngine.HTTPX.value)),
+                }
+            ),
+            retry=RetryConfig(**meta["retry"]),
+            circuit_breaker=CircuitBreakerConfig(
+                **{
+                    **breaker,
+                    "scope": BreakerScope(breaker.get("scope", BreakerScope.RUN.value)),
+                }
+            ),
+            adaptive=AdaptiveConfig(**meta.get("adaptive", {})),
+            run_id=meta["run_id"] or None,
+            created_at=datetime.fromisoformat(meta["created_at"]),
+            notes=meta["notes"],
+        )
+
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+
+from lps.config import AdaptiveConfig
+from lps.loadgen.sink import EventSink
+from lps.metrics import (
+    BreakerTransition,
+    EventBuffer,
+    EventColumns,
+    PerSecondMetrics,
+    RequestEvent,
+)
+from lps.metrics.live import LiveAggregator
+
+# A step whose completed requests fall below this share of the offered rate is saturated,
+# even if the responses that did come back were fast.
+SATURATED_RATIO = 0.9
+
+
+@dataclass(frozen=True, slots=True)
+class StepResult:
+    """How one step of constant offered rate went."""
+
+    first_second: int
+    offered_rps: float
+    achieved_rps: float
+    p99_ms: float
+    error_rate: float
+    within_slo: bool
+
+
+def summarize_step(rows: Sequence[PerSecondMetrics], config: AdaptiveConfig) -> StepResult:
+    """Judge a step by its per-second rows, leaving out the first second of a longer step,
+    in which the rate was still changing."""
+    settled = rows[1:] if len(rows) > 1 else rows
+    offered = float(np.mean([r.requested_rps for r in settled]))
+    achieved = float(np.mean([r.achieved_rps for r in settled]))
+    p99 = max(r.p99_ms for r in settled)
+    errors = sum(r.error_rate * r.achieved_rps for r in settled)
+    error_rate = errors / max(1.0, sum(r.achieved_rps for r in settled))
+    within = (
+        p99 <= config.slo_p99_ms
+        and error_rate <= config.max_error_rate
+        and achieved >= SATURATED_RATIO * offered
+    )
+    return StepResult(rows[0].second, offered, achieved, p99, error_rate, within)
+
+
+def find_knee(rows: Sequence[PerSecondMetrics], config: AdaptiveConfig) -> StepResult | None:
+    """The step with the highest offered rate that met the SLO, or None if none did."""
+    steps = [
+        summarize_step(rows[start : start + config.step_sec], config)
+        for start in range(0, len(rows), config.step_sec)
+    ]
+    good = [step for step in steps if step.within_slo and step.offered_rps > 0]
+    return max(good, key=lambda step: step.offered_rps, default=None)
+
+
+class AdaptiveController:
+    """AIMD search for the saturation point: additive increase while a step meets the
+    SLO, multiplicative decrease (and a finer increment) when it does not."""
+
+    def __init__(self, config: AdaptiveConfig) -> None:
+        if config.step_sec < 1 or config.start_rps <= 0:
+            msg = "Adaptive runs need step_sec >= 1 and a positive start_rps"
+            raise ValueError(msg)
+        self.config = config
+        self.rate = config.start_rps
+        self.increase = config.step_rps
+        self.breaches = 0
+
+    def observe(self, step: StepResult) -> bool:
+        """Move ``rate`` for the next step; False once the search should stop."""
+        if step.within_slo:
+            self.rate += self.increase
+            return True
+        self.breaches += 1
+        self.rate = max(self.config.start_rps, self.rate * self.config.backoff)
+        self.increase /= 2
+        return self.breaches < self.config.max_breaches
+
+
+class ObservedSink:
+    """Forwards events to ``inner`` and closes out per-second rows for the controller.
+
+    ``requested_rates`` is read as seconds close, so it may be filled in as the run goes.
+    """
+
+    def __init__(
+        self,
+        inner: EventSink,
+        run_id: str,
+        requested_rates: Sequence[float],
+        started_mono: float,
+    ) -> None:
+        self.inner = inner
+        self._buffer = EventBuffer(run_id)
+        self._live = LiveAggregator(run_id, requested_rates, grace_sec=0.0)
+        self._live.start(started_mono)
+
+    def start(self, started_mono: float) -> None:
+        self._live.start(started_mono)
+        self.inner.start(started_mono)
+
+    def emit(self, event: RequestEvent) -> None:
+        self._buffer.append(event)
+        self.inner.emit(event)
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        self._buffer.extend(run_id, columns)
+        self.inner.emit_columns(run_id, columns)
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        self.inner.emit_breaker(transition)
+
+    def close(self) -> None:
+        self.inner.close()
+
+    def closed_seconds(self, now: float) -> list[PerSecondMetrics]:
+        """Rows for every second that ended before ``now`` and was not returned yet."""
+        self._live.record(self._buffer.drain())
+        return self._live.pop_closed(now)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+from lps.config import ArrivalProcess
+from lps.patterns import PatternSchedule
+
+# Tail index of the Pareto gaps: heavy-tailed with a finite mean but infinite variance.
+PARETO_SHAPE = 1.5
+# Arrivals generated per step; a run's offsets are never all held at once.
+ARRIVAL_CHUNK = 65_536
+
+
+def arrival_offsets(
+    rates: Sequence[float] | np.ndarray,
+    process: ArrivalProcess,
+    seed: int,
+    resolution_sec: float = 1.0,
+) -> np.ndarray:
+    """Sorted request send times, in seconds from t=0, for a binned rate schedule.
+
+    ``rates[i]`` is the rate in requests per second over bin ``i`` of ``resolution_sec``.
+    Arrivals are laid out in operational time (expected requests so far) and mapped
+    back through the cumulative rate, so every bin receives its share at any
+    resolution. ``EVEN`` places them exactly one expected request apart, a smooth
+    train; the stochastic processes draw unit-mean gaps from their distribution,
+    seeded by ``seed``.
+    """
+    chunks = list(iter_arrival_offsets(rates, process, seed, resolution_sec))
+    return np.concatenate(chunks) if chunks else np.empty(0)
+
+
+def iter_arrival_offsets(
+    rates: Sequence[float] | np.ndarray,
+    process: ArrivalProcess,
+    seed: int,
+    resolution_sec: float = 1.0,
+    chunk_size: int = ARRIVAL_CHUNK,
+    phase: float = 0.0,
+) -> Iterator[np.ndarray]:
+    """``arrival_offsets`` generated lazily, ``chunk_size`` arrivals at a time.
+
+    ``phase`` in ``[0, 1)`` delays an ``EVEN`` train by that fraction of one gap.
+    """
+    rates = np.maximum(np.asarray(rates, dtype=np.float64), 0.0)
+    expected = rates * resolution_sec
+    cumulative = np.concatenate(([0.0], np.cumsum(expected)))
+    rng = np.random.default_rng(seed)
+    for points in _renewal_points(process, cumulative[-1], rng, chunk_size, phase):
+        bins = np.searchsorted(cumulative, points, side="right") - 1
+        yield (bins + (points - cumulative[bins]) / expected[bins]) * resolution_sec
+
+
+def arrivals_by_second(
+    schedule: PatternSchedule,
+    process: ArrivalProcess,
+    seed: int,
+) -> Iterator[np.ndarray]:
+    """Send offsets for each whole second of ``schedule``, one sorted array per second.
+
+    Replayed schedules stream their recorded ``arrivals``; the rest are generated
+    from ``rates`` with ``process``. Either way offsets are produced as the seconds
+    are consumed, a chunk at a time, never for the whole run up front.
+    """
+    if schedule.arrivals is not None:
+        chunks: Iterable[np.ndarray] = schedule.arrivals.chunks()
+    else:
+        chunks = iter_arrival_offsets(
+            schedule.rates,
+            process,
+            seed,
+            schedule.resolution_sec,
+            phase=schedule.arrival_phase,
+        )
+    return split_by_second(chunks, schedule.duration_sec())
+
+
+def split_by_second(chunks: Iterable[np.ndarray], total: int) -> Iterator[np.ndarray]:
+    """Regroup sorted offset chunks into exactly ``total`` per-second arrays."""
+    carry = np.empty(0)
+    second = 0
+    for chunk in chunks:
+        chunk = np.asarray(chunk, dtype=np.float64)
+        carry = np.concatenate((carry, chunk)) if len(carry) else chunk
+        bounds = np.searchsorted(carry, np.arange(second + 1, total + 1), side="left")
+        # Seconds that end before the last offset seen so far are complete.
+        complete = int(np.searchsorted(bounds, len(carry), side="left"))
+        start = 0
+        for end in bounds[:complete].tolist():
+            yield carry[start:end]
+            start = end
+        second += complete
+        carry = carry[start:]
+    while second < total:
+        yield carry[carry < second + 1]
+        carry = carry[carry >= second + 1]
+        second += 1
+
+
+def _renewal_points(
+    process: ArrivalProcess,
+    horizon: float,
+    rng: np.random.Generator,
+    chunk_size: int,
+    phase: float = 0.0,
+) -> Iterator[np.ndarray]:
+    """Arrival instants of a unit-rate renewal process on ``[0, horizon)``, in chunks."""
+    if process is ArrivalProcess.EVEN:
+        end = max(0, int(np.ceil(horizon - phase)))
+        for start in range(0, end, chunk_size):
+            yield phase + np.arange(start, min(start + chunk_size, end), dtype=np.float64)
+        return
+    reached = 0.0
+    while reached < horizon:
+        points = reached + np.cumsum(_gaps(process, chunk_size, rng))
+        inside = int(np.searchsorted(points, horizon))
+        if inside:
+            yield points[:inside]
+        reached = float(points[-1])
+
+
+def _gaps(process: ArrivalProcess, size: int, rng: np.random.Generator) -> np.ndarray:
+    if process is ArrivalProcess.POISSON:
+        return rng.exponential(1.0, size)
+    if process is ArrivalProcess.UNIFORM:
+        return rng.uniform(0.0, 2.0, size)
+    if process is ArrivalProcess.PARETO:
+        scale = (PARETO_SHAPE - 1.0) / PARETO_SHAPE
+        return scale * (1.0 + rng.pareto(PARETO_SHAPE, size))
+    msg = f"Unsupported arrival process: {process}"
+    raise ValueError(msg)
@@ -1,50 +1,184 @@
 from __future__ import annotations
 
+import time
 from collections import deque
 from dataclasses import dataclass, field
-import time
+from enum import Enum
+from typing import Callable
+
+import httpx
+
+from lps.config import BreakerScope, CircuitBreakerConfig
+
+# Slices a time-based window is cut into; outcomes expire one slice at a time.
+_TIME_BUCKETS = 10
+# Request extension naming the template a request was built from (see templates.py).
+TEMPLATE_EXTENSION = "lps.template"
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+# Called with the breaker's key, the old and new state, and the clock reading.
+TransitionCallback = Callable[[str, BreakerState, BreakerState, float], None]
+
+
+@dataclass(slots=True)
+class _Bucket:
+    start: float
+    total: int = 0
+    failures: int = 0
 
 
 @dataclass(slots=True)
 class CircuitBreaker:
+    """Sliding-window circuit breaker with O(1) bookkeeping per outcome.
+
+    The window keeps running totals and failure counts, adjusted as outcomes enter and
+    leave it: one at a time for a count window, one ``window_sec / 10`` slice at a time
+    for a time window. Once open, the breaker refuses requests for
+    ``open_cooldown_sec``. It then admits ``half_open_probes`` trial requests, closes
+    when all of them succeed and reopens on the first failure. Outcomes recorded while
+    open belong to requests admitted before it tripped and are ignored.
+    """
+
     window_size: int
     error_rate_threshold: float
     open_cooldown_sec: float
-    state: str = "closed"  # closed | open | half_open
-    _history: deque[bool] = field(default_factory=deque)
-    _opened_at: float | None = None
+    window_sec: float | None = None
+    half_open_probes: int = 1
+    key: str = BreakerScope.RUN.value
+    on_transition: TransitionCallback | None = None
+    clock: Callable[[], float] = time.perf_counter
+    state: BreakerState = BreakerState.CLOSED
+    _outcomes: deque[bool] = field(default_factory=deque)
+    _buckets: deque[_Bucket] = field(default_factory=deque)
+    _total: int = 0
+    _failures: int = 0
+    _opened_at: float = 0.0
+    _probes_sent: int = 0
+    _probes_passed: int = 0
 
     def allow_request(self) -> bool:
-        if self.state == "open":
-            if self._opened_at is None:
+        if self.state is BreakerState.CLOSED:
+            return True
+        if self.state is BreakerState.OPEN:
+            if self.clock() - self._opened_at < self.open_cooldown_sec:
                 return False
-            if time.monotonic() - self._opened_at >= self.open_cooldown_sec:
-                self.state = "half_open"
-                return True
+            self._probes_sent = self._probes_passed = 0
+            self._move(BreakerState.HALF_OPEN)
+        if self._probes_sent >= self.half_open_probes:
             return False
+        self._probes_sent += 1
         return True
 
     def record(self, success: bool) -> None:
-        if self.state == "half_open":
-            if success:
-                self.state = "closed"
-                self._history.clear()
-                return
-            self._open()
+        if self.state is BreakerState.OPEN:
             return
-        self._history.append(success)
-        if len(self._history) > self.window_size:
-            self._history.popleft()
-        self._evaluate()
-
-    def _evaluate(self) -> None:
-        if len(self._history) < self.window_size:
+        if self.state is BreakerState.HALF_OPEN:
+            if not success:
+                self._open()
+                return
+            self._probes_passed += 1
+            if self._probes_passed >= self.half_open_probes:
+                self._clear()
+                self._move(BreakerState.CLOSED)
             return
-        error_rate = 1.0 - (sum(self._history) / len(self._history))
-        if error_rate >= self.error_rate_threshold:
+        if self.window_sec is None:
+            self._add_counted(success)
+        else:
+            self._add_timed(success)
+        if (
+            self._total >= self.window_size
+            and self._failures >= self.error_rate_threshold * self._total
+        ):
             self._open()
 
+    @property
+    def error_rate(self) -> float:
+        return self._failures / self._total if self._total else 0.0
+
+    def _add_counted(self, success: bool) -> None:
+        self._outcomes.append(success)
+        self._total += 1
+        self._failures += not success
+        if self._total > self.window_size:
+            self._total -= 1
+            self._failures -= not self._outcomes.popleft()
+
+    def _add_timed(self, success: bool) -> None:
+        assert self.window_sec is not None
+        now = self.clock()
+        buckets = self._buckets
+        while buckets and buckets[0].start <= now - self.window_sec:
+            expired = buckets.popleft()
+            self._total -= expired.total
+            self._failures -= expired.failures
+        width = self.window_sec / _TIME_BUCKETS
+        start = now - now % width
+        if not buckets or buckets[-1].start < start:
+            buckets.append(_Bucket(start))
+        bucket = buckets[-1]
+        bucket.total += 1
+        bucket.failures += not success
+        self._total += 1
+        self._failures += not success
+
     def _open(self) -> None:
-        self.state = "open"
-        self._opened_at = time.monotonic()
-        self._history.clear()
+        self._opened_at = self.clock()
+        self._clear()
+        self._move(BreakerState.OPEN)
+
+    def _clear(self) -> None:
+        self._outcomes.clear()
+        self._buckets.clear()
+        self._total = self._failures = 0
+
+    def _move(self, state: BreakerState) -> None:
+        previous, self.state = self.state, state
+        if self.on_transition is not None and previous is not state:
+            self.on_transition(self.key, previous, state, self.clock())
+
+
+class BreakerRegistry:
+    """The run's circuit breakers, one per key under ``config.scope``."""
+
+    def __init__(
+        self,
+        config: CircuitBreakerConfig,
+        on_transition: TransitionCallback | None = None,
+    ) -> None:
+        self.config = config
+        self.on_transition = on_transition
+        self.breakers: dict[str, CircuitBreaker] = {}
+        # Pooled requests are reused for the whole run, so their ids are stable keys.
+        self._by_request: dict[int, CircuitBreaker] = {}
+
+    def for_request(self, request: httpx.Request) -> CircuitBreaker:
+        breaker = self._by_request.get(id(request))
+        if breaker is None:
+            key = breaker_key(self.config.scope, request)
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(
+                    window_size=self.config.window_size,
+                    error_rate_threshold=self.config.error_rate_threshold,
+                    open_cooldown_sec=self.config.open_cooldown_sec,
+                    window_sec=self.config.window_sec,
+                    half_open_probes=self.config.half_open_probes,
+                    key=key,
+                    on_transition=self.on_transition,
+                )
+            self._by_request[id(request)] = breaker
+        return breaker
+
+
+def breaker_key(scope: BreakerScope, request: httpx.Request) -> str:
+    if scope is BreakerScope.HOST:
+        return request.url.netloc.decode("ascii")
+    if scope is BreakerScope.TEMPLATE:
+        return str(request.extensions.get(TEMPLATE_EXTENSION, ""))
+    return BreakerScope.RUN.value
@@ -6,46 +6,63 @@ from dataclasses import dataclass
 
 import httpx
 
-from lps.config import RetryConfig, TargetConfig
+from lps.loadgen.retry import RetryPolicy
+from lps.loadgen.transport import Transport
 from lps.metrics import ErrorType, RequestEvent
 
 
 @dataclass(frozen=True, slots=True)
 class ClientResponse:
-    event: RequestEvent
+    events: tuple[RequestEvent, ...]  # one per attempt, in the order they were sent
     success: bool
 
+    @property
+    def event(self) -> RequestEvent:
+        """The final attempt."""
+        return self.events[-1]
+
 
 async def send_request(
-    client: httpx.AsyncClient,
+    transport: Transport,
     run_id: str,
-    target: TargetConfig,
-    retry: RetryConfig,
+    request: httpx.Request,
+    retry: RetryPolicy,
+    intended_mono: float | None = None,
+    expected_digest: str = "",
 ) -> ClientResponse:
-    start_wall = time.time()
-    start_mono = time.perf_counter()
+    request_id = retry.begin()
+    events: list[RequestEvent] = []
     attempt = 0
+    delay = 0.0
     while True:
-        attempt += 1
+        start_wall = time.time()
+        start_mono = time.perf_counter()
         try:
-            resp = await client.request(
-                target.method,
-                target.base_url,
-                headers=target.headers,
-                timeout=target.timeout_sec,
-            )
-            latency_ms = (time.perf_counter() - start_mono) * 1000.0
-            event = RequestEvent(
-                run_id=run_id,
-                wall_time=start_wall,
-                mono_time=time.perf_counter(),
-                latency_ms=latency_ms,
-                status_code=resp.status_code,
-                error_type=None,
-                bytes_sent=len(resp.request.content or b""),
-                bytes_received=len(resp.content or b""),
+            exchange = await transport.send(request)
+            latency_ms = (time.perf_counter() - start_mono) * 1000.0 - exchange.connect_ms
+            error = ErrorType.STATUS if exchange.failed else None
+            if expected_digest and exchange.digest != expected_digest:
+                error = ErrorType.VALIDATION
+            events.append(
+                RequestEvent(
+                    run_id=run_id,
+                    wall_time=start_wall,
+                    mono_time=time.perf_counter(),
+                    latency_ms=latency_ms,
+                    status_code=exchange.status_code,
+                    error_type=error,
+                    bytes_sent=len(request.content),
+                    bytes_received=exchange.bytes_received,
+                    intended_mono=intended_mono,
+                    sent_mono=start_mono,
+                    connect_ms=exchange.connect_ms,
+                    ttfb_ms=exchange.ttfb_ms,
+                    request_id=request_id,
+                    attempt=attempt,
+                )
             )
-            return ClientResponse(event=event, success=resp.is_success)
+            success = error is None and 200 <= exchange.status_code < 300
+            return ClientResponse(events=tuple(events), success=success)
         except httpx.TimeoutException:
             err = ErrorType.TIMEOUT
         except httpx.ConnectError:
@@ -55,17 +72,24 @@ async def send_request(
         except httpx.HTTPError:
             err = ErrorType.OTHER
         latency_ms = (time.perf_counter() - start_mono) * 1000.0
-        event = RequestEvent(
-            run_id=run_id,
-            wall_time=start_wall,
-            mono_time=time.perf_counter(),
-            latency_ms=latency_ms,
-            status_code=None,
-            error_type=err,
-            bytes_sent=0,
-            bytes_received=0,
+        events.append(
+            RequestEvent(
+                run_id=run_id,
+                wall_time=start_wall,
+                mono_time=time.perf_counter(),
+                latency_ms=latency_ms,
+                status_code=None,
+                error_type=err,
+                bytes_sent=0,
+                bytes_received=0,
+                intended_mono=intended_mono,
+                sent_mono=start_mono,
+                request_id=request_id,
+                attempt=attempt,
+            )
         )
-        if not retry.enabled or attempt > retry.max_retries:
-            return ClientResponse(event=event, success=False)
-        delay = min(retry.max_delay_sec, retry.base_delay_sec * (2 ** (attempt - 1)))
+        attempt += 1
+        if not retry.allow(attempt):
+            return ClientResponse(events=tuple(events), success=False)
+        delay = retry.backoff(attempt, delay)
         await asyncio.sleep(delay)
@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import struct
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any
+
+import numpy as np
+
+from lps.config import RunConfig
+from lps.loadgen.runner import ProgressCallback, _execute_load, run_experiment
+from lps.loadgen.sink import EventSink
+from lps.loadgen.workers import _tick_progress, split_schedule, worker_config
+from lps.metrics import (
+    BreakerTransition,
+    EventBuffer,
+    EventColumns,
+    RequestEvent,
+    SecondCallback,
+)
+from lps.metrics.models import EVENT_DTYPES
+from lps.patterns import PatternSchedule
+from lps.patterns.replay import TraceArrivals
+from lps.storage import Storage
+
+# Every message is a frame: a kind byte and the payload length, then the payload. Control
+# messages are JSON; event batches and schedule rates go as raw little-endian arrays.
+_HEADER = struct.Struct("<BI")
+_JSON = 0
+_EVENTS = 1
+_RATES = 2
+# Schedule rates are streamed this many bins per frame, however long the schedule.
+_RATES_PER_FRAME = 1 << 20
+_ROW_BYTES = sum(dtype.itemsize for dtype in EVENT_DTYPES.values())
+_CLOCK_SYNC_ROUNDS = 5
+_START_DELAY_SEC = 1.0
+_BATCH_SIZE = 2_000
+_BATCH_INTERVAL_SEC = 0.25
+_RELATIVE_COLUMNS = ("mono_time", "intended_mono", "sent_mono")
+
+
+@dataclass(slots=True)
+class _AgentConn:
+    agent_id: str
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+    clock_offset: float = 0.0
+    done: bool = False
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class Coordinator:
+    """Hands each registered agent a share of the schedule and collects their events.
+
+    Agents connect over TCP and register. Once ``expected_agents`` have joined, the
+    coordinator estimates each agent's ``perf_counter`` offset from ping round trips and
+    streams every agent its slice of the schedule. When all of them have acknowledged,
+    it picks a common start instant and sends it to each agent in the agent's own
+    clock. Agents stream event batches back with times relative to that start, and the
+    coordinator rebases them onto its own time base before they reach storage.
+    """
+
+    config: RunConfig
+    storage: Storage
+    expected_agents: int
+    host: str = "127.0.0.1"
+    port: int = 0
+    _server: asyncio.Server | None = None
+    _agents: list[_AgentConn] = field(default_factory=list)
+    _joined: asyncio.Event | None = None
+
+    async def start(self) -> int:
+        self._joined = asyncio.Event()
+        self._server = await asyncio.start_server(self._on_connect, self.host, self.port)
+        sock: socket.socket = self._server.sockets[0]
+        self.port = sock.getsockname()[1]
+        return self.port
+
+    async def run(
+        self,
+        progress: ProgressCallback | None = None,
+        on_second: SecondCallback | None = None,
+    ) -> str:
+        if self._server is None:
+            await self.start()
+        assert self._joined is not None and self._server is not None
+        try:
+            await self._joined.wait()
+            return await run_experiment(
+                self.config,
+                self.storage,
+                progress,
+                executor=self._execute,
+                on_second=on_second,
+            )
+        finally:
+            self._server.close()
+            for agent in self._agents:
+                agent.writer.close()
+
+    async def _on_connect(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        message = await _read(reader)
+        if message is None or message.get("type") != "register":
+            writer.close()
+            return
+        if len(self._agents) >= self.expected_agents:
+            await _send(writer, {"type": "reject", "reason": "run is full"})
+            writer.close()
+            return
+        agent_id = str(message.get("agent_id") or f"agent-{len(self._agents)}")
+        self._agents.append(_AgentConn(agent_id, reader, writer))
+        if len(self._agents) == self.expected_agents and self._joined is not None:
+            self._joined.set()
+
+    async def _execute(
+        self,
+        run_id: str,
+        config: RunConfig,
+        schedule: PatternSchedule,
+        sink: EventSink,
+        progress: ProgressCallback | None,
+    ) -> float:
+        agents = self._agents
+        for agent in agents:
+            agent.clock_offset = await _estimate_offset(agent)
+        shares = split_schedule(schedule, len(agents))
+        for index, agent in enumerate(agents):
+            child = worker_config(config, index, len(agents))
+            await _send(
+                agent.writer,
+                {
+                    "type": "assign",
+                    "run_id": run_id,
+                    "config": dict(child.to_metadata()),
+                    "bins": len(shares[index].rates),
+                    "resolution_sec": schedule.resolution_sec,
+                    "arrival_phase": shares[index].arrival_phase,
+                    "trace": _trace_metadata(shares[index]),
+                },
+            )
+            await _send_rates(agent.writer, shares[index].rates)
+        for agent in agents:
+            reply = await _read(agent.reader)
+            if reply is None or reply.get("type") != "ready":
+                msg = f"Agent {agent.agent_id} did not accept its assignment: {reply}"
+                raise RuntimeError(msg)
+        started_mono = time.perf_counter() + _START_DELAY_SEC
+        sink.start(started_mono)
+        for agent in agents:
+            start_at = started_mono + agent.clock_offset
+            await _send(agent.writer, {"type": "start", "start_at": start_at})
+        ticker = asyncio.create_task(
+            _tick_progress(progress, started_mono, schedule.duration_sec())
+        )
+        try:
+            await asyncio.gather(
+                *(self._collect(agent, run_id, sink, started_mono) for agent in agents)
+            )
+        finally:
+            ticker.cancel()
+        failed = [f"{a.agent_id}: {a.error}" for a in agents if a.error is not None]
+        if failed:
+            msg = f"Agents failed: {', '.join(failed)}"
+            raise RuntimeError(msg)
+        return started_mono
+
+    async def _collect(
+        self,
+        agent: _AgentConn,
+        run_id: str,
+        sink: EventSink,
+        started_mono: float,
+    ) -> None:
+        while not agent.done:
+            frame = await _read_frame(agent.reader)
+            if frame is None:
+                agent.error = "connection closed before the run finished"
+                return
+            if frame[0] == _EVENTS:
+                sink.emit_columns(run_id, decode_columns(frame[1], started_mono))
+                continue
+            message = json.loads(frame[1])
+            kind = message.get("type")
+            if kind == "breaker":
+                transition = BreakerTransition(**message["transition"])
+                at = started_mono + transition.mono_time
+                sink.emit_breaker(replace(transition, mono_time=at))
+            elif kind == "done":
+                agent.done = True
+            elif kind == "error":
+                agent.error = str(message.get("reason"))
+                return
+
+
+async def run_agent(host: str, port: int, agent_id: str | None = None) -> None:
+    """Register with a coordinator, run the assigned share of the load, then exit."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        await _send(writer, {"type": "register", "agent_id": agent_id or socket.gethostname()})
+        while True:
+            message = await _read(reader)
+            if message is None or message.get("type") == "reject":
+                return
+            if message["type"] == "ping":
+                await _send(writer, {"type": "pong", "agent_time": time.perf_counter()})
+            elif message["type"] == "assign":
+                schedule = await _receive_schedule(message, reader)
+                await _send(writer, {"type": "ready"})
+                start = await _read(reader)
+                if start is None or start.get("type") != "start":
+                    return
+                await _run_assignment(message, schedule, float(start["start_at"]), writer)
+                return
+    finally:
+        writer.close()
+
+
+async def _run_assignment(
+    message: dict[str, Any],
+    schedule: PatternSchedule,
+    start_at: float,
+    writer: asyncio.StreamWriter,
+) -> None:
+    config = RunConfig.from_metadata(message["config"])
+    sink = _StreamEventSink(writer, start_at)
+    flusher = asyncio.create_task(sink.drain_periodically())
+    try:
+        await _execute_load(
+            message["run_id"],
+            config,
+            schedule,
+            sink,
+            None,
+            started_mono=start_at,
+        )
+    except Exception as exc:
+        flusher.cancel()
+        sink.close()
+        await _send(writer, {"type": "error", "reason": repr(exc)})
+        return
+    flusher.cancel()
+    sink.close()
+    await _send(writer, {"type": "done"})
+
+
+def _trace_metadata(schedule: PatternSchedule) -> dict[str, Any] | None:
+    # Agents replay the same trace file, which must exist at the same path on each host.
+    if schedule.arrivals is None:
+        return None
+    return dict(schedule.arrivals.to_metadata())
+
+
+async def _send_rates(writer: asyncio.StreamWriter, rates: np.ndarray) -> None:
+    values = np.ascontiguousarray(rates, dtype="<f8")
+    for start in range(0, len(values), _RATES_PER_FRAME):
+        writer.write(_frame(_RATES, values[start : start + _RATES_PER_FRAME].tobytes()))
+        await writer.drain()
+
+
+async def _receive_schedule(
+    message: dict[str, Any],
+    reader: asyncio.StreamReader,
+) -> PatternSchedule:
+    rates = np.empty(int(message["bins"]))
+    filled = 0
+    while filled < len(rates):
+        frame = await _read_frame(reader)
+        if frame is None or frame[0] != _RATES:
+            msg = "Coordinator stopped sending the schedule"
+            raise ConnectionError(msg)
+        chunk = np.frombuffer(frame[1], dtype="<f8")
+        rates[filled : filled + len(chunk)] = chunk
+        filled += len(chunk)
+    trace = message.get("trace")
+    return PatternSchedule(
+        rates,
+        message["resolution_sec"],
+        arrivals=TraceArrivals.from_metadata(trace) if trace else None,
+        arrival_phase=float(message.get("arrival_phase", 0.0)),
+    )
+
+
+class _StreamEventSink:
+    """Buffers events on an agent and writes them to the coordinator as column batches."""
+
+    def __init__(self, writer: asyncio.StreamWriter, start_at: float) -> None:
+        self.writer = writer
+        self.start_at = start_at
+        self._batch = EventBuffer()
+        self._last_flush = time.perf_counter()
+
+    def start(self, started_mono: float) -> None:
+        return None
+
+    def emit(self, event: RequestEvent) -> None:
+        self._batch.append(event)
+        self._maybe_flush()
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        self._batch.extend(run_id, columns)
+        self._maybe_flush()
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        relative = replace(transition, mono_time=transition.mono_time - self.start_at)
+        message = {"type": "breaker", "transition": asdict(relative)}
+        self.writer.write(_frame(_JSON, _encode(message)))
+
+    def _maybe_flush(self) -> None:
+        now = time.perf_counter()
+        if len(self._batch) >= _BATCH_SIZE or now - self._last_flush >= _BATCH_INTERVAL_SEC:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self._batch):
+            self.writer.write(_frame(_EVENTS, encode_columns(self._batch.drain(), self.start_at)))
+        self._last_flush = time.perf_counter()
+
+    def close(self) -> None:
+        self.flush()
+
+    async def drain_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(_BATCH_INTERVAL_SEC)
+            self.flush()
+            await self.writer.drain()
+
+
+def encode_columns(columns: EventColumns, start_at: float) -> bytes:
+    """Event columns as one frame payload, with monotonic times relative to ``start_at``.
+
+    Each column's little-endian bytes follow the previous one in ``EVENT_DTYPES`` order,
+    so a batch costs the same 68 bytes per event it takes in an ``EventBuffer``.
+    """
+    parts = []
+    for name, dtype in EVENT_DTYPES.items():
+        values = getattr(columns, name)
+        if name in _RELATIVE_COLUMNS:
+            values = values - start_at
+        parts.append(np.ascontiguousarray(values, dtype=dtype.newbyteorder("<")).tobytes())
+    return b"".join(parts)
+
+
+def decode_columns(payload: bytes, started_mono: float) -> EventColumns:
+    count, partial = divmod(len(payload), _ROW_BYTES)
+    if partial:
+        msg = f"Event batch of {len(payload)} bytes is not a whole number of events"
+        raise ValueError(msg)
+    arrays: dict[str, np.ndarray] = {}
+    offset = 0
+    for name, dtype in EVENT_DTYPES.items():
+        values = np.frombuffer(payload, dtype.newbyteorder("<"), count, offset).astype(dtype)
+        offset += count * dtype.itemsize
+        if name in _RELATIVE_COLUMNS:
+            values += started_mono
+        arrays[name] = values
+    return EventColumns(**arrays)
+
+
+async def _estimate_offset(agent: _AgentConn) -> float:
+    """Return agent_clock - coordinator_clock from the lowest-RTT ping round."""
+    best_rtt = float("inf")
+    best_offset = 0.0
+    for _ in range(_CLOCK_SYNC_ROUNDS):
+        sent = time.perf_counter()
+        await _send(agent.writer, {"type": "ping"})
+        reply = await _read(agent.reader)
+        received = time.perf_counter()
+        if reply is None or reply.get("type") != "pong":
+            msg = f"Agent {agent.agent_id} did not answer clock sync"
+            raise RuntimeError(msg)
+        rtt = received - sent
+        if rtt < best_rtt:
+            best_rtt = rtt
+            best_offset = float(reply["agent_time"]) - (sent + received) / 2.0
+    return best_offset
+
+
+def _encode(message: dict[str, Any]) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode()
+
+
+def _frame(kind: int, payload: bytes) -> bytes:
+    return _HEADER.pack(kind, len(payload)) + payload
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict[str, Any]) -> None:
+    writer.write(_frame(_JSON, _encode(message)))
+    await writer.drain()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes] | None:
+    try:
+        kind, length = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+        return kind, await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        return None
+
+
+async def _read(reader: asyncio.StreamReader) -> dict[str, Any] | None:
+    """The next control message; None once the peer has closed the connection."""
+    frame = await _read_frame(reader)
+    if frame is None:
+        return None
+    if frame[0] != _JSON:
+        msg = f"Expected a control message, got a frame of kind {frame[0]}"
+        raise ConnectionError(msg)
+    return json.loads(frame[1])
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Callable
+
+# How often a limiter re-checks the schedule while the requested rate is zero.
+_IDLE_POLL_SEC = 0.05
+# Workers kept beyond rate × latency, as a fraction of that estimate.
+_HEADROOM = 0.25
+
+
+class GcraLimiter:
+    """Paces closed-loop workers at the schedule's rate with the Generic Cell Rate Algorithm.
+
+    The limiter keeps a theoretical arrival time (TAT). Each grant takes the slot at
+    ``max(TAT, now)`` and moves the TAT one emission interval (``1 / rate`` at that
+    slot) later, so however many workers share it, grants follow the requested rate.
+    When no worker was free to take a slot, the TAT falls behind the clock. That
+    shortfall is not made up later, and ``lag`` reports it.
+    """
+
+    def __init__(
+        self,
+        rate_at: Callable[[float], float],
+        started_mono: float,
+        stop_at: float,
+    ) -> None:
+        self._rate_at = rate_at
+        self._started = started_mono
+        self._stop_at = stop_at
+        self._tat = started_mono
+
+    def stop(self) -> None:
+        """Grant no slots from now on."""
+        self._stop_at = min(self._stop_at, time.perf_counter())
+
+    def lag(self, now: float) -> float:
+        """Seconds by which the next slot is overdue; 0.0 when it is in the future."""
+        return max(0.0, now - self._tat)
+
+    async def acquire(self) -> bool:
+        """Wait for the next slot; False once the run is over."""
+        while True:
+            now = time.perf_counter()
+            slot = max(self._tat, now)
+            if slot >= self._stop_at:
+                return False
+            rate = self._rate_at(slot - self._started)
+            if rate > 0:
+                break
+            self._tat = slot
+            await asyncio.sleep(min(_IDLE_POLL_SEC, self._stop_at - now))
+        self._tat = slot + 1.0 / rate
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        return True
+
+
+def workers_needed(
+    rate: float,
+    latency_sec: float,
+    active: int,
+    behind: bool,
+    maximum: int,
+) -> int:
+    """Closed-loop workers to keep at ``rate`` requests/sec, at most ``maximum``.
+
+    By Little's law about ``rate × latency_sec`` requests are in flight, plus some
+    headroom. A limiter that has fallen ``behind`` means every worker is busy and the
+    latency estimate lags, so the pool doubles instead.
+    """
+    needed = math.ceil(rate * latency_sec * (1.0 + _HEADROOM)) + 1
+    if behind:
+        needed = max(needed, active * 2)
+    return max(1, min(maximum, needed))
@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import ssl
+import time
+from collections import deque
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import httpx
+
+_MAX_HEADER_BYTES = 64 * 1024
+
+
+def encode_request(request: httpx.Request) -> bytes:
+    """HTTP/1.1 wire bytes for ``request``, keeping the connection alive."""
+    url = request.url
+    target = url.raw_path.decode("ascii") or "/"
+    lines = [f"{request.method} {target} HTTP/1.1"]
+    names = set()
+    for name, value in request.headers.multi_items():
+        names.add(name.lower())
+        lines.append(f"{name}: {value}")
+    body = request.content
+    if "host" not in names:
+        lines.append(f"Host: {url.netloc.decode('ascii')}")
+    if body and "content-length" not in names:
+        lines.append(f"Content-Length: {len(body)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+class RawResponse:
+    """Outcome of one request: status, body size and timings; the body is not kept."""
+
+    __slots__ = (
+        "future",
+        "head",
+        "digest",
+        "status_code",
+        "received",
+        "remaining",
+        "chunked",
+        "until_close",
+        "headers_mono",
+        "connect_ms",
+        "ttfb_ms",
+    )
+
+    def __init__(self, future: asyncio.Future[RawResponse], head: bool, digest: Any = None) -> None:
+        self.future = future
+        self.head = head
+        self.digest = digest  # hashlib object fed with the body, if hashing
+        self.status_code = 0
+        self.received = 0
+        self.remaining = 0
+        self.chunked = False
+        self.until_close = False
+        self.headers_mono = 0.0
+        self.connect_ms = 0.0
+        self.ttfb_ms = 0.0
+
+    def _consume(self, data: bytes | bytearray) -> None:
+        self.received += len(data)
+        if self.digest is not None:
+            self.digest.update(data)
+
+
+class _Connection(asyncio.Protocol):
+    """One keep-alive connection with pipelined requests answered in order.
+
+    Only the status line and the framing headers are parsed; bodies are counted and
+    discarded.
+    """
+
+    def __init__(self, on_idle: Callable[[_Connection], None]) -> None:
+        self.transport: asyncio.Transport | None = None
+        self.pending: deque[RawResponse] = deque()
+        self.closed = False
+        self._on_idle = on_idle
+        self._buffer = bytearray()
+        self._in_body = False
+        self._chunk_left = -1  # -1: expecting a chunk-size line, -2: trailers
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        self.transport = transport  # type: ignore[assignment]
+
+    def send(self, payload: bytes, digest: Any = None) -> asyncio.Future[RawResponse]:
+        assert self.transport is not None
+        future: asyncio.Future[RawResponse] = asyncio.get_running_loop().create_future()
+        self.pending.append(RawResponse(future, payload.startswith(b"HEAD "), digest))
+        self.transport.write(payload)
+        return future
+
+    def abort(self) -> None:
+        if self.transport is not None:
+            self.transport.abort()
+        self._fail(httpx.ReadError("connection aborted"))
+
+    def data_received(self, data: bytes) -> None:
+        self._buffer += data
+        try:
+            while self.pending and self._buffer:
+                if not self._parse(self.pending[0]):
+                    break
+        except ValueError as exc:
+            self._fail(httpx.RemoteProtocolError(str(exc)))
+            self.abort()
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        if self.pending and self.pending[0].until_close and self._in_body:
+            self._complete(self.pending[0])
+        self._fail(httpx.ReadError(str(exc) if exc else "connection closed by server"))
+
+    def _fail(self, error: Exception) -> None:
+        self.closed = True
+        while self.pending:
+            response = self.pending.popleft()
+            if not response.future.done():
+                response.future.set_exception(error)
+        self._on_idle(self)
+
+    def _parse(self, response: RawResponse) -> bool:
+        """Consume buffered bytes for ``response``; True once it is complete."""
+        buf = self._buffer
+        if not self._in_body:
+            end = buf.find(b"\r\n\r\n")
+            if end < 0:
+                if len(buf) > _MAX_HEADER_BYTES:
+                    raise ValueError("response headers too large")
+                return False
+            self._start_body(response, bytes(buf[:end]))
+            del buf[: end + 4]
+            self._in_body = True
+        if response.until_close:
+            response._consume(buf)
+            buf.clear()
+            return False
+        if not response.chunked:
+            take = min(response.remaining, len(buf))
+            response._consume(buf[:take])
+            response.remaining -= take
+            del buf[:take]
+            if response.remaining:
+                return False
+            return self._complete(response)
+        return self._parse_chunks(response)
+
+    def _start_body(self, response: RawResponse, head: bytes) -> None:
+        response.headers_mono = time.perf_counter()
+        lines = head.split(b"\r\n")
+        parts = lines[0].split(b" ", 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise ValueError(f"bad status line {lines[0][:80]!r}")
+        response.status_code = int(parts[1])
+        length = None
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            name = name.strip().lower()
+            if name == b"content-length":
+                length = int(value)
+            elif name == b"transfer-encoding" and b"chunked" in value.lower():
+                response.chunked = True
+        if response.head:
+            response.remaining = 0
+        elif response.chunked:
+            self._chunk_left = -1
+        elif length is not None:
+            response.remaining = length
+        elif response.head or response.status_code in (204, 304) or response.status_code < 200:
+            response.remaining = 0
+        else:
+            response.until_close = True
+
+    def _parse_chunks(self, response: RawResponse) -> bool:
+        buf = self._buffer
+        while True:
+            if self._chunk_left == -2:
+                end = buf.find(b"\r\n")
+                if end < 0:
+                    return False
+                del buf[: end + 2]
+                if end == 0:
+                    return self._complete(response)
+                continue
+            if self._chunk_left == -1:
+                end = buf.find(b"\r\n")
+                if end < 0:
+                    return False
+                size = int(bytes(buf[:end]).split(b";", 1)[0], 16)
+                del buf[: end + 2]
+                # Chunk data is followed by CRLF; after the last (empty) chunk come
+                # trailers up to an empty line.
+                self._chunk_left = size + 2 if size else -2
+                continue
+            take = min(self._chunk_left, len(buf))
+            response._consume(buf[: min(take, max(0, self._chunk_left - 2))])
+            self._chunk_left -= take
+            del buf[:take]
+            if self._chunk_left:
+                return False
+            self._chunk_left = -1
+
+    def _complete(self, response: RawResponse) -> bool:
+        self.pending.popleft()
+        self._in_body = False
+        if not response.future.done():
+            response.future.set_result(response)
+        if not self.pending:
+            self._on_idle(self)
+        return True
+
+
+class RawHttpClient:
+    """Minimal HTTP/1.1 client on ``asyncio.Protocol`` for one origin.
+
+    Requests go out as wire bytes from ``encode_request``, built once per request
+    object (``prepare`` builds them before a run). Up to ``max_connections``
+    keep-alive connections are opened on demand; once all are busy, each carries up
+    to ``pipeline_depth`` requests in flight. Bodies are counted as they arrive and,
+    with ``body_digest`` (a ``hashlib`` algorithm), hashed. Failures raise the same
+    ``httpx`` exceptions as ``httpx.AsyncClient`` so callers handle both alike.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout_sec: float = 10.0,
+        max_connections: int = 1000,
+        pipeline_depth: int = 1,
+        body_digest: str = "",
+    ) -> None:
+        url = urlsplit(base_url)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            msg = f"Unsupported URL for the raw client: {base_url}"
+            raise ValueError(msg)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if url.scheme == "https" else None
+        self.timeout_sec = timeout_sec
+        self.max_connections = max_connections
+        self.pipeline_depth = max(1, pipeline_depth)
+        self.body_digest = body_digest
+        self._connections: set[_Connection] = set()
+        self._idle: list[_Connection] = []
+        self._opening = 0
+        self._freed = asyncio.Event()
+        self._payloads: dict[int, bytes] = {}
+
+    async def __aenter__(self) -> RawHttpClient:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        for conn in self._connections:
+            if conn.transport is not None:
+                conn.transport.close()
+        self._connections.clear()
+        self._idle.clear()
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        for request in requests:
+            self._payloads[id(request)] = encode_request(request)
+
+    async def send(self, request: httpx.Request) -> RawResponse:
+        """Send ``request`` and wait for the whole response.
+
+        ``connect_ms`` is the time spent opening a new connection for it (0.0 if one
+        was reused) and ``ttfb_ms`` the time from writing the request bytes until the
+        headers arrived, so neither includes waiting for a free connection. That wait
+        is bounded by ``timeout_sec`` and raises ``httpx.PoolTimeout``.
+        """
+        payload = self._payloads.get(id(request))
+        if payload is None:
+            payload = self._payloads[id(request)] = encode_request(request)
+        conn, connect_ms = await self._acquire()
+        started = time.perf_counter()
+        future = conn.send(payload, hashlib.new(self.body_digest) if self.body_digest else None)
+        try:
+            response = await asyncio.wait_for(future, self.timeout_sec)
+        except asyncio.TimeoutError:
+            # Responses on a connection arrive in order, so it cannot be reused.
+            conn.abort()
+            raise httpx.ReadTimeout("response timed out") from None
+        response.connect_ms = connect_ms
+        response.ttfb_ms = (response.headers_mono - started) * 1000.0
+        return response
+
+    async def warm_up(self, connections: int) -> None:
+        """Open up to ``connections`` idle connections ahead of the first request."""
+        wanted = max(0, min(connections, self.max_connections) - len(self._connections))
+        opened = await asyncio.gather(
+            *(self._open() for _ in range(wanted)),
+            return_exceptions=True,
+        )
+        self._idle.extend(conn for conn in opened if isinstance(conn, _Connection))
+
+    async def _acquire(self) -> tuple[_Connection, float]:
+        deadline = time.perf_counter() + self.timeout_sec
+        while True:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed and not conn.pending:
+                    return conn, 0.0
+            if len(self._connections) + self._opening < self.max_connections:
+                started = time.perf_counter()
+                conn = await self._open()
+                return conn, (time.perf_counter() - started) * 1000.0
+            if self.pipeline_depth > 1:
+                open_conns = (c for c in self._connections if not c.closed)
+                conn = min(open_conns, key=lambda c: len(c.pending), default=None)
+                if conn is not None and len(conn.pending) < self.pipeline_depth:
+                    return conn, 0.0
+            self._freed.clear()
+            try:
+                await asyncio.wait_for(self._freed.wait(), deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                raise httpx.PoolTimeout("no connection became free") from None
+
+    def _on_idle(self, conn: _Connection) -> None:
+        if conn.closed:
+            self._connections.discard(conn)
+        else:
+            self._idle.append(conn)
+        self._freed.set()
+
+    async def _open(self) -> _Connection:
+        loop = asyncio.get_running_loop()
+        self._opening += 1
+        try:
+            _, conn = await asyncio.wait_for(
+                loop.create_connection(
+                    lambda: _Connection(self._on_idle),
+                    self.host,
+                    self.port,
+                    ssl=self.ssl,
+                ),
+                self.timeout_sec,
+            )
+        except asyncio.TimeoutError:
+            raise httpx.ConnectTimeout("connect timed out") from None
+        except OSError as exc:
+            raise httpx.ConnectError(str(exc)) from exc
+        finally:
+            self._opening -= 1
+        self._connections.add(conn)
+        return conn
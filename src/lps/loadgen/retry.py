@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import itertools
+import random
+
+import numpy as np
+
+from lps.config import RetryConfig
+from lps.metrics.models import EVENT_DTYPES
+
+# Largest attempt number the event columns can hold.
+_MAX_ATTEMPT = int(np.iinfo(EVENT_DTYPES["attempt"]).max)
+
+
+class RetryBudget:
+    """Token bucket that keeps retries to a fixed share of first attempts.
+
+    Every first attempt deposits ``ratio`` tokens and every retry spends one. The bucket
+    starts with ``burst`` tokens and never holds more than ``max(burst, 1)``, so a brief
+    blip is retried in full while a sustained failure cannot multiply the load by more
+    than ``1 + ratio``.
+    """
+
+    def __init__(self, ratio: float, burst: int) -> None:
+        if ratio < 0 or burst < 0:
+            msg = "Retry budget ratio and burst must be non-negative"
+            raise ValueError(msg)
+        self.ratio = ratio
+        self.burst = burst
+        self.tokens = float(burst)
+        self._cap = float(max(burst, 1))
+
+    def deposit(self) -> None:
+        self.tokens = min(self._cap, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class RetryPolicy:
+    """Run-wide retry state: the budget, the backoff RNG and logical request ids.
+
+    Ids start at ``seed << 32``. Worker processes get distinct seeds, so ids stay unique
+    across a multi-process run.
+    """
+
+    def __init__(self, config: RetryConfig, seed: int = 0) -> None:
+        if config.max_retries > _MAX_ATTEMPT:
+            msg = f"max_retries must be at most {_MAX_ATTEMPT}"
+            raise ValueError(msg)
+        self.config = config
+        self.budget = (
+            None
+            if config.budget_ratio is None
+            else RetryBudget(config.budget_ratio, config.budget_burst)
+        )
+        self._rng = random.Random(seed)
+        self._ids = itertools.count((seed & 0x7FFF_FFFF) << 32)
+
+    def begin(self) -> int:
+        """Id for a new logical request, which also earns the budget its share."""
+        if self.budget is not None:
+            self.budget.deposit()
+        return next(self._ids)
+
+    def allow(self, attempt: int) -> bool:
+        """Whether try ``attempt`` (1 for the first retry) may be sent."""
+        if not self.config.enabled or attempt > self.config.max_retries:
+            return False
+        return self.budget is None or self.budget.withdraw()
+
+    def backoff(self, attempt: int, previous_sec: float) -> float:
+        """Seconds to wait before try ``attempt``, given the wait before the last one."""
+        base = self.config.base_delay_sec
+        if self.config.jitter:
+            delay = self._rng.uniform(base, max(base, previous_sec * 3))
+        else:
+            delay = base * 2 ** (attempt - 1)
+        return min(self.config.max_delay_sec, delay)
@@ -1,31 +1,59 @@
 from __future__ import annotations
 
 import asyncio
-import random
+import itertools
 import time
 import uuid
-from dataclasses import dataclass
-from typing import Awaitable, Callable, Iterable
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Iterator, Sequence
 
-import httpx
+import numpy as np
 
 from lps.config import LoadModel, RunConfig
-from lps.loadgen.breaker import CircuitBreaker
-from lps.loadgen.client import ClientResponse, send_request
-from lps.metrics import RequestEvent, aggregate_per_second
-from lps.patterns import schedule_for
+from lps.loadgen.adaptive import AdaptiveController, ObservedSink, find_knee, summarize_step
+from lps.loadgen.arrivals import arrivals_by_second
+from lps.loadgen.breaker import BreakerRegistry, BreakerState
+from lps.loadgen.client import send_request
+from lps.loadgen.pacing import GcraLimiter, workers_needed
+from lps.loadgen.retry import RetryPolicy
+from lps.loadgen.scheduler import OpenLoopScheduler
+from lps.loadgen.sink import EventSink, StorageEventSink
+from lps.loadgen.templates import RequestPool, build_request_pool
+from lps.loadgen.transport import Transport, open_transport
+from lps.loadgen.workers import execute_in_processes
+from lps.metrics import (
+    BreakerTransition,
+    ErrorType,
+    EventColumns,
+    LiveAggregator,
+    PerSecondHistograms,
+    RequestEvent,
+    SecondCallback,
+    aggregate_columns,
+)
+from lps.patterns import PatternSchedule, schedule_for
 from lps.storage import Storage
 
+# Closed-loop pool sizing: how often it runs, the weight of each new response in the
+# latency average, and how overdue the limiter's next slot must be to count as behind.
+_CONTROL_INTERVAL_SEC = 0.05
+_LATENCY_WEIGHT = 0.2
+_BEHIND_SEC = 0.02
+
 
 @dataclass(frozen=True, slots=True)
 class RunResult:
     run_id: str
-    events: list[RequestEvent]
     requested_rates: list[float]
     started_mono: float
 
 
 ProgressCallback = Callable[[int, int], Awaitable[None]]
+# Drives the load for a run into the sink and returns the perf_counter() instant of t=0.
+LoadExecutor = Callable[
+    [str, RunConfig, PatternSchedule, EventSink, ProgressCallback | None],
+    Awaitable[float],
+]
 
 
 def _new_run_id() -> str:
@@ -36,194 +64,358 @@ async def run_experiment(
     config: RunConfig,
     storage: Storage,
     progress: ProgressCallback | None = None,
+    executor: LoadExecutor | None = None,
+    on_second: SecondCallback | None = None,
 ) -> str:
+    """Run a load test end to end and return its run id.
+
+    While the run is going, per-second rows are published provisionally a couple of
+    seconds after each second ends (and passed to ``on_second`` from the writer
+    thread). They are replaced by an exact aggregation over every stored event once
+    the run finishes.
+    """
     run_id = config.run_id or _new_run_id()
     if storage.run_exists(run_id):
         msg = f"Run {run_id} already exists"
         raise ValueError(msg)
-    schedule = schedule_for(config.pattern, config.duration_sec, config.seed)
-    run_result = await _execute_load(run_id, config, schedule.rates_per_sec, progress)
-    per_second = aggregate_per_second(
+    adaptive = config.load_model is LoadModel.ADAPTIVE
+    if adaptive:
+        if config.processes > 1 or executor is not None:
+            msg = "Adaptive runs steer the rate from one process"
+            raise ValueError(msg)
+        # The controller fills in each step's rate as the run goes; the sinks read it live.
+        schedule = PatternSchedule(np.zeros(config.duration_sec))
+        requested_rates: Sequence[float] = schedule.rates
+    else:
+        schedule = schedule_for(
+            config.pattern,
+            config.duration_sec,
+            config.seed,
+            config.resolution_sec,
+        )
+        requested_rates = schedule.rates_per_sec
+    storage.begin_run(config, run_id)
+    if executor is None:
+        executor = execute_in_processes if config.processes > 1 else _execute_local
+    sink = StorageEventSink(
+        storage,
+        histograms=PerSecondHistograms(run_id),
+        live=LiveAggregator(run_id, requested_rates, on_second=on_second),
+    )
+    try:
+        started_mono = await executor(run_id, config, schedule, sink, progress)
+    finally:
+        await asyncio.to_thread(sink.close)
+    if adaptive:
+        # Seconds after the search stopped were never offered any load.
+        offered = np.flatnonzero(schedule.rates)
+        requested_rates = schedule.rates[: offered[-1] + 1 if len(offered) else 0]
+    per_second = aggregate_columns(
         run_id,
-        run_result.events,
-        run_result.requested_rates,
-        run_result.started_mono,
+        storage.load_event_columns(run_id),
+        requested_rates,
+        started_mono,
     )
-    storage.save_run(config, run_id, run_result.events, per_second)
+    storage.replace_per_second(run_id, per_second)
+    if adaptive:
+        knee = find_knee(per_second, config.adaptive)
+        storage.save_knee(run_id, asdict(knee) if knee else None)
     return run_id
 
 
+async def _execute_local(
+    run_id: str,
+    config: RunConfig,
+    schedule: PatternSchedule,
+    sink: EventSink,
+    progress: ProgressCallback | None,
+) -> float:
+    run_result = await _execute_load(run_id, config, schedule, sink, progress)
+    return run_result.started_mono
+
+
 async def _execute_load(
     run_id: str,
     config: RunConfig,
-    requested_rates: list[float],
+    schedule: PatternSchedule,
+    sink: EventSink,
     progress: ProgressCallback | None,
+    started_mono: float | None = None,
 ) -> RunResult:
-    events: list[RequestEvent] = []
-    started_mono = time.perf_counter()
-    breaker = None
+    breakers = None
     if config.circuit_breaker.enabled:
-        breaker = CircuitBreaker(
-            window_size=config.circuit_breaker.window_size,
-            error_rate_threshold=config.circuit_breaker.error_rate_threshold,
-            open_cooldown_sec=config.circuit_breaker.open_cooldown_sec,
-        )
-    limits = httpx.Limits(max_connections=1000, max_keepalive_connections=200)
-    async with httpx.AsyncClient(limits=limits) as client:
-        if config.load_model is LoadModel.CLOSED_LOOP:
+
+        def on_transition(key: str, old: BreakerState, new: BreakerState, at: float) -> None:
+            sink.emit_breaker(BreakerTransition(run_id, at, key, old.value, new.value))
+
+        breakers = BreakerRegistry(config.circuit_breaker, on_transition)
+    retry = RetryPolicy(config.retry, config.seed)
+    pool = build_request_pool(config.target, config.seed)
+    async with open_transport(config, pool) as transport:
+        if config.transport.warm_up_connections:
+            await transport.warm_up(config.transport.warm_up_connections)
+        arrivals = None
+        if config.load_model is LoadModel.OPEN_LOOP:
+            # Offsets are generated a chunk at a time as seconds go by; the first
+            # chunk is ready before t=0 so the opening second is not lost to it.
+            arrivals = _primed(arrivals_by_second(schedule, config.arrival, config.seed))
+        if started_mono is None:
+            started_mono = time.perf_counter()
+        sink.start(started_mono)
+        await _sleep_until_time(started_mono)
+        if config.load_model is LoadModel.ADAPTIVE:
+            await _adaptive(
+                transport,
+                pool,
+                run_id,
+                config,
+                schedule,
+                sink,
+                breakers,
+                retry,
+                progress,
+                started_mono,
+            )
+        elif config.load_model is LoadModel.CLOSED_LOOP:
             await _closed_loop(
-                client,
+                transport,
+                pool,
                 run_id,
                 config,
-                requested_rates,
-                events,
-                breaker,
+                schedule,
+                sink,
+                breakers,
+                retry,
                 progress,
                 started_mono,
             )
         else:
+            assert arrivals is not None
             await _open_loop(
-                client,
+                transport,
+                pool,
                 run_id,
                 config,
-                requested_rates,
-                events,
-                breaker,
+                schedule,
+                sink,
+                breakers,
+                retry,
                 progress,
                 started_mono,
+                arrivals,
             )
-    return RunResult(run_id=run_id, events=events, requested_rates=requested_rates, started_mono=started_mono)
+    return RunResult(
+        run_id=run_id,
+        requested_rates=schedule.rates_per_sec,
+        started_mono=started_mono,
+    )
 
 
 async def _open_loop(
-    client: httpx.AsyncClient,
+    transport: Transport,
+    pool: RequestPool,
     run_id: str,
     config: RunConfig,
-    requested_rates: list[float],
-    events: list[RequestEvent],
-    breaker: CircuitBreaker | None,
+    schedule: PatternSchedule,
+    sink: EventSink,
+    breakers: BreakerRegistry | None,
+    retry: RetryPolicy,
     progress: ProgressCallback | None,
     started_mono: float,
+    arrivals: Iterator[np.ndarray],
 ) -> None:
-    tasks: list[asyncio.Task[None]] = []
-    lock = asyncio.Lock()
-    rng = random.Random(config.seed)
-    total = len(requested_rates)
-    second = 0
-    while second < total:
-        elapsed = time.perf_counter() - started_mono
-        current_second = int(elapsed)
-        if current_second > second:
-            second = current_second
-            if second >= total:
-                break
-        rate = requested_rates[second]
-        n = int(rate)
-        if rate - n > 0 and rng.random() < (rate - n):
-            n += 1
-        if n > 0:
-            for i in range(n):
-                offset = (i / n) if n > 0 else 0.0
-                tasks.append(
-                    asyncio.create_task(
-                        _schedule_one(
-                            client,
-                            run_id,
-                            config,
-                            events,
-                            breaker,
-                            started_mono,
-                            lock,
-                            second + offset,
-                        )
-                    )
-                )
-        await _sleep_until_next_second(started_mono, second)
+    total = schedule.duration_sec()
+
+    async def launch(due: float) -> None:
+        await _maybe_send(
+            transport, pool, run_id, config, sink, breakers, retry, intended_mono=due
+        )
+
+    def drop(due: float) -> None:
+        sink.emit(_dropped_event(run_id, due))
+
+    scheduler = OpenLoopScheduler(config.max_in_flight, launch, drop)
+    for second, offsets in enumerate(arrivals):
+        due = (started_mono + offsets).tolist()
+        if time.perf_counter() - started_mono >= second + 1:
+            # Seconds that already passed (e.g. a late start) are dropped, not replayed.
+            for missed in due:
+                drop(missed)
+            continue
+        scheduler.push(due)
+        await scheduler.run_until(started_mono + second + 1)
         if progress:
-            await progress(min(second + 1, total), total)
-        second += 1
-    if tasks:
-        try:
-            await asyncio.wait_for(asyncio.gather(*tasks), timeout=_grace_timeout(config))
-        except asyncio.TimeoutError:
-            for task in tasks:
-                task.cancel()
-            await asyncio.gather(*tasks, return_exceptions=True)
+            await progress(second + 1, total)
+    await scheduler.drain(_grace_timeout(config))
 
 
 async def _closed_loop(
-    client: httpx.AsyncClient,
+    transport: Transport,
+    pool: RequestPool,
     run_id: str,
     config: RunConfig,
-    requested_rates: list[float],
-    events: list[RequestEvent],
-    breaker: CircuitBreaker | None,
+    schedule: PatternSchedule,
+    sink: EventSink,
+    breakers: BreakerRegistry | None,
+    retry: RetryPolicy,
     progress: ProgressCallback | None,
     started_mono: float,
+    until: asyncio.Event | None = None,
 ) -> None:
-    stop_at = started_mono + len(requested_rates)
-    lock = asyncio.Lock()
-
-    async def worker(worker_id: int) -> None:
-        while time.perf_counter() < stop_at:
-            elapsed = time.perf_counter() - started_mono
-            rate = _rate_for_time(requested_rates, elapsed)
-            if rate <= 0:
-                await asyncio.sleep(0.05)
-                continue
-            per_worker_interval = max(0.0, config.closed_loop_workers / rate)
-            await _maybe_send(
-                client,
-                run_id,
-                config,
-                events,
-                breaker,
-                lock,
-            )
-            await asyncio.sleep(per_worker_interval)
+    """Paced closed-loop load: workers share a GCRA limiter that follows the schedule.
+
+    The pool is resized every ``_CONTROL_INTERVAL_SEC`` to what the current rate and
+    latency need (``workers_needed``), never beyond ``config.closed_loop_workers``.
+    Setting ``until`` ends the load before the schedule does.
+    """
+    total = schedule.duration_sec()
+    stop_at = started_mono + total
+    limiter = GcraLimiter(schedule.rate_at, started_mono, stop_at)
+    tasks: list[asyncio.Task[None]] = []
+    active = 0
+    target = 1
+    latency_sec = 0.0
 
-    tasks = [asyncio.create_task(worker(i)) for i in range(config.closed_loop_workers)]
-    if progress:
-        for second in range(len(requested_rates)):
-            await _sleep_until_next_second(started_mono, second)
-            await progress(second + 1, len(requested_rates))
+    async def worker() -> None:
+        nonlocal active, latency_sec
+        try:
+            while active <= target and await limiter.acquire():
+                sent = time.perf_counter()
+                if await _maybe_send(transport, pool, run_id, config, sink, breakers, retry):
+                    elapsed = time.perf_counter() - sent
+                    if latency_sec == 0.0:
+                        latency_sec = elapsed
+                    else:
+                        latency_sec += _LATENCY_WEIGHT * (elapsed - latency_sec)
+        finally:
+            active -= 1
+
+    reported = 0
+    while (now := time.perf_counter()) < stop_at and not (until and until.is_set()):
+        # Size for the next tick too, so the pool is ready when the rate steps up.
+        elapsed = now - started_mono
+        rate = max(schedule.rate_at(elapsed), schedule.rate_at(elapsed + _CONTROL_INTERVAL_SEC))
+        behind = limiter.lag(now) > _BEHIND_SEC
+        target = workers_needed(rate, latency_sec, active, behind, config.closed_loop_workers)
+        while active < target:
+            active += 1
+            tasks.append(asyncio.create_task(worker()))
+        if progress and elapsed >= reported + 1:
+            reported = int(elapsed)
+            await progress(reported, total)
+        await asyncio.sleep(_CONTROL_INTERVAL_SEC)
+    limiter.stop()
     await asyncio.gather(*tasks)
+    if progress and reported < total:
+        await progress(total, total)
 
 
-async def _schedule_one(
-    client: httpx.AsyncClient,
+async def _adaptive(
+    transport: Transport,
+    pool: RequestPool,
     run_id: str,
     config: RunConfig,
-    events: list[RequestEvent],
-    breaker: CircuitBreaker | None,
+    schedule: PatternSchedule,
+    sink: EventSink,
+    breakers: BreakerRegistry | None,
+    retry: RetryPolicy,
+    progress: ProgressCallback | None,
     started_mono: float,
-    lock: asyncio.Lock,
-    offset_sec: float,
 ) -> None:
-    await _sleep_until_time(started_mono + offset_sec)
-    await _maybe_send(client, run_id, config, events, breaker, lock)
+    """Closed-loop load at a rate an ``AdaptiveController`` picks one step at a time.
+
+    Each step's rate is written into ``schedule`` as it starts, and the step is judged
+    on its live per-second rows once it ends.
+    """
+    settings = config.adaptive
+    controller = AdaptiveController(settings)
+    observed = ObservedSink(sink, run_id, schedule.rates, started_mono)
+    total = schedule.duration_sec()
+    done = asyncio.Event()
+
+    async def steer() -> None:
+        try:
+            for first in range(0, total, settings.step_sec):
+                end = min(total, first + settings.step_sec)
+                schedule.rates[first:end] = controller.rate
+                await _sleep_until_time(started_mono + end)
+                rows = observed.closed_seconds(started_mono + end)
+                if not rows or not controller.observe(summarize_step(rows, settings)):
+                    return
+        finally:
+            done.set()
+
+    await asyncio.gather(
+        _closed_loop(
+            transport,
+            pool,
+            run_id,
+            config,
+            schedule,
+            observed,
+            breakers,
+            retry,
+            progress,
+            started_mono,
+            until=done,
+        ),
+        steer(),
+    )
 
 
 async def _maybe_send(
-    client: httpx.AsyncClient,
+    transport: Transport,
+    pool: RequestPool,
     run_id: str,
     config: RunConfig,
-    events: list[RequestEvent],
-    breaker: CircuitBreaker | None,
-    lock: asyncio.Lock,
-) -> None:
+    sink: EventSink,
+    breakers: BreakerRegistry | None,
+    retry: RetryPolicy,
+    intended_mono: float | None = None,
+) -> bool:
+    """Send the next pooled request and emit an event per attempt; False if the breaker
+    refused."""
+    request = pool.next()
+    breaker = None if breakers is None else breakers.for_request(request)
     if breaker is not None and not breaker.allow_request():
-        return
-    response = await send_request(client, run_id, config.target, config.retry)
+        return False
+    response = await send_request(
+        transport,
+        run_id,
+        request,
+        retry,
+        intended_mono=intended_mono,
+        expected_digest=config.transport.expected_digest,
+    )
     if breaker is not None:
         breaker.record(response.success)
-    async with lock:
-        events.append(response.event)
+    if len(response.events) == 1:
+        sink.emit(response.event)
+    else:
+        # All tries in one batch, so readers of a batch always see the request's last one.
+        sink.emit_columns(run_id, EventColumns.from_events(list(response.events)))
+    return True
 
 
-async def _sleep_until_next_second(started_mono: float, second: int) -> None:
-    target = started_mono + second + 1
-    await _sleep_until_time(target)
+def _primed(seconds: Iterator[np.ndarray]) -> Iterator[np.ndarray]:
+    """``seconds`` with its first entry already computed."""
+    first = next(seconds, None)
+    return seconds if first is None else itertools.chain((first,), seconds)
+
+
+def _dropped_event(run_id: str, due: float) -> RequestEvent:
+    now = time.perf_counter()
+    return RequestEvent(
+        run_id=run_id,
+        wall_time=time.time() - (now - due),
+        mono_time=now,
+        latency_ms=0.0,
+        status_code=None,
+        error_type=ErrorType.DROPPED,
+        bytes_sent=0,
+        bytes_received=0,
+        intended_mono=due,
+    )
 
 
 async def _sleep_until_time(target: float) -> None:
@@ -232,12 +424,5 @@ async def _sleep_until_time(target: float) -> None:
         await asyncio.sleep(delay)
 
 
-def _rate_for_time(rates: list[float], elapsed: float) -> float:
-    idx = int(elapsed)
-    if idx < 0 or idx >= len(rates):
-        return 0.0
-    return rates[idx]
-
-
 def _grace_timeout(config: RunConfig) -> float:
     return max(5.0, min(30.0, config.target.timeout_sec * 2))
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Iterable
+
+LaunchFn = Callable[[float], Awaitable[None]]
+DropFn = Callable[[float], None]
+
+# Arrivals due within this many seconds of each other are dispatched in one wakeup.
+_DISPATCH_SLACK_SEC = 0.001
+
+
+class OpenLoopScheduler:
+    """Dispatches open-loop arrivals just in time from a min-heap of due times.
+
+    Only arrivals that have been pushed but not yet dispatched live in the heap, and a
+    task exists only while its request is in flight. Once ``max_in_flight`` requests
+    are outstanding, further arrivals are handed to ``on_drop`` instead of queueing.
+    """
+
+    def __init__(self, max_in_flight: int, launch: LaunchFn, on_drop: DropFn) -> None:
+        if max_in_flight <= 0:
+            msg = "max_in_flight must be positive"
+            raise ValueError(msg)
+        self.max_in_flight = max_in_flight
+        self.dispatched = 0
+        self.dropped = 0
+        self._launch = launch
+        self._on_drop = on_drop
+        self._due: list[float] = []
+        self._in_flight: set[asyncio.Task[None]] = set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._in_flight)
+
+    @property
+    def pending(self) -> int:
+        return len(self._due)
+
+    def push(self, arrivals: Iterable[float]) -> None:
+        for due in arrivals:
+            heapq.heappush(self._due, due)
+
+    async def run_until(self, deadline: float) -> None:
+        """Dispatch every arrival due before ``deadline``, then sleep until it."""
+        while self._due and self._due[0] < deadline:
+            delay = self._due[0] - time.perf_counter()
+            if delay > _DISPATCH_SLACK_SEC:
+                await asyncio.sleep(delay)
+            now = time.perf_counter() + _DISPATCH_SLACK_SEC
+            while self._due and self._due[0] <= now and self._due[0] < deadline:
+                self._dispatch(heapq.heappop(self._due))
+        delay = deadline - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def drain(self, timeout: float) -> None:
+        """Wait for in-flight requests, cancelling whatever is left after ``timeout``."""
+        if not self._in_flight:
+            return
+        _, pending = await asyncio.wait(set(self._in_flight), timeout=timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _dispatch(self, due: float) -> None:
+        if len(self._in_flight) >= self.max_in_flight:
+            self.dropped += 1
+            self._on_drop(due)
+            return
+        self.dispatched += 1
+        task = asyncio.create_task(self._launch(due))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
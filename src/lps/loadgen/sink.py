@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Protocol
+
+from lps.metrics import BreakerTransition, EventBuffer, EventColumns, RequestEvent
+from lps.metrics.histogram import PerSecondHistograms
+from lps.metrics.live import LiveAggregator
+from lps.storage import Storage
+
+
+class EventSink(Protocol):
+    def start(self, started_mono: float) -> None:
+        ...
+
+    def emit(self, event: RequestEvent) -> None:
+        ...
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        ...
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+@dataclass(slots=True)
+class ListEventSink:
+    """Keeps every event in memory. Useful for tests and short ad-hoc runs."""
+
+    events: list[RequestEvent] = field(default_factory=list)
+    transitions: list[BreakerTransition] = field(default_factory=list)
+
+    def start(self, started_mono: float) -> None:
+        return None
+
+    def emit(self, event: RequestEvent) -> None:
+        self.events.append(event)
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        self.events.extend(columns.to_events(run_id))
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        self.transitions.append(transition)
+
+    def close(self) -> None:
+        return None
+
+
+class StorageEventSink:
+    """Streams events into DuckDB from a background writer thread.
+
+    Events are buffered in an ``EventBuffer`` and handed over in batches of
+    ``batch_size``, as column arrays all the way to DuckDB; a partially filled batch is
+    flushed every ``flush_interval_sec`` so a crashed run keeps what it already sent.
+    ``emit`` blocks once ``max_pending`` events are waiting, which bounds memory when
+    the writer cannot keep up. When ``histograms`` is given, the writer also folds each
+    batch into per-second latency histograms and stores every second once it closes.
+    With ``live``, closed seconds are also aggregated into provisional per-second rows
+    that are stored and handed to the aggregator's subscriber during the run.
+    Circuit breaker transitions are written with the next batch.
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        batch_size: int = 10_000,
+        max_pending: int = 100_000,
+        flush_interval_sec: float = 1.0,
+        histograms: PerSecondHistograms | None = None,
+        live: LiveAggregator | None = None,
+    ) -> None:
+        self.storage = storage
+        self.histograms = histograms
+        self.live = live
+        self.batch_size = batch_size
+        self.max_pending = max(batch_size, max_pending)
+        self.flush_interval_sec = flush_interval_sec
+        self.written = 0
+        self.started_mono = 0.0
+        self._pending = EventBuffer()
+        self._transitions: list[BreakerTransition] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._run, name="lps-event-writer", daemon=True)
+        self._thread.start()
+
+    def start(self, started_mono: float) -> None:
+        self.started_mono = started_mono
+        if self.histograms is not None:
+            self.histograms.start(started_mono)
+        if self.live is not None:
+            self.live.start(started_mono)
+
+    def emit(self, event: RequestEvent) -> None:
+        with self._cond:
+            self._wait_for_room()
+            self._pending.append(event)
+            self._notify_if_full()
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        with self._cond:
+            self._wait_for_room()
+            self._pending.extend(run_id, columns)
+            self._notify_if_full()
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        with self._cond:
+            self._transitions.append(transition)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _wait_for_room(self) -> None:
+        while len(self._pending) >= self.max_pending and self._error is None:
+            self._cond.wait()
+        if self._error is not None:
+            raise self._error
+
+    def _notify_if_full(self) -> None:
+        if len(self._pending) >= self.batch_size:
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._closed:
+                    self._cond.wait(timeout=self.flush_interval_sec)
+                run_id = self._pending.run_id
+                batch = self._pending.drain()
+                transitions, self._transitions = self._transitions, []
+                done = self._closed and not len(batch) and not transitions
+                self._cond.notify_all()
+            try:
+                if done:
+                    self._flush_histograms(final=True)
+                    self._publish_live(final=True)
+                    return
+                if len(batch):
+                    assert run_id is not None
+                    self.storage.append_event_columns(run_id, batch)
+                    self._record(batch)
+                if transitions:
+                    self.storage.append_breaker_transitions(transitions, self.started_mono)
+                self._publish_live(final=False)
+            except BaseException as exc:  # surfaced to the caller on close()
+                with self._cond:
+                    self._error = exc
+                    self._pending.drain()
+                    self._cond.notify_all()
+                return
+            self.written += len(batch)
+
+    def _record(self, columns: EventColumns) -> None:
+        if self.histograms is not None:
+            self.histograms.record(columns)
+            self._flush_histograms(final=False)
+        if self.live is not None:
+            self.live.record(columns)
+
+    def _publish_live(self, final: bool) -> None:
+        if self.live is None:
+            return
+        rows = self.live.pop_all() if final else self.live.pop_closed()
+        if rows:
+            self.storage.save_per_second(rows)
+
+    def _flush_histograms(self, final: bool) -> None:
+        if self.histograms is None:
+            return
+        closed = self.histograms.pop_all() if final else self.histograms.pop_closed()
+        if closed:
+            self.storage.append_histograms(self.histograms.run_id, closed)
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import csv
+import json
+from pathlib import Path
+from string import Template
+from typing import Mapping, Sequence
+
+import httpx
+import numpy as np
+
+from lps.config import RequestTemplate, TargetConfig
+from lps.loadgen.breaker import TEMPLATE_EXTENSION
+
+
+class RequestPool:
+    """Requests built before a run and handed out round-robin.
+
+    The pool is a weighted sample of the target's templates, each filled in from a
+    row of its data file, so sending a request involves no formatting or encoding.
+    """
+
+    def __init__(self, requests: Sequence[httpx.Request]) -> None:
+        if not requests:
+            msg = "RequestPool needs at least one request"
+            raise ValueError(msg)
+        self._requests = list(requests)
+        self._next = 0
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def unique(self) -> list[httpx.Request]:
+        return list({id(r): r for r in self._requests}.values())
+
+    def next(self) -> httpx.Request:
+        request = self._requests[self._next]
+        self._next = (self._next + 1) % len(self._requests)
+        return request
+
+
+def build_request_pool(target: TargetConfig, seed: int) -> RequestPool:
+    timeout = {"timeout": httpx.Timeout(target.timeout_sec).as_dict()}
+    templates = target.templates or (RequestTemplate(),)
+    rows = load_data_rows(target.data_file) if target.data_file else [{}]
+    weights = np.array([t.weight for t in templates], dtype=np.float64)
+    if (weights < 0).any() or weights.sum() <= 0:
+        msg = "Request template weights must be non-negative and not all zero"
+        raise ValueError(msg)
+    rng = np.random.default_rng(seed)
+    size = max(1, target.pool_size)
+    if len(templates) == 1 and len(rows) == 1:
+        size = 1
+    picks = rng.choice(len(templates), size=size, p=weights / weights.sum())
+    # Identical (template, row) pairs share one prepared request.
+    built: dict[tuple[int, int], httpx.Request] = {}
+    requests = []
+    for slot, template_index in enumerate(picks.tolist()):
+        key = (template_index, slot % len(rows))
+        if key not in built:
+            built[key] = _build(target, templates[key[0]], rows[key[1]], timeout)
+        requests.append(built[key])
+    return RequestPool(requests)
+
+
+def load_data_rows(path: str) -> list[dict[str, str]]:
+    """Rows of a CSV (with a header) or JSONL data file, as strings by column name."""
+    source = Path(path)
+    with source.open(encoding="utf-8", newline="") as fh:
+        if source.suffix in (".jsonl", ".ndjson", ".json"):
+            rows = [json.loads(line) for line in fh if line.strip()]
+        else:
+            rows = list(csv.DictReader(fh))
+    if not rows:
+        msg = f"Data file {path} has no rows"
+        raise ValueError(msg)
+    return [{key: _text(value) for key, value in row.items()} for row in rows]
+
+
+def _text(value: object) -> str:
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def _build(
+    target: TargetConfig,
+    template: RequestTemplate,
+    row: Mapping[str, str],
+    extensions: dict[str, object],
+) -> httpx.Request:
+    try:
+        path = Template(template.path).substitute(row)
+        headers = {**target.headers, **template.headers}
+        headers = {name: Template(value).substitute(row) for name, value in headers.items()}
+        body = None if template.body is None else Template(template.body).substitute(row).encode()
+        if body is not None and template.body_base64:
+            body = base64.b64decode(body, validate=True)
+    except KeyError as exc:
+        msg = f"Request template references {exc} which is not a data file column"
+        raise ValueError(msg) from exc
+    except binascii.Error as exc:
+        msg = f"Request template body is not valid base64: {exc}"
+        raise ValueError(msg) from exc
+    method = template.method or target.method
+    return httpx.Request(
+        method,
+        _join(target.base_url, path),
+        headers=headers,
+        content=body,
+        # Each request gets its own dict; the template names its circuit breaker.
+        extensions={**extensions, TEMPLATE_EXTENSION: f"{method} {template.path}"},
+    )
+
+
+def _join(base_url: str, path: str) -> str:
+    if not path:
+        return base_url
+    if path.startswith(("http://", "https://")):
+        return path
+    if path.startswith("?"):
+        return base_url + path
+    return base_url.rstrip("/") + "/" + path.lstrip("/")
@@ -0,0 +1,372 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Protocol
+from urllib.parse import urlsplit
+
+import httpx
+
+from lps.config import ClientEngine, RunConfig, TransportConfig
+from lps.loadgen.rawhttp import RawHttpClient
+from lps.loadgen.templates import RequestPool
+
+# Connection-setup timestamps for the request in flight on the current task, filled in by
+# httpcore's trace hook: [connect started, connect (and TLS) finished].
+_CONNECT_MARKS: ContextVar[list[float] | None] = ContextVar("lps_connect_marks", default=None)
+
+# gRPC statuses recorded as the HTTP status a gateway would answer with. DEADLINE_EXCEEDED
+# and UNAVAILABLE are raised as httpx timeout and connect errors instead; every other
+# non-OK status marks the exchange as failed.
+_GRPC_HTTP_STATUS = {
+    "OK": 200,
+    "CANCELLED": 499,
+    "UNKNOWN": 500,
+    "INVALID_ARGUMENT": 400,
+    "NOT_FOUND": 404,
+    "ALREADY_EXISTS": 409,
+    "PERMISSION_DENIED": 403,
+    "RESOURCE_EXHAUSTED": 429,
+    "FAILED_PRECONDITION": 400,
+    "ABORTED": 409,
+    "OUT_OF_RANGE": 400,
+    "UNIMPLEMENTED": 501,
+    "INTERNAL": 500,
+    "DATA_LOSS": 500,
+    "UNAUTHENTICATED": 401,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Exchange:
+    status_code: int
+    bytes_received: int
+    # Part of the exchange spent opening a new connection; 0.0 on a reused one.
+    connect_ms: float = 0.0
+    # Time after connecting until the response headers arrived.
+    ttfb_ms: float = 0.0
+    digest: str = ""  # hex digest of the body when hashing is configured
+    # The protocol reported the call as failed (a non-OK gRPC status).
+    failed: bool = False
+
+
+class Transport(Protocol):
+    """Sends prepared requests for a run. Failures raise ``httpx`` exceptions."""
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        ...
+
+    async def send(self, request: httpx.Request) -> Exchange:
+        ...
+
+    async def warm_up(self, connections: int) -> None:
+        ...
+
+    async def aclose(self) -> None:
+        ...
+
+
+@asynccontextmanager
+async def open_transport(config: RunConfig, pool: RequestPool) -> AsyncIterator[Transport]:
+    """The transport for a run, chosen by ``config.transport.engine``."""
+    transport: Transport
+    settings = config.transport
+    if settings.body_digest:
+        hashlib.new(settings.body_digest)  # fail fast on an unknown algorithm
+    if settings.engine is ClientEngine.RAW:
+        transport = RawTransport(config.target.base_url, config.target.timeout_sec, settings)
+    elif settings.engine is ClientEngine.HTTP2:
+        transport = Http2Transport(config.target.base_url, settings)
+    elif settings.engine is ClientEngine.GRPC:
+        transport = GrpcTransport(config.target.base_url, config.target.timeout_sec, settings)
+    else:
+        transport = HttpxTransport(config.target.base_url, settings)
+    transport.prepare(pool.unique())
+    try:
+        yield transport
+    finally:
+        await transport.aclose()
+
+
+class HttpxTransport:
+    """HTTP/1.1 over one ``httpx.AsyncClient`` connection pool."""
+
+    def __init__(self, base_url: str, settings: TransportConfig) -> None:
+        self.base_url = base_url
+        self.settings = settings
+        limits = httpx.Limits(
+            max_connections=settings.max_connections,
+            max_keepalive_connections=settings.max_keepalive_connections,
+        )
+        self.client = httpx.AsyncClient(limits=limits)
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        _install_trace(requests)
+
+    async def send(self, request: httpx.Request) -> Exchange:
+        return await _send_traced(self.client, request, self.settings)
+
+    async def warm_up(self, connections: int) -> None:
+        await _warm_up(self.client, self.base_url, connections)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class Http2Transport:
+    """HTTP/2 over ``http2_connections`` connections, each multiplexing at most
+    ``streams_per_connection`` requests. Needs the ``h2`` package (``lps[http2]``).
+    """
+
+    def __init__(self, base_url: str, settings: TransportConfig) -> None:
+        try:
+            import h2  # noqa: F401
+        except ImportError as exc:
+            msg = "The http2 engine needs the h2 package: pip install 'lps[http2]'"
+            raise RuntimeError(msg) from exc
+        self.base_url = base_url
+        self.settings = settings
+        limits = httpx.Limits(max_connections=1, max_keepalive_connections=1)
+        self._clients = [
+            httpx.AsyncClient(http1=False, http2=True, limits=limits)
+            for _ in range(max(1, settings.http2_connections))
+        ]
+        self._slots = _StreamSlots(len(self._clients), settings.streams_per_connection)
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        _install_trace(requests)
+
+    async def send(self, request: httpx.Request) -> Exchange:
+        index = await self._slots.acquire()
+        try:
+            return await _send_traced(self._clients[index], request, self.settings)
+        finally:
+            self._slots.release(index)
+
+    async def warm_up(self, connections: int) -> None:
+        await asyncio.gather(*(_warm_up(c, self.base_url, 1) for c in self._clients))
+
+    async def aclose(self) -> None:
+        for client in self._clients:
+            await client.aclose()
+
+
+class RawTransport:
+    """The ``RawHttpClient`` HTTP/1.1 fast path."""
+
+    def __init__(self, base_url: str, timeout_sec: float, settings: TransportConfig) -> None:
+        self.client = RawHttpClient(
+            base_url,
+            timeout_sec=timeout_sec,
+            max_connections=settings.max_connections,
+            pipeline_depth=settings.pipeline_depth,
+            body_digest=settings.body_digest,
+        )
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        self.client.prepare(requests)
+
+    async def send(self, request: httpx.Request) -> Exchange:
+        response = await self.client.send(request)
+        return Exchange(
+            response.status_code,
+            response.received,
+            response.connect_ms,
+            response.ttfb_ms,
+            response.digest.hexdigest() if response.digest is not None else "",
+        )
+
+    async def warm_up(self, connections: int) -> None:
+        await self.client.warm_up(connections)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class GrpcTransport:
+    """Unary gRPC calls over ``http2_connections`` persistent channels, each carrying at
+    most ``streams_per_connection`` calls at once. Needs ``grpcio`` (``lps[grpc]``).
+
+    The target is ``grpc://host:port`` (``grpcs://`` for TLS). A request's URL path names
+    the method (``/package.Service/Method``), its body is the serialized request message
+    and its headers are sent as metadata, so request templates work unchanged.
+    """
+
+    def __init__(self, base_url: str, timeout_sec: float, settings: TransportConfig) -> None:
+        try:
+            import grpc
+            import grpc.aio
+        except ImportError as exc:
+            msg = "The grpc engine needs the grpcio package: pip install 'lps[grpc]'"
+            raise RuntimeError(msg) from exc
+        url = urlsplit(base_url)
+        if url.scheme not in ("grpc", "grpcs") or not url.hostname:
+            msg = f"gRPC targets look like grpc://host:port, got {base_url}"
+            raise ValueError(msg)
+        self._grpc = grpc
+        self.timeout_sec = timeout_sec
+        self.settings = settings
+        target = f"{url.hostname}:{url.port or (443 if url.scheme == 'grpcs' else 80)}"
+        # Without a local subchannel pool, channels to one target share a connection.
+        options = [("grpc.use_local_subchannel_pool", 1)]
+        self._channels = [
+            grpc.aio.secure_channel(target, grpc.ssl_channel_credentials(), options)
+            if url.scheme == "grpcs"
+            else grpc.aio.insecure_channel(target, options)
+            for _ in range(max(1, settings.http2_connections))
+        ]
+        self._slots = _StreamSlots(len(self._channels), settings.streams_per_connection)
+        self._calls: dict[tuple[int, str], Any] = {}
+        self._metadata: dict[int, tuple[tuple[str, str], ...]] = {}
+
+    def prepare(self, requests: list[httpx.Request]) -> None:
+        for request in requests:
+            self._metadata[id(request)] = tuple(
+                (name, value)
+                for name, value in request.headers.multi_items()
+                if name not in ("host", "content-length")
+            )
+
+    async def send(self, request: httpx.Request) -> Exchange:
+        index = await self._slots.acquire()
+        try:
+            return await self._call(index, request)
+        finally:
+            self._slots.release(index)
+
+    async def _call(self, index: int, request: httpx.Request) -> Exchange:
+        grpc = self._grpc
+        channel = self._channels[index]
+        started = time.perf_counter()
+        connect_ms = 0.0
+        if channel.get_state() is not grpc.ChannelConnectivity.READY:
+            try:
+                await asyncio.wait_for(channel.channel_ready(), self.timeout_sec)
+            except asyncio.TimeoutError:
+                raise httpx.ConnectTimeout("gRPC channel did not connect") from None
+            connect_ms = (time.perf_counter() - started) * 1000.0
+        method = request.url.path
+        call = self._calls.get((index, method))
+        if call is None:
+            call = self._calls[(index, method)] = channel.unary_unary(method)
+        metadata = self._metadata.get(id(request), ())
+        digest = hashlib.new(self.settings.body_digest) if self.settings.body_digest else None
+        try:
+            reply = await call(request.content, timeout=self.timeout_sec, metadata=metadata)
+        except grpc.aio.AioRpcError as exc:
+            code = exc.code()
+            if code is grpc.StatusCode.DEADLINE_EXCEEDED:
+                raise httpx.ReadTimeout(exc.details() or "deadline exceeded") from None
+            if code is grpc.StatusCode.UNAVAILABLE:
+                raise httpx.ConnectError(exc.details() or "unavailable") from None
+            return Exchange(_GRPC_HTTP_STATUS.get(code.name, 500), 0, connect_ms, failed=True)
+        if digest is not None:
+            digest.update(reply)
+        # A unary reply arrives as one message, so its first byte comes with the last.
+        ttfb_ms = (time.perf_counter() - started) * 1000.0 - connect_ms
+        return Exchange(
+            200,
+            len(reply),
+            connect_ms,
+            ttfb_ms,
+            digest.hexdigest() if digest is not None else "",
+        )
+
+    async def warm_up(self, connections: int) -> None:
+        ready = (asyncio.wait_for(c.channel_ready(), self.timeout_sec) for c in self._channels)
+        await asyncio.gather(*ready, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        for channel in self._channels:
+            await channel.close()
+
+
+class _StreamSlots:
+    """Least-busy choice among ``connections``, each capped at ``streams`` requests."""
+
+    def __init__(self, connections: int, streams: int) -> None:
+        self._streams = [asyncio.Semaphore(max(1, streams)) for _ in range(connections)]
+        self._in_flight = [0] * connections
+
+    async def acquire(self) -> int:
+        index = min(range(len(self._in_flight)), key=self._in_flight.__getitem__)
+        self._in_flight[index] += 1
+        try:
+            await self._streams[index].acquire()
+        except BaseException:
+            self._in_flight[index] -= 1
+            raise
+        return index
+
+    def release(self, index: int) -> None:
+        self._streams[index].release()
+        self._in_flight[index] -= 1
+
+
+def _install_trace(requests: list[httpx.Request]) -> None:
+    for request in requests:
+        request.extensions["trace"] = _trace
+
+
+async def _send_traced(
+    client: httpx.AsyncClient, request: httpx.Request, settings: TransportConfig
+) -> Exchange:
+    """Send ``request``, reading the body whole or (``stream_body``) chunk by chunk."""
+    marks: list[float] = []
+    token = _CONNECT_MARKS.set(marks)
+    started = time.perf_counter()
+    try:
+        resp = await client.send(request, stream=True)
+    finally:
+        _CONNECT_MARKS.reset(token)
+    headers_mono = time.perf_counter()
+    digest = hashlib.new(settings.body_digest) if settings.body_digest else None
+    try:
+        if settings.stream_body:
+            received = 0
+            async for chunk in resp.aiter_bytes():
+                received += len(chunk)
+                if digest is not None:
+                    digest.update(chunk)
+        else:
+            body = await resp.aread()
+            received = len(body)
+            if digest is not None:
+                digest.update(body)
+    finally:
+        await resp.aclose()
+    connect_ms = (marks[-1] - marks[0]) * 1000.0 if len(marks) > 1 else 0.0
+    return Exchange(
+        resp.status_code,
+        received,
+        connect_ms,
+        (headers_mono - started) * 1000.0 - connect_ms,
+        digest.hexdigest() if digest is not None else "",
+    )
+
+
+async def _trace(event: str, info: dict[str, Any]) -> None:
+    marks = _CONNECT_MARKS.get()
+    if marks is None:
+        return
+    if event == "connection.connect_tcp.started":
+        marks.clear()
+        marks.append(time.perf_counter())
+    elif marks and event in ("connection.connect_tcp.complete", "connection.start_tls.complete"):
+        marks.append(time.perf_counter())
+
+
+async def _warm_up(client: httpx.AsyncClient, base_url: str, connections: int) -> None:
+    """Open ``connections`` keep-alive connections with concurrent HEAD requests."""
+
+    async def probe() -> None:
+        try:
+            await client.head(base_url)
+        except httpx.HTTPError:
+            pass
+
+    await asyncio.gather(*(probe() for _ in range(connections)))
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import queue
+import time
+from dataclasses import dataclass, field, replace
+from multiprocessing.process import BaseProcess
+from typing import Any, Awaitable, Callable
+
+from lps.config import RunConfig
+from lps.loadgen.sink import EventSink
+from lps.metrics import BreakerTransition, EventBuffer, EventColumns, RequestEvent
+from lps.patterns import PatternSchedule
+
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# Time the parent gives workers between "everyone is ready" and t=0 of the run.
+_START_DELAY_SEC = 0.25
+_BATCH_SIZE = 2_000
+_BATCH_INTERVAL_SEC = 0.25
+
+
+def split_schedule(schedule: PatternSchedule, processes: int) -> list[PatternSchedule]:
+    share = schedule.scaled(1.0 / processes)
+    if schedule.arrivals is None:
+        # Staggered, the shares' even trains merge back into one smooth train.
+        return [replace(share, arrival_phase=index / processes) for index in range(processes)]
+    return [replace(share, arrivals=part) for part in schedule.arrivals.split(processes)]
+
+
+def worker_config(config: RunConfig, index: int, processes: int) -> RunConfig:
+    return replace(
+        config,
+        processes=1,
+        seed=config.seed + index,
+        closed_loop_workers=max(1, config.closed_loop_workers // processes),
+        max_in_flight=max(1, config.max_in_flight // processes),
+    )
+
+
+async def execute_in_processes(
+    run_id: str,
+    config: RunConfig,
+    schedule: PatternSchedule,
+    sink: EventSink,
+    progress: ProgressCallback | None,
+) -> float:
+    """Run the load across ``config.processes`` worker processes.
+
+    Each worker drives its share of the schedule on its own event loop and HTTP client.
+    All workers start at the same ``time.perf_counter()`` instant, so their events land on
+    the parent's time base unchanged. That relies on ``perf_counter`` reading one
+    system-wide monotonic clock in every process (``CLOCK_MONOTONIC`` on Linux,
+    ``mach_absolute_time`` on macOS, ``QueryPerformanceCounter`` on Windows); each
+    worker's reading when it reports ready is checked against the parent's. Returns
+    that shared start time.
+    """
+    processes = config.processes
+    ctx = mp.get_context("spawn")
+    out: mp.Queue[tuple[str, int, Any]] = ctx.Queue(maxsize=256)
+    start_at = ctx.Value("d", 0.0)
+    go = ctx.Event()
+    workers = [
+        ctx.Process(
+            target=_worker_main,
+            args=(
+                index,
+                run_id,
+                worker_config(config, index, processes),
+                shares,
+                start_at,
+                go,
+                out,
+            ),
+            name=f"lps-worker-{index}",
+            daemon=True,
+        )
+        for index, shares in enumerate(split_schedule(schedule, processes))
+    ]
+    state = _PoolState(total=processes, spawned_mono=time.perf_counter())
+    for proc in workers:
+        proc.start()
+    try:
+        while state.ready < processes:
+            await _pump(out, run_id, sink, state, workers)
+        if state.errors:
+            msg = f"Worker processes failed: {', '.join(state.errors)}"
+            raise RuntimeError(msg)
+        started_mono = time.perf_counter() + _START_DELAY_SEC
+        sink.start(started_mono)
+        start_at.value = started_mono
+        go.set()
+        ticker = asyncio.create_task(
+            _tick_progress(progress, started_mono, schedule.duration_sec())
+        )
+        try:
+            while state.done < processes:
+                await _pump(out, run_id, sink, state, workers)
+        finally:
+            ticker.cancel()
+    finally:
+        # Workers still waiting for the start signal, or still running after another one
+        # failed, are stopped rather than waited for.
+        wait_sec = 5.0 if go.is_set() and not state.errors else 0.0
+        for proc in workers:
+            proc.join(timeout=wait_sec)
+            if proc.is_alive():
+                proc.terminate()
+    if state.errors:
+        msg = f"Worker processes failed: {', '.join(state.errors)}"
+        raise RuntimeError(msg)
+    return started_mono
+
+
+@dataclass(slots=True)
+class _PoolState:
+    total: int
+    spawned_mono: float
+    ready: int = 0
+    done: int = 0
+    errors: list[str] = field(default_factory=list)
+    # Workers that sent "done" or "error", and those seen exited without doing so.
+    reported: set[int] = field(default_factory=set)
+    exited: set[int] = field(default_factory=set)
+
+
+async def _pump(
+    out: mp.Queue[Any],
+    run_id: str,
+    sink: EventSink,
+    state: _PoolState,
+    workers: list[BaseProcess],
+) -> None:
+    try:
+        kind, index, payload = await asyncio.to_thread(out.get, True, 0.5)
+    except queue.Empty:
+        exited = {i for i, proc in enumerate(workers) if proc.exitcode is not None}
+        # A worker already gone at the previous poll has nothing left in the queue.
+        lost = sorted((exited & state.exited) - state.reported)
+        state.exited = exited
+        for i in lost:
+            code = workers[i].exitcode
+            state.errors.append(f"worker {i} exited without reporting (exit code {code})")
+        if lost:
+            state.ready = state.done = state.total
+        return
+    if kind == "ready":
+        state.ready += 1
+        if not state.spawned_mono <= payload <= time.perf_counter():
+            state.errors.append(f"worker {index}: perf_counter() is not shared with the parent")
+    elif kind == "events":
+        sink.emit_columns(run_id, payload)
+    elif kind == "breaker":
+        sink.emit_breaker(payload)
+    elif kind == "error":
+        state.errors.append(f"worker {index}: {payload}")
+        state.reported.add(index)
+        state.done += 1
+    elif kind == "done":
+        state.reported.add(index)
+        state.done += 1
+
+
+async def _tick_progress(
+    progress: ProgressCallback | None,
+    started_mono: float,
+    total: int,
+) -> None:
+    if progress is None:
+        return
+    for second in range(total):
+        delay = started_mono + second + 1 - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await progress(second + 1, total)
+
+
+class _QueueEventSink:
+    """Ships events from a worker process to the parent as small column batches."""
+
+    def __init__(self, index: int, out: mp.Queue[Any]) -> None:
+        self.index = index
+        self.out = out
+        self._batch = EventBuffer()
+        self._last_flush = time.perf_counter()
+
+    def start(self, started_mono: float) -> None:
+        return None
+
+    def emit(self, event: RequestEvent) -> None:
+        self._batch.append(event)
+        self._maybe_flush()
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        self._batch.extend(run_id, columns)
+        self._maybe_flush()
+
+    def emit_breaker(self, transition: BreakerTransition) -> None:
+        self.out.put(("breaker", self.index, transition))
+
+    def _maybe_flush(self) -> None:
+        now = time.perf_counter()
+        if len(self._batch) >= _BATCH_SIZE or now - self._last_flush >= _BATCH_INTERVAL_SEC:
+            self.flush()
+
+    def flush(self) -> None:
+        if len(self._batch):
+            self.out.put(("events", self.index, self._batch.drain()))
+        self._last_flush = time.perf_counter()
+
+    def close(self) -> None:
+        self.flush()
+
+
+def _worker_main(
+    index: int,
+    run_id: str,
+    config: RunConfig,
+    schedule: PatternSchedule,
+    start_at: Any,
+    go: Any,
+    out: mp.Queue[Any],
+) -> None:
+    # Imported here rather than at module level: the runner imports this module.
+    from lps.loadgen.runner import _execute_load
+
+    sink = _QueueEventSink(index, out)
+    out.put(("ready", index, time.perf_counter()))
+    go.wait()
+    try:
+        asyncio.run(
+            _execute_load(run_id, config, schedule, sink, None, started_mono=start_at.value)
+        )
+        sink.close()
+    except BaseException as exc:
+        sink.close()
+        out.put(("error", index, repr(exc)))
+        return
+    out.put(("done", index, None))
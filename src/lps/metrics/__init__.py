@@ -1,6 +1,28 @@
 from __future__ import annotations
 
-from lps.metrics.aggregator import aggregate_per_second
-from lps.metrics.models import ErrorType, PerSecondMetrics, RequestEvent
+from lps.metrics.aggregator import aggregate_columns, aggregate_per_second
+from lps.metrics.buffer import EventBuffer
+from lps.metrics.histogram import LatencyHistogram, PerSecondHistograms
+from lps.metrics.live import LiveAggregator, SecondCallback
+from lps.metrics.models import (
+    BreakerTransition,
+    ErrorType,
+    EventColumns,
+    PerSecondMetrics,
+    RequestEvent,
+)
 
-__all__ = ["ErrorType", "PerSecondMetrics", "RequestEvent", "aggregate_per_second"]
+__all__ = [
+    "BreakerTransition",
+    "ErrorType",
+    "EventBuffer",
+    "EventColumns",
+    "LatencyHistogram",
+    "LiveAggregator",
+    "PerSecondHistograms",
+    "PerSecondMetrics",
+    "RequestEvent",
+    "SecondCallback",
+    "aggregate_columns",
+    "aggregate_per_second",
+]
@@ -1,11 +1,17 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Iterable
+from typing import Iterable, Sequence
 
 import numpy as np
 
-from lps.metrics.models import ErrorType, PerSecondMetrics, RequestEvent
+from lps.metrics.models import ERROR_CODES, ErrorType, EventColumns, PerSecondMetrics, RequestEvent
+
+# A request counts as late when it left more than this long after its intended send time.
+LATE_THRESHOLD_MS = 5.0
+PERCENTILES = (50.0, 95.0, 99.0)
+
+_DROPPED = ERROR_CODES[ErrorType.DROPPED]
+_TIMEOUT = ERROR_CODES[ErrorType.TIMEOUT]
 
 
 def aggregate_per_second(
@@ -14,37 +20,137 @@ def aggregate_per_second(
     requested_rates: list[float],
     start_mono: float,
 ) -> list[PerSecondMetrics]:
-    buckets: dict[int, list[RequestEvent]] = defaultdict(list)
-    for event in events:
-        second = max(0, int(event.mono_time - start_mono))
-        buckets[second].append(event)
+    return aggregate_columns(run_id, EventColumns.from_events(events), requested_rates, start_mono)
+
+
+def aggregate_columns(
+    run_id: str,
+    columns: EventColumns,
+    requested_rates: Sequence[float],
+    start_mono: float,
+    first_second: int = 0,
+) -> list[PerSecondMetrics]:
+    """Per-second rows for ``first_second + i`` where ``requested_rates[i]`` is its rate.
 
-    metrics: list[PerSecondMetrics] = []
+    Events completing outside that window are ignored. Each try of a retried request is
+    an event of its own, so ``achieved_rps`` counts every attempt the target saw and
+    ``amplification`` relates them to the first attempts completing in the same second.
+    Schedule lag is taken from first attempts only, and latency percentiles from the
+    last try of each logical request, so a retried request is measured once.
+    """
     duration = len(requested_rates)
-    for second in range(duration):
-        bucket = buckets.get(second, [])
-        latencies = [e.latency_ms for e in bucket if e.latency_ms >= 0]
-        achieved = len(bucket)
-        error_count = sum(1 for e in bucket if e.error_type is not None)
-        timeout_count = sum(1 for e in bucket if e.error_type is ErrorType.TIMEOUT)
-        if latencies:
-            p50 = float(np.percentile(latencies, 50))
-            p95 = float(np.percentile(latencies, 95))
-            p99 = float(np.percentile(latencies, 99))
-        else:
-            p50 = p95 = p99 = 0.0
-        total = max(1, achieved)
-        metrics.append(
-            PerSecondMetrics(
-                run_id=run_id,
-                second=second,
-                requested_rps=requested_rates[second],
-                achieved_rps=float(achieved),
-                p50_ms=p50,
-                p95_ms=p95,
-                p99_ms=p99,
-                error_rate=error_count / total,
-                timeout_rate=timeout_count / total,
-            )
+    if duration == 0:
+        return []
+    seconds = np.maximum(0, (columns.mono_time - start_mono).astype(np.int64)) - first_second
+    in_range = (seconds >= 0) & (seconds < duration)
+    dropped = in_range & (columns.error_code == _DROPPED)
+    sent = in_range & ~dropped
+    first = columns.attempt == 0
+    measured = sent & (columns.latency_ms >= 0) & columns.final_attempts()
+
+    def count(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(seconds[mask], minlength=duration)
+
+    achieved = count(sent)
+    errors = count(sent & (columns.error_code != 0))
+    timeouts = count(sent & (columns.error_code == _TIMEOUT))
+    drops = count(dropped)
+    retries = count(sent & ~first)
+    firsts = achieved - retries
+
+    scheduled = ~np.isnan(columns.intended_mono)
+    response_ms = np.where(
+        scheduled,
+        (columns.mono_time - columns.intended_mono) * 1000.0,
+        columns.latency_ms,
+    )
+    lag_ms = np.where(
+        scheduled & ~np.isnan(columns.sent_mono),
+        (columns.sent_mono - columns.intended_mono) * 1000.0,
+        0.0,
+    )
+    first_sent = sent & first
+    late = count(first_sent & (lag_ms > LATE_THRESHOLD_MS))
+    max_lag = np.zeros(duration)
+    np.maximum.at(max_lag, seconds[first_sent], lag_ms[first_sent])
+
+    service, response = grouped_percentiles(
+        seconds[measured],
+        (columns.latency_ms[measured], response_ms[measured]),
+        duration,
+    )
+    totals = np.maximum(1, achieved)
+    error_rate = errors / totals
+    timeout_rate = timeouts / totals
+    amplification = achieved / np.maximum(1, firsts)
+
+    return [
+        PerSecondMetrics(
+            run_id=run_id,
+            second=first_second + second,
+            requested_rps=float(requested_rates[second]),
+            achieved_rps=float(achieved[second]),
+            p50_ms=float(service[second, 0]),
+            p95_ms=float(service[second, 1]),
+            p99_ms=float(service[second, 2]),
+            error_rate=float(error_rate[second]),
+            timeout_rate=float(timeout_rate[second]),
+            dropped_rps=float(drops[second]),
+            response_p50_ms=float(response[second, 0]),
+            response_p95_ms=float(response[second, 1]),
+            response_p99_ms=float(response[second, 2]),
+            late_count=int(late[second]),
+            schedule_lag_max_ms=float(max_lag[second]),
+            retry_rps=float(retries[second]),
+            amplification=float(amplification[second]),
         )
-    return metrics
+        for second in range(duration)
+    ]
+
+
+def grouped_percentiles(
+    groups: np.ndarray,
+    values: Sequence[np.ndarray],
+    n_groups: int,
+    percentiles: tuple[float, ...] = PERCENTILES,
+) -> list[np.ndarray]:
+    """Percentiles per group id in ``[0, n_groups)`` for each array in ``values``.
+
+    Events are partitioned by group once (a stable radix sort on a narrow key) and
+    that partition is reused for every value array. Results match
+    ``np.percentile(..., method="linear")`` bit for bit; groups without values get 0.0.
+    Each returned array has shape ``(n_groups, len(percentiles))``.
+    """
+    outputs = [np.zeros((n_groups, len(percentiles))) for _ in values]
+    if len(groups) == 0:
+        return outputs
+    by_group = np.argsort(groups.astype(np.min_scalar_type(n_groups)), kind="stable")
+    counts = np.bincount(groups, minlength=n_groups)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    present = counts > 0
+    segments = list(zip(starts[present].tolist(), ends[present].tolist()))
+    n = counts[present][:, None]
+    base = starts[present][:, None]
+    quantiles = np.asarray(percentiles, dtype=np.float64) / 100
+    virtual = (n - 1) * quantiles[None, :]
+    lower = np.floor(virtual)
+    gamma = virtual - lower
+    lower_idx = lower.astype(np.intp)
+    upper_idx = lower_idx + 1
+    at_end = virtual >= n - 1
+    last = np.broadcast_to(n - 1, virtual.shape)
+    lower_idx[at_end] = last[at_end]
+    upper_idx[at_end] = last[at_end]
+    upper_half = gamma >= 0.5
+    for out, column in zip(outputs, values):
+        ordered = column[by_group]
+        for start, end in segments:
+            ordered[start:end].sort()
+        below = ordered[base + lower_idx]
+        above = ordered[base + upper_idx]
+        diff = above - below
+        result = below + diff * gamma
+        result[upper_half] = (above - diff * (1 - gamma))[upper_half]
+        out[present] = result
+    return outputs
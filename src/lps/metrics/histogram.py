@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping
+
+import numpy as np
+
+from lps.metrics.models import ERROR_CODES, ErrorType, EventColumns
+
+# Fixed log-bucket layout shared by every histogram so they merge by adding counts.
+# Bucket 0 holds [0, MIN_VALUE_MS); bucket i >= 1 holds
+# [MIN_VALUE_MS * GROWTH**(i - 1), MIN_VALUE_MS * GROWTH**i), i.e. ~1% wide.
+MIN_VALUE_MS = 0.001
+MAX_VALUE_MS = 10_000_000.0
+GROWTH = 1.01
+_LOG_GROWTH = math.log(GROWTH)
+BUCKET_COUNT = math.ceil(math.log(MAX_VALUE_MS / MIN_VALUE_MS) / _LOG_GROWTH) + 2
+
+METRICS = ("service", "response")
+
+_DROPPED = ERROR_CODES[ErrorType.DROPPED]
+
+
+def bucket_indices(values_ms: np.ndarray) -> np.ndarray:
+    values = np.asarray(values_ms, dtype=np.float64)
+    scaled = np.maximum(values, MIN_VALUE_MS) / MIN_VALUE_MS
+    indices = np.floor(np.log(scaled) / _LOG_GROWTH).astype(np.int64) + 1
+    indices[values < MIN_VALUE_MS] = 0
+    return np.minimum(indices, BUCKET_COUNT - 1)
+
+
+def bucket_values(indices: np.ndarray) -> np.ndarray:
+    """Representative value (geometric bucket midpoint) for each bucket index."""
+    indices = np.asarray(indices, dtype=np.float64)
+    values = MIN_VALUE_MS * np.power(GROWTH, indices - 0.5)
+    return np.where(indices == 0, MIN_VALUE_MS / 2, values)
+
+
+@dataclass(slots=True)
+class LatencyHistogram:
+    counts: np.ndarray = field(default_factory=lambda: np.zeros(BUCKET_COUNT, dtype=np.int64))
+
+    @classmethod
+    def from_values(cls, values_ms: Iterable[float]) -> LatencyHistogram:
+        hist = cls()
+        hist.record(np.fromiter(values_ms, np.float64))
+        return hist
+
+    @classmethod
+    def from_buckets(cls, buckets: np.ndarray, counts: np.ndarray) -> LatencyHistogram:
+        hist = cls()
+        buckets = np.asarray(buckets, dtype=np.int64)
+        np.add.at(hist.counts, buckets, np.asarray(counts, dtype=np.int64))
+        return hist
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum())
+
+    def record(self, values_ms: np.ndarray) -> None:
+        values = np.asarray(values_ms, dtype=np.float64)
+        values = values[values >= 0]
+        if len(values):
+            self.counts += np.bincount(bucket_indices(values), minlength=BUCKET_COUNT)
+
+    def merge(self, other: LatencyHistogram) -> None:
+        self.counts += other.counts
+
+    def __add__(self, other: LatencyHistogram) -> LatencyHistogram:
+        return LatencyHistogram(self.counts + other.counts)
+
+    def percentile(self, q: float) -> float:
+        return float(self.percentiles([q])[0])
+
+    def percentiles(self, qs: Iterable[float]) -> np.ndarray:
+        """Nearest-rank percentiles, reported as the bucket's representative value."""
+        qs = np.asarray(list(qs), dtype=np.float64)
+        total = self.total
+        if total == 0:
+            return np.zeros(len(qs))
+        ranks = np.maximum(1, np.ceil(qs / 100 * total))
+        buckets = np.searchsorted(np.cumsum(self.counts), ranks)
+        return bucket_values(buckets)
+
+    def nonzero(self) -> tuple[np.ndarray, np.ndarray]:
+        buckets = np.flatnonzero(self.counts)
+        return buckets, self.counts[buckets]
+
+
+class PerSecondHistograms:
+    """Service/response latency histograms for the seconds of a run that are still open.
+
+    Events are bucketed by completion second, and a retried request is measured by its
+    last try, like ``aggregate_columns``; the runner emits all tries of a request in one
+    batch, so that try is always in the batch being recorded. A second is handed back by
+    ``pop_closed`` once events ``close_after_sec`` seconds later have been seen, so only a
+    handful of seconds are held at any time.
+    """
+
+    def __init__(self, run_id: str, close_after_sec: int = 5) -> None:
+        self.run_id = run_id
+        self.close_after_sec = close_after_sec
+        self.started_mono: float | None = None
+        self._open: dict[int, dict[str, LatencyHistogram]] = {}
+        self._latest = -1
+
+    def start(self, started_mono: float) -> None:
+        self.started_mono = started_mono
+
+    def record(self, columns: EventColumns) -> None:
+        if self.started_mono is None or len(columns) == 0:
+            return
+        seconds = np.maximum(0, (columns.mono_time - self.started_mono).astype(np.int64))
+        measured = (
+            (columns.error_code != _DROPPED)
+            & (columns.latency_ms >= 0)
+            & columns.final_attempts()
+        )
+        seconds = seconds[measured]
+        if len(seconds) == 0:
+            return
+        service = columns.latency_ms[measured]
+        intended = columns.intended_mono[measured]
+        response = np.where(
+            np.isnan(intended),
+            service,
+            (columns.mono_time[measured] - intended) * 1000.0,
+        )
+        self._latest = max(self._latest, int(seconds.max()))
+        for metric, values in (("service", service), ("response", response)):
+            keys = seconds * BUCKET_COUNT + bucket_indices(values)
+            unique, counts = np.unique(keys, return_counts=True)
+            for second in np.unique(unique // BUCKET_COUNT).tolist():
+                in_second = unique // BUCKET_COUNT == second
+                hist = self._open.setdefault(second, _empty())[metric]
+                np.add.at(hist.counts, unique[in_second] % BUCKET_COUNT, counts[in_second])
+
+    def pop_closed(self) -> dict[int, dict[str, LatencyHistogram]]:
+        cutoff = self._latest - self.close_after_sec
+        closed = {second: hists for second, hists in self._open.items() if second < cutoff}
+        for second in closed:
+            del self._open[second]
+        return closed
+
+    def pop_all(self) -> dict[int, dict[str, LatencyHistogram]]:
+        remaining, self._open = self._open, {}
+        return remaining
+
+
+def _empty() -> dict[str, LatencyHistogram]:
+    return {metric: LatencyHistogram() for metric in METRICS}
+
+
+def merge_histograms(histograms: Iterable[LatencyHistogram]) -> LatencyHistogram:
+    merged = LatencyHistogram()
+    for hist in histograms:
+        merged.merge(hist)
+    return merged
+
+
+def sparse_rows(
+    histograms: Mapping[int, Mapping[str, LatencyHistogram]],
+) -> tuple[list[int], list[str], list[int], list[int]]:
+    seconds: list[int] = []
+    metrics: list[str] = []
+    buckets: list[int] = []
+    counts: list[int] = []
+    for second, by_metric in histograms.items():
+        for metric, hist in by_metric.items():
+            idx, cnt = hist.nonzero()
+            seconds.extend([second] * len(idx))
+            metrics.extend([metric] * len(idx))
+            buckets.extend(idx.tolist())
+            counts.extend(cnt.tolist())
+    return seconds, metrics, buckets, counts
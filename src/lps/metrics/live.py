@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import time
+from typing import Callable, Sequence
+
+import numpy as np
+
+from lps.metrics.aggregator import aggregate_columns
+from lps.metrics.models import EventColumns, PerSecondMetrics
+
+SecondCallback = Callable[[PerSecondMetrics], None]
+
+
+class LiveAggregator:
+    """Closes out per-second metrics while a run is still going.
+
+    Events are bucketed by completion second, as in ``aggregate_columns``, so a request
+    that resolves or times out late is counted in the second it finished. Second ``s``
+    therefore stops receiving events once the clock passes ``started_mono + s + 1``;
+    it is closed ``grace_sec`` later to let batched events reach the sink. Events that
+    still arrive for a closed second are left to the final aggregation.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        requested_rates: Sequence[float],
+        grace_sec: float = 2.0,
+        on_second: SecondCallback | None = None,
+    ) -> None:
+        self.run_id = run_id
+        self.requested_rates = requested_rates
+        self.grace_sec = grace_sec
+        self.on_second = on_second
+        self.started_mono: float | None = None
+        self.next_second = 0
+        self._parts: list[EventColumns] = []
+
+    def start(self, started_mono: float) -> None:
+        self.started_mono = started_mono
+
+    def record(self, columns: EventColumns) -> None:
+        if len(columns):
+            self._parts.append(columns)
+
+    def pop_closed(self, now: float | None = None) -> list[PerSecondMetrics]:
+        if self.started_mono is None:
+            return []
+        now = time.perf_counter() if now is None else now
+        closable = int(np.floor(now - self.started_mono - self.grace_sec))
+        return self._close_until(min(closable, len(self.requested_rates)))
+
+    def pop_all(self) -> list[PerSecondMetrics]:
+        if self.started_mono is None:
+            return []
+        return self._close_until(len(self.requested_rates))
+
+    def _close_until(self, end_second: int) -> list[PerSecondMetrics]:
+        """Aggregate seconds ``[next_second, end_second)`` and keep later events."""
+        first = self.next_second
+        if end_second <= first:
+            return []
+        assert self.started_mono is not None
+        columns = EventColumns.concat(self._parts or [EventColumns.from_events([])])
+        rows = aggregate_columns(
+            self.run_id,
+            columns,
+            self.requested_rates[first:end_second],
+            self.started_mono,
+            first_second=first,
+        )
+        self.next_second = end_second
+        later = columns.mono_time - self.started_mono >= end_second
+        self._parts = [columns.select(later)] if later.any() else []
+        if self.on_second is not None:
+            for row in rows:
+                self.on_second(row)
+        return rows
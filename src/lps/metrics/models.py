@@ -1,7 +1,11 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, fields
 from enum import Enum
+from typing import Iterable, Sequence
+
+import numpy as np
 
 
 class ErrorType(str, Enum):
@@ -9,6 +13,34 @@ class ErrorType(str, Enum):
     CONNECT = "connect"
     READ = "read"
     OTHER = "other"
+    DROPPED = "dropped"
+    VALIDATION = "validation"  # response body did not match the expected digest
+    STATUS = "status"  # the call completed with a failure status (a non-OK gRPC status)
+
+
+# Dictionary encoding of ErrorType for columnar storage; code 0 means "no error".
+ERROR_TYPES: tuple[ErrorType | None, ...] = (None, *ErrorType)
+ERROR_CODES: dict[ErrorType | None, int] = {err: code for code, err in enumerate(ERROR_TYPES)}
+# Columnar stand-in for RequestEvent.status_code = None.
+NO_STATUS = -1
+# Columnar stand-in for an event that belongs to no logical request (e.g. a dropped one).
+NO_REQUEST = -1
+# Array type of each EventColumns field; narrow integers keep buffered events compact.
+EVENT_DTYPES: dict[str, np.dtype] = {
+    "wall_time": np.dtype(np.float64),
+    "mono_time": np.dtype(np.float64),
+    "latency_ms": np.dtype(np.float64),
+    "status_code": np.dtype(np.int16),
+    "error_code": np.dtype(np.int8),
+    "bytes_sent": np.dtype(np.int32),
+    "bytes_received": np.dtype(np.int32),
+    "intended_mono": np.dtype(np.float64),
+    "sent_mono": np.dtype(np.float64),
+    "connect_ms": np.dtype(np.float32),
+    "ttfb_ms": np.dtype(np.float32),
+    "request_id": np.dtype(np.int64),
+    "attempt": np.dtype(np.int8),
+}
 
 
 @dataclass(frozen=True, slots=True)
@@ -21,6 +53,41 @@ class RequestEvent:
     error_type: ErrorType | None
     bytes_sent: int
     bytes_received: int
+    intended_mono: float | None = None
+    sent_mono: float | None = None
+    # Time spent opening a new connection for this request; excluded from latency_ms.
+    connect_ms: float = 0.0
+    # Time from sending until the response headers arrived (server think time); the rest
+    # of latency_ms is spent transferring the body.
+    ttfb_ms: float = 0.0
+    # Every try of a request is its own event: they share ``request_id`` and count up
+    # ``attempt`` from 0. ``latency_ms`` and ``sent_mono`` cover this try alone.
+    request_id: int = NO_REQUEST
+    attempt: int = 0
+
+    @property
+    def response_ms(self) -> float:
+        """Latency measured from the intended send time, including scheduler lag."""
+        if self.intended_mono is None:
+            return self.latency_ms
+        return (self.mono_time - self.intended_mono) * 1000.0
+
+    @property
+    def schedule_lag_ms(self) -> float:
+        if self.intended_mono is None or self.sent_mono is None:
+            return 0.0
+        return (self.sent_mono - self.intended_mono) * 1000.0
+
+
+@dataclass(frozen=True, slots=True)
+class BreakerTransition:
+    """A circuit breaker changing state (``closed``, ``open`` or ``half_open``)."""
+
+    run_id: str
+    mono_time: float
+    key: str  # which breaker: "run", a request template or a host, per BreakerScope
+    from_state: str
+    to_state: str
 
 
 @dataclass(frozen=True, slots=True)
@@ -34,3 +101,120 @@ class PerSecondMetrics:
     p99_ms: float
     error_rate: float
     timeout_rate: float
+    dropped_rps: float = 0.0
+    response_p50_ms: float = 0.0
+    response_p95_ms: float = 0.0
+    response_p99_ms: float = 0.0
+    late_count: int = 0
+    schedule_lag_max_ms: float = 0.0
+    # Retries sent, and attempts per first attempt (1.0 without retries, 0.0 when idle).
+    retry_rps: float = 0.0
+    amplification: float = 0.0
+
+
+@dataclass(frozen=True, slots=True)
+class EventColumns:
+    """Request events as parallel NumPy arrays, one entry per event.
+
+    Missing ``intended_mono``/``sent_mono`` are NaN, a missing status code is
+    ``NO_STATUS``, a missing request id is ``NO_REQUEST`` and ``error_code`` indexes
+    ``ERROR_TYPES``.
+    """
+
+    wall_time: np.ndarray
+    mono_time: np.ndarray
+    latency_ms: np.ndarray
+    status_code: np.ndarray
+    error_code: np.ndarray
+    bytes_sent: np.ndarray
+    bytes_received: np.ndarray
+    intended_mono: np.ndarray
+    sent_mono: np.ndarray
+    connect_ms: np.ndarray
+    ttfb_ms: np.ndarray
+    request_id: np.ndarray
+    attempt: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.mono_time)
+
+    def select(self, mask: np.ndarray) -> EventColumns:
+        return EventColumns(*(getattr(self, f.name)[mask] for f in fields(self)))
+
+    def final_attempts(self) -> np.ndarray:
+        """Mask of each logical request's last try; events without a request id stand alone."""
+        final = self.request_id == NO_REQUEST
+        if final.all():
+            return final
+        order = np.lexsort((self.attempt, self.request_id))
+        ids = self.request_id[order]
+        last = np.append(ids[1:] != ids[:-1], True)
+        final[order[last]] = True
+        return final
+
+    @classmethod
+    def concat(cls, parts: Sequence[EventColumns]) -> EventColumns:
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(p, f.name) for p in parts]) for f in fields(cls)))
+
+    @classmethod
+    def from_events(cls, events: Iterable[RequestEvent]) -> EventColumns:
+        items = events if isinstance(events, list) else list(events)
+        count = len(items)
+        nan = float("nan")
+        values = {
+            "wall_time": (e.wall_time for e in items),
+            "mono_time": (e.mono_time for e in items),
+            "latency_ms": (e.latency_ms for e in items),
+            "status_code": (NO_STATUS if e.status_code is None else e.status_code for e in items),
+            "error_code": (ERROR_CODES[e.error_type] for e in items),
+            "bytes_sent": (e.bytes_sent for e in items),
+            "bytes_received": (e.bytes_received for e in items),
+            "intended_mono": (nan if e.intended_mono is None else e.intended_mono for e in items),
+            "sent_mono": (nan if e.sent_mono is None else e.sent_mono for e in items),
+            "connect_ms": (e.connect_ms for e in items),
+            "ttfb_ms": (e.ttfb_ms for e in items),
+            "request_id": (e.request_id for e in items),
+            "attempt": (e.attempt for e in items),
+        }
+        arrays = {
+            name: np.fromiter(values[name], dtype, count) for name, dtype in EVENT_DTYPES.items()
+        }
+        return cls(**arrays)
+
+    def to_events(self, run_id: str) -> list[RequestEvent]:
+        rows = zip(*(getattr(self, name).tolist() for name in EVENT_DTYPES))
+        return [
+            RequestEvent(
+                run_id=run_id,
+                wall_time=wall_time,
+                mono_time=mono_time,
+                latency_ms=latency_ms,
+                status_code=None if status_code == NO_STATUS else status_code,
+                error_type=ERROR_TYPES[error_code],
+                bytes_sent=bytes_sent,
+                bytes_received=bytes_received,
+                intended_mono=None if math.isnan(intended_mono) else intended_mono,
+                sent_mono=None if math.isnan(sent_mono) else sent_mono,
+                connect_ms=connect_ms,
+                ttfb_ms=ttfb_ms,
+                request_id=request_id,
+                attempt=attempt,
+            )
+            for (
+                wall_time,
+                mono_time,
+                latency_ms,
+                status_code,
+                error_code,
+                bytes_sent,
+                bytes_received,
+                intended_mono,
+                sent_mono,
+                connect_ms,
+                ttfb_ms,
+                request_id,
+                attempt,
+            ) in rows
+        ]
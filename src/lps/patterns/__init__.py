@@ -1,6 +1,17 @@
 from __future__ import annotations
 
-from lps.patterns.base import PatternSchedule, TrafficPattern
+from lps.patterns.base import ArrivalSource, PatternSchedule, TrafficPattern
+from lps.patterns.composite import CompositePattern, parse_expression
 from lps.patterns.factory import schedule_for
+from lps.patterns.replay import ReplayPattern, TraceArrivals
 
-__all__ = ["PatternSchedule", "TrafficPattern", "schedule_for"]
+__all__ = [
+    "ArrivalSource",
+    "CompositePattern",
+    "PatternSchedule",
+    "ReplayPattern",
+    "TraceArrivals",
+    "TrafficPattern",
+    "parse_expression",
+    "schedule_for",
+]
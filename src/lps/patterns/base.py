@@ -1,7 +1,16 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
-from typing import Protocol
+from typing import Any, Iterator, Mapping, Protocol
+
+import numpy as np
+
+
+def bin_times(duration_sec: int, resolution_sec: float) -> np.ndarray:
+    """Start time, in seconds, of every schedule bin over ``duration_sec``."""
+    bins_per_sec = round(1.0 / resolution_sec)
+    return np.arange(duration_sec * bins_per_sec) / bins_per_sec
 
 
 class TrafficPattern(Protocol):
@@ -9,15 +18,61 @@ class TrafficPattern(Protocol):
         ...
 
 
-@dataclass(frozen=True, slots=True)
+class ArrivalSource(Protocol):
+    """Exact send times for a schedule, streamed as sorted chunks of offsets in seconds."""
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        ...
+
+    def split(self, parts: int) -> list[ArrivalSource]:
+        ...
+
+    def to_metadata(self) -> Mapping[str, Any]:
+        ...
+
+
+@dataclass(frozen=True, slots=True, eq=False)
 class PatternSchedule:
-    rates_per_sec: list[float]
+    """Requested rate, in requests per second, for consecutive bins of ``resolution_sec``.
+
+    ``resolution_sec`` must divide one second evenly (1.0, 0.1, 0.01, ...) so whole
+    seconds are always made of ``bins_per_sec`` bins. Schedules replayed from a trace
+    carry ``arrivals``, the recorded send times, which open-loop runs use instead of
+    drawing them from ``rates``. ``arrival_phase`` delays an even arrival train by that
+    fraction of one gap, so the shares of a split schedule interleave.
+    """
+
+    rates: np.ndarray
+    resolution_sec: float = 1.0
+    arrivals: ArrivalSource | None = None
+    arrival_phase: float = 0.0
+
+    def __post_init__(self) -> None:
+        bins = round(1.0 / self.resolution_sec) if self.resolution_sec > 0 else 0
+        if bins < 1 or abs(bins * self.resolution_sec - 1.0) > 1e-9:
+            msg = f"resolution_sec must divide one second evenly, got {self.resolution_sec}"
+            raise ValueError(msg)
+        if len(self.rates) % bins:
+            msg = f"Schedule of {len(self.rates)} bins does not cover whole seconds"
+            raise ValueError(msg)
+
+    @property
+    def bins_per_sec(self) -> int:
+        return round(1.0 / self.resolution_sec)
+
+    @property
+    def rates_per_sec(self) -> list[float]:
+        """Mean requested rate of every whole second."""
+        return self.rates.reshape(-1, self.bins_per_sec).mean(axis=1).tolist()
 
     def duration_sec(self) -> int:
-        return len(self.rates_per_sec)
+        return len(self.rates) // self.bins_per_sec
 
     def rate_at(self, t_sec: float) -> float:
-        idx = int(t_sec)
-        if idx < 0 or idx >= len(self.rates_per_sec):
+        idx = math.floor(t_sec * self.bins_per_sec)
+        if idx < 0 or idx >= len(self.rates):
             return 0.0
-        return self.rates_per_sec[idx]
+        return float(self.rates[idx])
+
+    def scaled(self, factor: float) -> PatternSchedule:
+        return PatternSchedule(self.rates * factor, self.resolution_sec)
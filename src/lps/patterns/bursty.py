@@ -1,10 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from random import Random
+
+import numpy as np
 
 from lps.config import BurstyConfig
-from lps.patterns.base import PatternSchedule
+from lps.patterns.base import PatternSchedule, bin_times
 
 
 @dataclass(frozen=True, slots=True)
@@ -12,21 +13,17 @@ class BurstyPattern:
     config: BurstyConfig
     seed: int
 
-    def schedule(self, duration_sec: int) -> PatternSchedule:
-        rng = Random(self.seed)
-        rates: list[float] = []
-        for t in range(duration_sec):
-            if self._is_burst(t):
-                base = self.config.burst_rps
-            else:
-                base = self.config.baseline_rps
-            jitter = base * self.config.jitter_pct
-            rate = max(0.0, rng.uniform(base - jitter, base + jitter))
-            rates.append(rate)
-        return PatternSchedule(rates)
-
-    def _is_burst(self, t_sec: int) -> bool:
+    def schedule(self, duration_sec: int, resolution_sec: float = 1.0) -> PatternSchedule:
+        t = bin_times(duration_sec, resolution_sec)
+        return PatternSchedule(self.rates_at(t, np.random.default_rng(self.seed)), resolution_sec)
+
+    def rates_at(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        base = np.where(self._is_burst(t_sec), self.config.burst_rps, self.config.baseline_rps)
+        jitter = base * self.config.jitter_pct
+        return np.maximum(0.0, rng.uniform(base - jitter, base + jitter))
+
+    def _is_burst(self, t_sec: np.ndarray) -> np.ndarray:
         if self.config.burst_interval_sec <= 0:
-            return False
+            return np.zeros(len(t_sec), dtype=bool)
         position = t_sec % self.config.burst_interval_sec
         return position < self.config.burst_duration_sec
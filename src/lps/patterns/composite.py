@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import ast
+import math
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Protocol
+
+import numpy as np
+
+from lps.config import BurstyConfig, CompositeConfig, DiurnalConfig, ViralSpikeConfig
+from lps.patterns.base import PatternSchedule
+from lps.patterns.bursty import BurstyPattern
+from lps.patterns.diurnal import DiurnalPattern
+from lps.patterns.viral import ViralSpikePattern
+
+# Composite schedules are evaluated this many seconds at a time, so every node of an
+# expression only ever holds one chunk of rates; only the finished schedule spans the
+# whole run. Random jitter is drawn per chunk.
+CHUNK_SEC = 3600
+
+
+class RateExpr(Protocol):
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        ...
+
+
+@dataclass(frozen=True, slots=True)
+class Constant:
+    rps: float
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.full(len(t_sec), self.rps)
+
+
+@dataclass(frozen=True, slots=True)
+class Source:
+    pattern: BurstyPattern | DiurnalPattern | ViralSpikePattern
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        if isinstance(self.pattern, BurstyPattern):
+            return self.pattern.rates_at(t_sec, rng)
+        return self.pattern.rates_at(t_sec)
+
+
+@dataclass(frozen=True, slots=True)
+class Sum:
+    terms: tuple[RateExpr, ...]
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        total = np.zeros(len(t_sec))
+        for term in self.terms:
+            total += term.rates(t_sec, rng)
+        return total
+
+
+@dataclass(frozen=True, slots=True)
+class Product:
+    factors: tuple[RateExpr, ...]
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        total = np.ones(len(t_sec))
+        for factor in self.factors:
+            total *= factor.rates(t_sec, rng)
+        return total
+
+
+@dataclass(frozen=True, slots=True)
+class Scale:
+    expr: RateExpr
+    factor: float
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return self.expr.rates(t_sec, rng) * self.factor
+
+
+@dataclass(frozen=True, slots=True)
+class Shift:
+    """``expr`` delayed by ``offset_sec``; the rate is 0 before it starts."""
+
+    expr: RateExpr
+    offset_sec: float
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        local = t_sec - self.offset_sec
+        return np.where(local >= 0, self.expr.rates(np.maximum(local, 0.0), rng), 0.0)
+
+
+@dataclass(frozen=True, slots=True)
+class Clip:
+    expr: RateExpr
+    min_rps: float = 0.0
+    max_rps: float = math.inf
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        return np.clip(self.expr.rates(t_sec, rng), self.min_rps, self.max_rps)
+
+
+@dataclass(frozen=True, slots=True)
+class Concat:
+    """Segments played back to back, each starting from its own t=0.
+
+    ``durations`` has one entry per segment except the last, which runs to the end.
+    """
+
+    segments: tuple[RateExpr, ...]
+    durations: tuple[float, ...]
+
+    def rates(self, t_sec: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        starts = np.concatenate(([0.0], np.cumsum(self.durations)))
+        index = np.searchsorted(starts, t_sec, side="right") - 1
+        out = np.zeros(len(t_sec))
+        for i, segment in enumerate(self.segments):
+            mask = index == i
+            if mask.any():
+                out[mask] = segment.rates(t_sec[mask] - starts[i], rng)
+        return out
+
+
+@dataclass(frozen=True, slots=True)
+class CompositePattern:
+    config: CompositeConfig
+    seed: int = 7
+
+    def schedule(self, duration_sec: int, resolution_sec: float = 1.0) -> PatternSchedule:
+        """The whole schedule, one rate per bin, built chunk by chunk from ``iter_rates``."""
+        bins = round(1.0 / resolution_sec)
+        rates = np.empty(duration_sec * bins)
+        start = 0
+        for chunk in self.iter_rates(duration_sec, resolution_sec):
+            rates[start : start + len(chunk)] = chunk
+            start += len(chunk)
+        return PatternSchedule(rates, resolution_sec)
+
+    def iter_rates(
+        self,
+        duration_sec: int,
+        resolution_sec: float = 1.0,
+        chunk_sec: int = CHUNK_SEC,
+    ) -> Iterator[np.ndarray]:
+        """Yield the schedule's bin rates ``chunk_sec`` seconds at a time."""
+        expr = parse_expression(self.config.expression, self.seed)
+        bins = round(1.0 / resolution_sec)
+        for index, chunk_start in enumerate(range(0, duration_sec, chunk_sec)):
+            seconds = min(chunk_sec, duration_sec - chunk_start)
+            t = chunk_start + np.arange(seconds * bins) / bins
+            rng = np.random.default_rng([self.seed, index])
+            yield np.maximum(expr.rates(t, rng), 0.0)
+
+
+def parse_expression(text: str, seed: int = 7) -> RateExpr:
+    """Parse a pattern expression.
+
+    Terms combine with ``+`` and ``*`` (a number times a pattern scales it) and these
+    functions, which take positional or keyword arguments:
+
+    - ``bursty``, ``diurnal``, ``viral``: the built-in patterns, with the fields of
+      ``BurstyConfig``, ``DiurnalConfig`` and ``ViralSpikeConfig``
+    - ``constant(rps)``
+    - ``sum(a, b, ...)``, ``product(a, b, ...)``, ``scale(a, factor)``
+    - ``shift(a, offset_sec)``, ``clip(a, min_rps=0, max_rps=inf)``
+    - ``concat(a, duration_sec, b, duration_sec, c)``
+    """
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as exc:
+        msg = f"Invalid pattern expression: {exc.msg}"
+        raise ValueError(msg) from exc
+    value = _Builder(seed).build(tree.body)
+    return _as_expr(value)
+
+
+class _Builder:
+    def __init__(self, seed: int) -> None:
+        self.seed = seed
+        self.functions: dict[str, Callable[..., Any]] = {
+            "bursty": lambda *a, **kw: Source(BurstyPattern(BurstyConfig(*a, **kw), self.seed)),
+            "diurnal": lambda *a, **kw: Source(DiurnalPattern(DiurnalConfig(*a, **kw))),
+            "viral": lambda *a, **kw: Source(ViralSpikePattern(ViralSpikeConfig(*a, **kw))),
+            "constant": lambda rps: Constant(float(rps)),
+            "sum": lambda *terms: Sum(tuple(map(_as_expr, terms))),
+            "product": lambda *factors: Product(tuple(map(_as_expr, factors))),
+            "scale": lambda expr, factor: Scale(_as_expr(expr), _as_number(factor)),
+            "shift": lambda expr, offset_sec: Shift(_as_expr(expr), _as_number(offset_sec)),
+            "clip": lambda expr, min_rps=0.0, max_rps=math.inf: Clip(
+                _as_expr(expr), _as_number(min_rps), _as_number(max_rps)
+            ),
+            "concat": _concat,
+        }
+
+    def build(self, node: ast.expr) -> Any:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float, str)):
+            return node.value
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -_as_number(self.build(node.operand))
+        if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Mult)):
+            return _combine(node.op, self.build(node.left), self.build(node.right))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            func = self.functions.get(node.func.id)
+            if func is None:
+                msg = f"Unknown pattern function: {node.func.id}"
+                raise ValueError(msg)
+            args = [self.build(arg) for arg in node.args]
+            kwargs = {kw.arg: self.build(kw.value) for kw in node.keywords if kw.arg}
+            try:
+                return func(*args, **kwargs)
+            except TypeError as exc:
+                msg = f"Bad arguments to {node.func.id}(): {exc}"
+                raise ValueError(msg) from exc
+        msg = f"Unsupported syntax in pattern expression: {ast.unparse(node)}"
+        raise ValueError(msg)
+
+
+def _combine(op: ast.operator, left: Any, right: Any) -> Any:
+    numbers = isinstance(left, (int, float)), isinstance(right, (int, float))
+    if all(numbers):
+        return left + right if isinstance(op, ast.Add) else left * right
+    if isinstance(op, ast.Add):
+        return Sum((_as_expr(left), _as_expr(right)))
+    if numbers[0]:
+        return Scale(_as_expr(right), float(left))
+    if numbers[1]:
+        return Scale(_as_expr(left), float(right))
+    return Product((_as_expr(left), _as_expr(right)))
+
+
+def _concat(*args: Any) -> Concat:
+    segments = args[0::2]
+    durations = args[1::2]
+    if not segments or len(durations) != len(segments) - 1:
+        msg = "concat() takes pattern, duration_sec, pattern, ..., ending with a pattern"
+        raise ValueError(msg)
+    return Concat(tuple(map(_as_expr, segments)), tuple(map(_as_number, durations)))
+
+
+def _as_expr(value: Any) -> RateExpr:
+    if isinstance(value, (int, float)):
+        return Constant(float(value))
+    if isinstance(value, str):
+        msg = f"Expected a pattern, got {value!r}"
+        raise ValueError(msg)
+    return value
+
+
+def _as_number(value: Any) -> float:
+    if not isinstance(value, (int, float)):
+        msg = f"Expected a number, got {value!r}"
+        raise ValueError(msg)
+    return float(value)
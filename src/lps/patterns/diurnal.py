@@ -1,34 +1,37 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import math
+
+import numpy as np
 
 from lps.config import DiurnalConfig
-from lps.patterns.base import PatternSchedule
+from lps.patterns.base import PatternSchedule, bin_times
 
 
 @dataclass(frozen=True, slots=True)
 class DiurnalPattern:
     config: DiurnalConfig
 
-    def schedule(self, duration_sec: int) -> PatternSchedule:
-        rates: list[float] = []
-        for t in range(duration_sec):
-            cycle_pos = (t % self.config.cycle_duration_sec) / self.config.cycle_duration_sec
-            rates.append(self._shape_rate(cycle_pos))
-        return PatternSchedule(rates)
+    def schedule(self, duration_sec: int, resolution_sec: float = 1.0) -> PatternSchedule:
+        rates = self.rates_at(bin_times(duration_sec, resolution_sec))
+        return PatternSchedule(rates, resolution_sec)
+
+    def rates_at(self, t_sec: np.ndarray) -> np.ndarray:
+        cycle_pos = (t_sec % self.config.cycle_duration_sec) / self.config.cycle_duration_sec
+        return self._shape_rate(cycle_pos)
 
-    def _shape_rate(self, cycle_pos: float) -> float:
+    def _shape_rate(self, cycle_pos: np.ndarray) -> np.ndarray:
         min_rps = self.config.min_rps
         max_rps = self.config.max_rps
         if self.config.shape == "gaussian":
             mu = 0.5
             sigma = 0.18
-            peak = math.exp(-0.5 * ((cycle_pos - mu) / sigma) ** 2)
+            peak = np.exp(-0.5 * ((cycle_pos - mu) / sigma) ** 2)
         elif self.config.shape == "commuter":
-            morning = math.exp(-0.5 * ((cycle_pos - 0.33) / 0.08) ** 2)
-            evening = math.exp(-0.5 * ((cycle_pos - 0.72) / 0.1) ** 2)
+            morning = np.exp(-0.5 * ((cycle_pos - 0.33) / 0.08) ** 2)
+            evening = np.exp(-0.5 * ((cycle_pos - 0.72) / 0.1) ** 2)
             peak = (morning + evening) / 2.0
         else:
-            peak = (math.sin(2 * math.pi * (cycle_pos - 0.25)) + 1.0) / 2.0
-        return min_rps + (max_rps - min_rps) * peak
+            peak = (np.sin(2 * np.pi * (cycle_pos - 0.25)) + 1.0) / 2.0
+        # Clamp: min + (max - min) * 1.0 can round to just above max_rps.
+        return np.minimum(max_rps, min_rps + (max_rps - min_rps) * peak)
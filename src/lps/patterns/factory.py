@@ -2,23 +2,44 @@ from __future__ import annotations
 
 from typing import Any, Mapping
 
-from lps.config import BurstyConfig, DiurnalConfig, PatternConfig, PatternType, ViralSpikeConfig
+from lps.config import (
+    BurstyConfig,
+    CompositeConfig,
+    DiurnalConfig,
+    PatternConfig,
+    PatternType,
+    ReplayConfig,
+    ViralSpikeConfig,
+)
 from lps.patterns.base import PatternSchedule
 from lps.patterns.bursty import BurstyPattern
+from lps.patterns.composite import CompositePattern
 from lps.patterns.diurnal import DiurnalPattern
+from lps.patterns.replay import ReplayPattern
 from lps.patterns.viral import ViralSpikePattern
 
 
-def schedule_for(pattern: PatternConfig, duration_sec: int, seed: int) -> PatternSchedule:
+def schedule_for(
+    pattern: PatternConfig,
+    duration_sec: int,
+    seed: int,
+    resolution_sec: float = 1.0,
+) -> PatternSchedule:
     if pattern.pattern_type is PatternType.BURSTY:
         cfg = _coerce(BurstyConfig, pattern.params)
-        return BurstyPattern(cfg, seed=seed).schedule(duration_sec)
+        return BurstyPattern(cfg, seed=seed).schedule(duration_sec, resolution_sec)
     if pattern.pattern_type is PatternType.DIURNAL:
         cfg = _coerce(DiurnalConfig, pattern.params)
-        return DiurnalPattern(cfg).schedule(duration_sec)
+        return DiurnalPattern(cfg).schedule(duration_sec, resolution_sec)
     if pattern.pattern_type is PatternType.VIRAL:
         cfg = _coerce(ViralSpikeConfig, pattern.params)
-        return ViralSpikePattern(cfg).schedule(duration_sec)
+        return ViralSpikePattern(cfg).schedule(duration_sec, resolution_sec)
+    if pattern.pattern_type is PatternType.REPLAY:
+        cfg = _coerce(ReplayConfig, pattern.params)
+        return ReplayPattern(cfg, seed=seed).schedule(duration_sec, resolution_sec)
+    if pattern.pattern_type is PatternType.COMPOSITE:
+        cfg = _coerce(CompositeConfig, pattern.params)
+        return CompositePattern(cfg, seed=seed).schedule(duration_sec, resolution_sec)
     msg = f"Unsupported pattern type: {pattern.pattern_type}"
     raise ValueError(msg)
 
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from itertools import chain
+from typing import Any, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from lps.config import ReplayConfig
+from lps.patterns.base import PatternSchedule
+
+TRACE_FORMATS = ("auto", "timestamps", "rates")
+# Rows parsed per chunk; a trace is never loaded whole, so multi-GB captures stream.
+CHUNK_ROWS = 1_000_000
+
+
+def read_trace(path: str, chunk_rows: int = CHUNK_ROWS) -> Iterator[np.ndarray]:
+    """Yield the numeric rows of a CSV trace as float64 arrays of ``chunk_rows`` rows.
+
+    Blank lines and ``#`` comments are skipped, as is a header line whose first
+    field is not a number. Only the first two columns are read.
+    """
+    header, columns = _sniff(path)
+    reader = pd.read_csv(
+        path,
+        header=None,
+        skiprows=header,
+        comment="#",
+        usecols=range(columns),
+        dtype=np.float64,
+        chunksize=chunk_rows,
+        skip_blank_lines=True,
+    )
+    with reader:
+        for frame in reader:
+            yield frame.to_numpy()
+
+
+def trace_format(config: ReplayConfig) -> str:
+    if config.format not in TRACE_FORMATS:
+        msg = f"Unsupported trace format: {config.format}"
+        raise ValueError(msg)
+    if config.format != "auto":
+        return config.format
+    return "rates" if _sniff(config.path)[1] > 1 else "timestamps"
+
+
+def _sniff(path: str) -> tuple[list[int], int]:
+    """Return the header line numbers and the number of columns (at most 2) to read."""
+    header: list[int] = []
+    with open(path, encoding="utf-8") as fh:
+        for number, line in enumerate(fh):
+            fields = [f.strip() for f in line.split("#", 1)[0].split(",")]
+            if not fields[0]:
+                continue
+            try:
+                float(fields[0])
+            except ValueError:
+                header.append(number)
+                continue
+            return header, min(2, len(fields))
+    msg = f"Trace {path} has no data rows"
+    raise ValueError(msg)
+
+
+@dataclass(frozen=True, slots=True)
+class TraceArrivals:
+    """Send offsets of a per-request timestamp trace, streamed chunk by chunk.
+
+    Offsets are measured from the earliest timestamp and divided by ``time_compression``.
+    ``rps_scale`` above 1 repeats requests and below 1 thins them, at random but
+    seeded, so every part of a split sees the same scaled stream and keeps every
+    ``parts``-th request of it.
+    """
+
+    config: ReplayConfig
+    duration_sec: int
+    seed: int = 7
+    part: int = 0
+    parts: int = 1
+    chunk_rows: int = CHUNK_ROWS
+
+    def chunks(self) -> Iterator[np.ndarray]:
+        """Yield the offsets in ascending order, one chunk of the trace at a time.
+
+        Captures are often slightly out of order, so each chunk is sorted together
+        with what the previous one held back, and only timestamps before the next
+        chunk's earliest are released. A timestamp older than one already released
+        raises ``ValueError``.
+        """
+        rng = np.random.default_rng(self.seed)
+        compression = self.config.time_compression
+        first: float | None = None
+        released = -np.inf
+        pending = np.empty(0)
+        seen = 0
+        for stamps in chain(self._timestamps(), [None]):
+            if stamps is None:
+                ready, pending = pending, pending[:0]
+            else:
+                earliest = float(stamps.min())
+                if earliest < released:
+                    msg = (
+                        f"Trace {self.config.path} goes back to timestamp {earliest} after "
+                        f"{released}; sort it by time"
+                    )
+                    raise ValueError(msg)
+                cut = int(np.searchsorted(pending, earliest))
+                ready = pending[:cut]
+                pending = np.sort(np.concatenate([pending[cut:], stamps]))
+            if len(ready) == 0:
+                continue
+            if first is None:
+                first = float(ready[0])
+            released = float(ready[-1])
+            offsets = _scale((ready - first) / compression, self.config.rps_scale, rng)
+            index = seen + np.arange(len(offsets))
+            seen += len(offsets)
+            yield offsets[(index % self.parts == self.part) & (offsets < self.duration_sec)]
+            if offsets[-1] >= self.duration_sec:
+                return
+
+    def _timestamps(self) -> Iterator[np.ndarray]:
+        for rows in read_trace(self.config.path, self.chunk_rows):
+            stamps = rows[:, 0]
+            stamps = stamps[~np.isnan(stamps)]
+            if len(stamps):
+                yield stamps
+
+    def split(self, parts: int) -> list[TraceArrivals]:
+        return [
+            TraceArrivals(
+                self.config,
+                self.duration_sec,
+                self.seed,
+                part=self.part + index * self.parts,
+                parts=self.parts * parts,
+                chunk_rows=self.chunk_rows,
+            )
+            for index in range(parts)
+        ]
+
+    def to_metadata(self) -> Mapping[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_metadata(cls, data: Mapping[str, Any]) -> TraceArrivals:
+        values = dict(data)
+        values["config"] = ReplayConfig(**values["config"])
+        return cls(**values)
+
+
+def _scale(offsets: np.ndarray, factor: float, rng: np.random.Generator) -> np.ndarray:
+    if factor == 1.0:
+        return offsets
+    whole = int(factor)
+    repeats = whole + (rng.random(len(offsets)) < factor - whole)
+    return np.repeat(offsets, repeats)
+
+
+@dataclass(frozen=True, slots=True)
+class ReplayPattern:
+    config: ReplayConfig
+    seed: int = 7
+
+    def __post_init__(self) -> None:
+        if self.config.time_compression <= 0 or self.config.rps_scale < 0:
+            msg = "time_compression must be positive and rps_scale non-negative"
+            raise ValueError(msg)
+
+    def schedule(self, duration_sec: int, resolution_sec: float = 1.0) -> PatternSchedule:
+        if trace_format(self.config) == "timestamps":
+            return self._timestamp_schedule(duration_sec, resolution_sec)
+        return self._rate_schedule(duration_sec, resolution_sec)
+
+    def _timestamp_schedule(self, duration_sec: int, resolution_sec: float) -> PatternSchedule:
+        bins = round(1.0 / resolution_sec)
+        total = duration_sec * bins
+        arrivals = TraceArrivals(self.config, duration_sec, self.seed)
+        counts = np.zeros(total)
+        for offsets in arrivals.chunks():
+            counts += np.bincount((offsets * bins).astype(np.int64), minlength=total)[:total]
+        return PatternSchedule(counts * bins, resolution_sec, arrivals=arrivals)
+
+    def _rate_schedule(self, duration_sec: int, resolution_sec: float) -> PatternSchedule:
+        """Spread each ``timestamp,rps`` row evenly over its (compressed) second."""
+        bins = round(1.0 / resolution_sec)
+        total = duration_sec * bins
+        compression = self.config.time_compression
+        width = max(1, round(bins / compression))
+        # Difference array: +rate where a row's span starts, -rate where it ends.
+        steps = np.zeros(total + 1)
+        first: float | None = None
+        for rows in read_trace(self.config.path):
+            rows = rows[~np.isnan(rows).any(axis=1)]
+            if len(rows) == 0:
+                continue
+            if first is None:
+                first = float(rows[0, 0])
+            starts = np.floor((rows[:, 0] - first) / compression * bins).astype(np.int64)
+            keep = (starts >= 0) & (starts < total)
+            starts = starts[keep]
+            per_bin = rows[keep, 1] * self.config.rps_scale / width
+            steps += np.bincount(starts, per_bin, minlength=total + 1)
+            steps -= np.bincount(np.minimum(starts + width, total), per_bin, minlength=total + 1)
+            if rows[-1, 0] - first >= duration_sec * compression:
+                break
+        requests = np.maximum(np.cumsum(steps)[:total], 0.0)
+        return PatternSchedule(requests * bins, resolution_sec)
@@ -1,32 +1,31 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-import math
+
+import numpy as np
 
 from lps.config import ViralSpikeConfig
-from lps.patterns.base import PatternSchedule
+from lps.patterns.base import PatternSchedule, bin_times
 
 
 @dataclass(frozen=True, slots=True)
 class ViralSpikePattern:
     config: ViralSpikeConfig
 
-    def schedule(self, duration_sec: int) -> PatternSchedule:
-        rates: list[float] = []
-        for t in range(duration_sec):
-            rates.append(self._rate_at(t))
-        return PatternSchedule(rates)
+    def schedule(self, duration_sec: int, resolution_sec: float = 1.0) -> PatternSchedule:
+        rates = self.rates_at(bin_times(duration_sec, resolution_sec))
+        return PatternSchedule(rates, resolution_sec)
 
-    def _rate_at(self, t_sec: int) -> float:
+    def rates_at(self, t_sec: np.ndarray) -> np.ndarray:
         base = self.config.baseline_rps
         peak = base * self.config.spike_multiplier
         ramp_end = self.config.ramp_up_sec
         hold_end = ramp_end + self.config.peak_hold_sec
-        if t_sec < ramp_end and ramp_end > 0:
-            return base + (peak - base) * (t_sec / ramp_end)
-        if t_sec < hold_end:
-            return peak
-        elapsed = t_sec - hold_end
         half_life = max(1, self.config.decay_half_life_sec)
-        decay = math.exp(-math.log(2) * elapsed / half_life)
-        return base + (peak - base) * decay
+        ramp = base + (peak - base) * (t_sec / max(ramp_end, 1))
+        decayed = np.maximum(t_sec - hold_end, 0) / half_life
+        decay = base + (peak - base) * np.exp(-np.log(2) * decayed)
+        rates = np.where(t_sec < hold_end, peak, decay)
+        if ramp_end > 0:
+            rates = np.where(t_sec < ramp_end, ramp, rates)
+        return rates
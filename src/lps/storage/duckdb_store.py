@@ -1,72 +1,220 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field, fields
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Mapping
 
 import duckdb
+import numpy as np
 import pandas as pd
 
 from lps.config import RunConfig
-from lps.metrics import PerSecondMetrics, RequestEvent
+from lps.metrics import (
+    BreakerTransition,
+    ErrorType,
+    EventColumns,
+    PerSecondMetrics,
+    RequestEvent,
+)
+from lps.metrics.histogram import LatencyHistogram, sparse_rows
+from lps.metrics.models import ERROR_CODES, NO_REQUEST, NO_STATUS
+
+# Columns added after a table was first released. Existing databases are upgraded in place
+# when the schema is initialised; new databases get them from CREATE TABLE directly.
+# Per-run tables from before run keys are then rewritten whole, see _key_legacy_tables.
+_ADDED_COLUMNS: dict[str, dict[str, str]] = {
+    "run_meta": {
+        "knee_json": "TEXT",
+    },
+    "request_events": {
+        "intended_mono": "DOUBLE",
+        "sent_mono": "DOUBLE",
+        "connect_ms": "REAL DEFAULT 0",
+        "ttfb_ms": "REAL DEFAULT 0",
+        "request_id": "BIGINT",
+        "attempt": "TINYINT DEFAULT 0",
+    },
+    "per_second": {
+        "dropped_rps": "DOUBLE DEFAULT 0",
+        "response_p50_ms": "DOUBLE DEFAULT 0",
+        "response_p95_ms": "DOUBLE DEFAULT 0",
+        "response_p99_ms": "DOUBLE DEFAULT 0",
+        "late_count": "INTEGER DEFAULT 0",
+        "schedule_lag_max_ms": "DOUBLE DEFAULT 0",
+        "retry_rps": "DOUBLE DEFAULT 0",
+        "amplification": "DOUBLE DEFAULT 0",
+    },
+}
+
+
+# Tables holding rows of many runs. They refer to a run by the integer key it has in
+# run_keys, and a run's rows are written together, so DuckDB's min/max statistics on
+# run_key let a single-run query skip the row groups of every other run.
+_RUN_TABLES: dict[str, str] = {
+    "request_events": """
+        run_key INTEGER,
+        wall_time DOUBLE,
+        mono_time DOUBLE,
+        latency_ms DOUBLE,
+        status_code INTEGER,
+        error_type TEXT,
+        bytes_sent INTEGER,
+        bytes_received INTEGER,
+        intended_mono DOUBLE,
+        sent_mono DOUBLE,
+        connect_ms REAL DEFAULT 0,
+        ttfb_ms REAL DEFAULT 0,
+        request_id BIGINT,
+        attempt TINYINT DEFAULT 0
+    """,
+    "per_second": """
+        run_key INTEGER,
+        second INTEGER,
+        requested_rps DOUBLE,
+        achieved_rps DOUBLE,
+        p50_ms DOUBLE,
+        p95_ms DOUBLE,
+        p99_ms DOUBLE,
+        error_rate DOUBLE,
+        timeout_rate DOUBLE,
+        dropped_rps DOUBLE DEFAULT 0,
+        response_p50_ms DOUBLE DEFAULT 0,
+        response_p95_ms DOUBLE DEFAULT 0,
+        response_p99_ms DOUBLE DEFAULT 0,
+        late_count INTEGER DEFAULT 0,
+        schedule_lag_max_ms DOUBLE DEFAULT 0,
+        retry_rps DOUBLE DEFAULT 0,
+        amplification DOUBLE DEFAULT 0
+    """,
+    "latency_histograms": """
+        run_key INTEGER,
+        second INTEGER,
+        metric TEXT,
+        bucket SMALLINT,
+        count BIGINT
+    """,
+    "breaker_events": """
+        run_key INTEGER,
+        at_sec DOUBLE,
+        key TEXT,
+        from_state TEXT,
+        to_state TEXT
+    """,
+}
+# Row order within a run when a table is rewritten onto run keys.
+_RUN_ORDER = {
+    "request_events": "mono_time",
+    "per_second": "second",
+    "latency_histograms": "second, metric, bucket",
+    "breaker_events": "at_sec",
+}
+# Key of a run that has no rows yet; matches nothing.
+_NO_RUN = -1
+
+# Dictionary decoding of EventColumns.error_code back to the stored error_type text.
+_ERROR_TYPE_SQL = " ".join(
+    f"WHEN {code} THEN '{err.value}'" for err, code in ERROR_CODES.items() if err is not None
+)
+_ERROR_CODE_SQL = " ".join(
+    f"WHEN '{err.value}' THEN {code}" for err, code in ERROR_CODES.items() if err is not None
+)
 
 
 @dataclass(slots=True)
 class Storage:
+    """Run store backed by a single DuckDB database file.
+
+    One connection is opened for the lifetime of the object. Each call runs on its own
+    cursor, so a Storage can be shared between the event loop and the sink's writer
+    thread without reconnecting.
+    """
+
     db_path: Path
+    _con: duckdb.DuckDBPyConnection = field(init=False, repr=False)
+    _keys: dict[str, int] = field(init=False, repr=False, default_factory=dict)
+    _key_lock: threading.Lock = field(init=False, repr=False, default_factory=threading.Lock)
 
     def __post_init__(self) -> None:
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._con = duckdb.connect(str(self.db_path))
         self._init_schema()
 
-    def _connect(self) -> duckdb.DuckDBPyConnection:
-        return duckdb.connect(str(self.db_path))
+    def _cursor(self) -> duckdb.DuckDBPyConnection:
+        return self._con.cursor()
+
+    def close(self) -> None:
+        self._con.close()
+
+    def __enter__(self) -> Storage:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
 
     def _init_schema(self) -> None:
-        with self._connect() as con:
+        with self._cursor() as con:
             con.execute(
                 """
                 CREATE TABLE IF NOT EXISTS run_meta (
                     run_id TEXT PRIMARY KEY,
                     created_at TIMESTAMP,
                     config_json TEXT,
-                    notes TEXT
-                );
-                """
-            )
-            con.execute(
-                """
-                CREATE TABLE IF NOT EXISTS request_events (
-                    run_id TEXT,
-                    wall_time DOUBLE,
-                    mono_time DOUBLE,
-                    latency_ms DOUBLE,
-                    status_code INTEGER,
-                    error_type TEXT,
-                    bytes_sent INTEGER,
-                    bytes_received INTEGER
+                    notes TEXT,
+                    knee_json TEXT
                 );
                 """
             )
             con.execute(
                 """
-                CREATE TABLE IF NOT EXISTS per_second (
-                    run_id TEXT,
-                    second INTEGER,
-                    requested_rps DOUBLE,
-                    achieved_rps DOUBLE,
-                    p50_ms DOUBLE,
-                    p95_ms DOUBLE,
-                    p99_ms DOUBLE,
-                    error_rate DOUBLE,
-                    timeout_rate DOUBLE
+                CREATE TABLE IF NOT EXISTS run_keys (
+                    run_key INTEGER PRIMARY KEY,
+                    run_id TEXT UNIQUE
                 );
                 """
             )
+            for table, columns in _RUN_TABLES.items():
+                con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({columns})")
+            for table, columns in _ADDED_COLUMNS.items():
+                for name, ddl in columns.items():
+                    con.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {name} {ddl}")
+            _key_legacy_tables(con)
+            next_key = con.execute("SELECT COALESCE(MAX(run_key), 0) + 1 FROM run_keys").fetchone()
+            assert next_key is not None
+            con.execute(f"CREATE SEQUENCE IF NOT EXISTS run_key_seq START {next_key[0]}")
+
+    def _run_key(self, run_id: str, create: bool = False) -> int:
+        """Integer key of ``run_id`` in the per-run tables; ``_NO_RUN`` if it has none.
+
+        With ``create`` a run seen for the first time is given the next key.
+        """
+        key = self._keys.get(run_id)
+        if key is not None:
+            return key
+        with self._key_lock, self._cursor() as con:
+            if create:
+                con.execute(
+                    """
+                    INSERT INTO run_keys (run_key, run_id)
+                    SELECT nextval('run_key_seq'), ?
+                    WHERE NOT EXISTS (SELECT 1 FROM run_keys WHERE run_id = ?)
+                    """,
+                    [run_id, run_id],
+                )
+            row = con.execute("SELECT run_key FROM run_keys WHERE run_id = ?", [run_id]).fetchone()
+        if row is None:
+            return _NO_RUN
+        self._keys[run_id] = row[0]
+        return row[0]
+
+    def _with_run_keys(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """``frame`` with its ``run_id`` column replaced by ``run_key``."""
+        keys = {run_id: self._run_key(run_id, create=True) for run_id in frame["run_id"].unique()}
+        return frame.assign(run_id=frame["run_id"].map(keys)).rename(columns={"run_id": "run_key"})
 
     def run_exists(self, run_id: str) -> bool:
-        with self._connect() as con:
+        with self._cursor() as con:
             result = con.execute(
                 "SELECT COUNT(*) FROM run_meta WHERE run_id = ?",
                 [run_id],
@@ -80,56 +228,163 @@ class Storage:
         events: Iterable[RequestEvent],
         per_second: Iterable[PerSecondMetrics],
     ) -> None:
+        self.begin_run(config, run_id)
+        self.append_events(events)
+        self.save_per_second(per_second)
+
+    def begin_run(self, config: RunConfig, run_id: str) -> None:
         config_json = json.dumps(config.to_metadata())
-        with self._connect() as con:
+        with self._cursor() as con:
             con.execute(
-                "INSERT INTO run_meta VALUES (?, ?, ?, ?)",
+                "INSERT INTO run_meta (run_id, created_at, config_json, notes) VALUES (?, ?, ?, ?)",
                 [run_id, config.created_at, config_json, config.notes],
             )
-            events_df = pd.DataFrame(
-                [
-                    {
-                        "run_id": e.run_id,
-                        "wall_time": e.wall_time,
-                        "mono_time": e.mono_time,
-                        "latency_ms": e.latency_ms,
-                        "status_code": e.status_code,
-                        "error_type": e.error_type.value if e.error_type else None,
-                        "bytes_sent": e.bytes_sent,
-                        "bytes_received": e.bytes_received,
-                    }
-                    for e in events
-                ]
-            )
-            if not events_df.empty:
-                con.execute("INSERT INTO request_events SELECT * FROM events_df")
-            per_df = pd.DataFrame(
-                [
-                    {
-                        "run_id": m.run_id,
-                        "second": m.second,
-                        "requested_rps": m.requested_rps,
-                        "achieved_rps": m.achieved_rps,
-                        "p50_ms": m.p50_ms,
-                        "p95_ms": m.p95_ms,
-                        "p99_ms": m.p99_ms,
-                        "error_rate": m.error_rate,
-                        "timeout_rate": m.timeout_rate,
-                    }
-                    for m in per_second
-                ]
+        self._run_key(run_id, create=True)
+
+    def append_events(self, events: Iterable[RequestEvent]) -> None:
+        items = events if isinstance(events, list) else list(events)
+        run_ids = {e.run_id for e in items}
+        for run_id in run_ids:
+            run_events = items if len(run_ids) == 1 else [e for e in items if e.run_id == run_id]
+            self.append_event_columns(run_id, EventColumns.from_events(run_events))
+
+    def append_event_columns(self, run_id: str, columns: EventColumns) -> None:
+        """Bulk-insert events straight from their column arrays."""
+        if len(columns) == 0:
+            return
+        run_key = self._run_key(run_id, create=True)
+        events_df = pd.DataFrame(
+            {f.name: getattr(columns, f.name) for f in fields(columns)},
+            copy=False,
+        )
+        with self._cursor() as con:
+            con.execute(
+                f"""
+                INSERT INTO request_events BY NAME
+                SELECT
+                    ?::INTEGER AS run_key,
+                    wall_time,
+                    mono_time,
+                    latency_ms,
+                    NULLIF(status_code, {NO_STATUS}) AS status_code,
+                    CASE error_code {_ERROR_TYPE_SQL} END AS error_type,
+                    bytes_sent,
+                    bytes_received,
+                    NULLIF(intended_mono, 'NaN'::DOUBLE) AS intended_mono,
+                    NULLIF(sent_mono, 'NaN'::DOUBLE) AS sent_mono,
+                    connect_ms,
+                    ttfb_ms,
+                    NULLIF(request_id, {NO_REQUEST}) AS request_id,
+                    attempt
+                FROM events_df
+                """,
+                [run_key],
             )
+
+    def save_per_second(self, per_second: Iterable[PerSecondMetrics]) -> None:
+        per_df = _per_second_frame(per_second)
+        if per_df.empty:
+            return
+        per_df = self._with_run_keys(per_df)
+        with self._cursor() as con:
+            con.execute("INSERT INTO per_second BY NAME SELECT * FROM per_df")
+
+    def replace_per_second(self, run_id: str, per_second: Iterable[PerSecondMetrics]) -> None:
+        """Swap every per-second row of a run, e.g. provisional live rows for final ones."""
+        per_df = self._with_run_keys(_per_second_frame(per_second))
+        run_key = self._run_key(run_id, create=True)
+        with self._cursor() as con:
+            con.execute("BEGIN TRANSACTION")
+            con.execute("DELETE FROM per_second WHERE run_key = ?", [run_key])
             if not per_df.empty:
-                con.execute("INSERT INTO per_second SELECT * FROM per_df")
+                con.execute("INSERT INTO per_second BY NAME SELECT * FROM per_df")
+            con.execute("COMMIT")
+
+    def append_breaker_transitions(
+        self,
+        transitions: Iterable[BreakerTransition],
+        started_mono: float,
+    ) -> None:
+        """Store circuit breaker state changes, timed in seconds since ``started_mono``."""
+        rows = list(transitions)
+        if not rows:
+            return
+        breaker_df = pd.DataFrame(
+            {
+                "run_id": [t.run_id for t in rows],
+                "at_sec": [t.mono_time - started_mono for t in rows],
+                "key": [t.key for t in rows],
+                "from_state": [t.from_state for t in rows],
+                "to_state": [t.to_state for t in rows],
+            }
+        )
+        breaker_df = self._with_run_keys(breaker_df)
+        with self._cursor() as con:
+            con.execute("INSERT INTO breaker_events BY NAME SELECT * FROM breaker_df")
+
+    def load_breaker_events(self, run_id: str) -> pd.DataFrame:
+        with self._cursor() as con:
+            return con.execute(
+                """
+                SELECT at_sec, key, from_state, to_state
+                FROM breaker_events
+                WHERE run_key = ?
+                ORDER BY at_sec
+                """,
+                [self._run_key(run_id)],
+            ).fetchdf()
+
+    def append_histograms(
+        self,
+        run_id: str,
+        histograms: Mapping[int, Mapping[str, LatencyHistogram]],
+    ) -> None:
+        seconds, metrics, buckets, counts = sparse_rows(histograms)
+        if not seconds:
+            return
+        hist_df = pd.DataFrame(
+            {
+                "run_key": self._run_key(run_id, create=True),
+                "second": np.asarray(seconds, dtype=np.int32),
+                "metric": metrics,
+                "bucket": np.asarray(buckets, dtype=np.int16),
+                "count": np.asarray(counts, dtype=np.int64),
+            }
+        )
+        with self._cursor() as con:
+            con.execute("INSERT INTO latency_histograms BY NAME SELECT * FROM hist_df")
+
+    def load_histogram(
+        self,
+        run_id: str,
+        metric: str = "service",
+        start_sec: int | None = None,
+        end_sec: int | None = None,
+    ) -> LatencyHistogram:
+        """Merged histogram for seconds in ``[start_sec, end_sec)``; open bounds by default."""
+        with self._cursor() as con:
+            rows = con.execute(
+                """
+                SELECT bucket, SUM(count)::BIGINT AS count
+                FROM latency_histograms
+                WHERE run_key = ?
+                  AND metric = ?
+                  AND second >= COALESCE(?, second)
+                  AND second < COALESCE(?, second + 1)
+                GROUP BY bucket
+                """,
+                [self._run_key(run_id), metric, start_sec, end_sec],
+            ).fetchnumpy()
+        return LatencyHistogram.from_buckets(rows["bucket"], rows["count"])
 
     def list_runs(self) -> pd.DataFrame:
-        with self._connect() as con:
+        with self._cursor() as con:
             return con.execute(
                 "SELECT run_id, created_at, notes FROM run_meta ORDER BY created_at DESC"
             ).fetchdf()
 
     def load_run_meta(self, run_id: str) -> dict[str, object] | None:
-        with self._connect() as con:
+        with self._cursor() as con:
             row = con.execute(
                 "SELECT config_json FROM run_meta WHERE run_id = ?",
                 [run_id],
@@ -138,16 +393,155 @@ class Storage:
                 return None
             return json.loads(row[0])
 
+    def save_knee(self, run_id: str, knee: Mapping[str, object] | None) -> None:
+        """Record where an adaptive run found the target saturating (None: never within SLO)."""
+        with self._cursor() as con:
+            con.execute(
+                "UPDATE run_meta SET knee_json = ? WHERE run_id = ?",
+                [json.dumps(knee), run_id],
+            )
+
+    def load_knee(self, run_id: str) -> dict[str, object] | None:
+        with self._cursor() as con:
+            row = con.execute(
+                "SELECT knee_json FROM run_meta WHERE run_id = ?",
+                [run_id],
+            ).fetchone()
+            if not row or row[0] is None:
+                return None
+            return json.loads(row[0])
+
     def load_per_second(self, run_id: str) -> pd.DataFrame:
-        with self._connect() as con:
+        with self._cursor() as con:
             return con.execute(
-                "SELECT * FROM per_second WHERE run_id = ? ORDER BY second",
-                [run_id],
+                """
+                SELECT ?::TEXT AS run_id, * EXCLUDE (run_key)
+                FROM per_second
+                WHERE run_key = ?
+                ORDER BY second
+                """,
+                [run_id, self._run_key(run_id)],
             ).fetchdf()
 
     def load_request_events(self, run_id: str) -> pd.DataFrame:
-        with self._connect() as con:
+        with self._cursor() as con:
             return con.execute(
-                "SELECT * FROM request_events WHERE run_id = ?",
-                [run_id],
+                """
+                SELECT ?::TEXT AS run_id, * EXCLUDE (run_key)
+                FROM request_events
+                WHERE run_key = ?
+                """,
+                [run_id, self._run_key(run_id)],
             ).fetchdf()
+
+    def iter_request_events(self, run_id: str, chunk_size: int = 50_000) -> Iterator[RequestEvent]:
+        with self._cursor() as con:
+            con.execute(
+                f"""
+                SELECT wall_time, mono_time, latency_ms, status_code, error_type,
+                       bytes_sent, bytes_received, intended_mono, sent_mono,
+                       COALESCE(connect_ms, 0.0), COALESCE(ttfb_ms, 0.0),
+                       COALESCE(request_id, {NO_REQUEST}), COALESCE(attempt, 0)
+                FROM request_events
+                WHERE run_key = ?
+                ORDER BY mono_time
+                """,
+                [self._run_key(run_id)],
+            )
+            while True:
+                rows = con.fetchmany(chunk_size)
+                if not rows:
+                    return
+                for row in rows:
+                    yield RequestEvent(
+                        run_id=run_id,
+                        wall_time=row[0],
+                        mono_time=row[1],
+                        latency_ms=row[2],
+                        status_code=row[3],
+                        error_type=ErrorType(row[4]) if row[4] is not None else None,
+                        bytes_sent=row[5],
+                        bytes_received=row[6],
+                        intended_mono=row[7],
+                        sent_mono=row[8],
+                        connect_ms=row[9],
+                        ttfb_ms=row[10],
+                        request_id=row[11],
+                        attempt=row[12],
+                    )
+
+    def load_event_columns(self, run_id: str) -> EventColumns:
+        with self._cursor() as con:
+            arrays = con.execute(
+                f"""
+                SELECT
+                    wall_time,
+                    mono_time,
+                    latency_ms,
+                    COALESCE(status_code, {NO_STATUS})::SMALLINT AS status_code,
+                    (CASE error_type {_ERROR_CODE_SQL} ELSE 0 END)::TINYINT AS error_code,
+                    bytes_sent::INTEGER AS bytes_sent,
+                    bytes_received::INTEGER AS bytes_received,
+                    COALESCE(intended_mono, 'NaN'::DOUBLE) AS intended_mono,
+                    COALESCE(sent_mono, 'NaN'::DOUBLE) AS sent_mono,
+                    COALESCE(connect_ms, 0.0)::REAL AS connect_ms,
+                    COALESCE(ttfb_ms, 0.0)::REAL AS ttfb_ms,
+                    COALESCE(request_id, {NO_REQUEST})::BIGINT AS request_id,
+                    COALESCE(attempt, 0)::TINYINT AS attempt
+                FROM request_events
+                WHERE run_key = ?
+                """,
+                [self._run_key(run_id)],
+            ).fetchnumpy()
+        return EventColumns(**{name: np.asarray(values) for name, values in arrays.items()})
+
+
+def _per_second_frame(per_second: Iterable[PerSecondMetrics]) -> pd.DataFrame:
+    rows = list(per_second)
+    columns = {f.name: [getattr(m, f.name) for m in rows] for f in fields(PerSecondMetrics)}
+    return pd.DataFrame(columns)
+
+
+def _key_legacy_tables(con: duckdb.DuckDBPyConnection) -> None:
+    """Move per-run tables that still name runs by ``run_id`` onto run keys.
+
+    Each such table is rewritten sorted by run, so the layout matches one built by
+    appending run after run. Rows whose run id is missing are dropped.
+    """
+    legacy = [
+        table
+        for (table,) in con.execute(
+            """
+            SELECT table_name FROM information_schema.columns
+            WHERE column_name = 'run_id' AND table_name <> 'run_meta' AND table_name <> 'run_keys'
+            """
+        ).fetchall()
+        if table in _RUN_TABLES
+    ]
+    if not legacy:
+        return
+    run_ids = " UNION ".join(f"SELECT run_id FROM {table}" for table in ["run_meta", *legacy])
+    con.execute("BEGIN TRANSACTION")
+    con.execute(
+        f"""
+        INSERT INTO run_keys (run_key, run_id)
+        SELECT
+            (SELECT COALESCE(MAX(run_key), 0) FROM run_keys) + row_number() OVER (ORDER BY run_id),
+            run_id
+        FROM ({run_ids})
+        WHERE run_id IS NOT NULL AND run_id NOT IN (SELECT run_id FROM run_keys)
+        """
+    )
+    for table in legacy:
+        con.execute(f"ALTER TABLE {table} RENAME TO {table}_by_run_id")
+        con.execute(f"CREATE TABLE {table} ({_RUN_TABLES[table]})")
+        con.execute(
+            f"""
+            INSERT INTO {table} BY NAME
+            SELECT k.run_key, t.* EXCLUDE (run_id)
+            FROM {table}_by_run_id t JOIN run_keys k USING (run_id)
+            ORDER BY k.run_key, {_RUN_ORDER[table]}
+            """
+        )
+        con.execute(f"DROP TABLE {table}_by_run_id")
+    con.execute("COMMIT")
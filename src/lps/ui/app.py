@@ -1,34 +1,63 @@
 from __future__ import annotations
 
 import asyncio
+import json
 from dataclasses import asdict
 from datetime import datetime
 
+import duckdb
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import streamlit as st
 
-from lps.analysis import autoscaling_lag, compare_runs, overload_indicator, queueing_indicator
+from lps.analysis import (
+    autoscaling_lag,
+    compare_histograms,
+    compare_runs,
+    overload_indicator,
+    queueing_indicator,
+)
 from lps.config import (
+    AdaptiveConfig,
+    ArrivalProcess,
+    BreakerScope,
     BurstyConfig,
     CircuitBreakerConfig,
+    ClientEngine,
+    CompositeConfig,
     DiurnalConfig,
     LoadModel,
     PatternConfig,
     PatternType,
+    ReplayConfig,
+    RequestTemplate,
     RetryConfig,
     RunConfig,
     TargetConfig,
+    TransportConfig,
     ViralSpikeConfig,
 )
 from lps.loadgen.runner import run_experiment
-from lps.storage import default_storage
+from lps.metrics import PerSecondMetrics
+from lps.metrics.histogram import bucket_values
+from lps.storage import Storage, default_storage
 
 
 st.set_page_config(page_title="Load Pattern Simulator", layout="wide")
 
-storage = default_storage()
+
+def _storage() -> Storage:
+    # Opened for one rerun and closed after it: DuckDB lets a single process hold the
+    # file, and a cached connection would lock CLI runs out while the page is open.
+    try:
+        return default_storage()
+    except duckdb.IOException:
+        st.warning("The run database is in use by another process. Refresh once it finishes.")
+        st.stop()
+
+
+storage = _storage()
 
 
 @st.cache_data
@@ -46,28 +75,68 @@ def _build_config() -> RunConfig:
         st.header("Run Configuration")
         target_url = st.text_input("Target URL", "https://httpbin.org/get")
         duration = st.slider("Duration (sec)", 30, 1800, 300)
-        load_model = st.selectbox("Load Model", ["open_loop", "closed_loop"])
-        workers = st.slider("Closed-loop workers", 5, 200, 50)
-        pattern_type = st.selectbox("Pattern", ["bursty", "diurnal", "viral_spike"])
+        load_model = st.selectbox("Load Model", [m.value for m in LoadModel])
+        arrival = st.selectbox("Arrival process", [a.value for a in ArrivalProcess])
+        workers = st.slider("Max closed-loop workers", 5, 200, 50)
+        max_in_flight = st.number_input("Max in-flight requests", min_value=1, value=1000)
+        processes = st.slider("Worker processes", 1, 16, 1)
+        engine = st.selectbox("HTTP client", [e.value for e in ClientEngine])
+        warm_up = st.number_input("Connections to warm up", min_value=0, value=0)
+        stream_body = st.checkbox("Stream response bodies", value=False)
+        resolution = st.selectbox("Schedule resolution (sec)", [1.0, 0.1, 0.01])
+        pattern_type = st.selectbox(
+            "Pattern",
+            ["bursty", "diurnal", "viral_spike", "replay", "composite"],
+        )
         seed = st.number_input("Seed", min_value=1, max_value=9999, value=7)
         notes = st.text_input("Notes", "")
 
+        st.subheader("Requests")
+        templates_json = st.text_area(
+            "Request templates (JSON list)",
+            value="",
+            help='e.g. [{"path": "/users/${id}", "weight": 3}, {"path": "/search?q=${term}"}]',
+        )
+        data_file = st.text_input("Data file (CSV or JSONL)", "")
+
+        st.subheader("Adaptive search")
+        slo_p99_ms = st.number_input("SLO p99 (ms)", min_value=1.0, value=500.0)
+        step_rps = st.number_input("Rate increase per step", min_value=1.0, value=10.0)
+
         st.subheader("Resilience knobs")
         retry_enabled = st.checkbox("Retries", value=False)
+        retry_budget = st.number_input(
+            "Retry budget (retries per first attempt)", min_value=0.0, value=0.2, step=0.05
+        )
         breaker_enabled = st.checkbox("Circuit breaker", value=False)
+        breaker_scope = st.selectbox("Breaker per", [s.value for s in BreakerScope])
 
     pattern_config = _pattern_config(pattern_type)
-    retry = RetryConfig(enabled=retry_enabled)
-    breaker = CircuitBreakerConfig(enabled=breaker_enabled)
+    retry = RetryConfig(enabled=retry_enabled, budget_ratio=retry_budget)
+    breaker = CircuitBreakerConfig(enabled=breaker_enabled, scope=BreakerScope(breaker_scope))
     return RunConfig(
-        target=TargetConfig(base_url=target_url),
+        target=TargetConfig(
+            base_url=target_url,
+            templates=tuple(RequestTemplate(**t) for t in json.loads(templates_json or "[]")),
+            data_file=data_file or None,
+        ),
         pattern=pattern_config,
         duration_sec=duration,
         load_model=LoadModel(load_model),
+        arrival=ArrivalProcess(arrival),
         closed_loop_workers=workers,
+        max_in_flight=max_in_flight,
+        processes=processes,
+        resolution_sec=resolution,
         seed=seed,
+        transport=TransportConfig(
+            engine=ClientEngine(engine),
+            warm_up_connections=warm_up,
+            stream_body=stream_body,
+        ),
         retry=retry,
         circuit_breaker=breaker,
+        adaptive=AdaptiveConfig(step_rps=step_rps, slo_p99_ms=slo_p99_ms),
         notes=notes,
     )
 
@@ -78,8 +147,8 @@ def _pattern_config(pattern_type: str) -> PatternConfig:
         if pattern_type == "bursty":
             baseline = st.number_input("Baseline RPS", min_value=1.0, value=50.0)
             burst = st.number_input("Burst RPS", min_value=1.0, value=500.0)
-            duration = st.number_input("Burst duration (sec)", min_value=1, value=10)
-            interval = st.number_input("Burst interval (sec)", min_value=1, value=120)
+            duration = st.number_input("Burst duration (sec)", min_value=0.01, value=10.0)
+            interval = st.number_input("Burst interval (sec)", min_value=0.01, value=120.0)
             jitter = st.slider("Jitter %", 0.0, 0.3, 0.05)
             cfg = BurstyConfig(
                 baseline_rps=baseline,
@@ -94,8 +163,35 @@ def _pattern_config(pattern_type: str) -> PatternConfig:
             max_rps = st.number_input("Max RPS", min_value=1.0, value=300.0)
             cycle = st.number_input("Cycle duration (sec)", min_value=60, value=1800)
             shape = st.selectbox("Shape", ["sine", "gaussian", "commuter"])
-            cfg = DiurnalConfig(min_rps=min_rps, max_rps=max_rps, cycle_duration_sec=cycle, shape=shape)
+            cfg = DiurnalConfig(
+                min_rps=min_rps,
+                max_rps=max_rps,
+                cycle_duration_sec=cycle,
+                shape=shape,
+            )
             return PatternConfig(PatternType.DIURNAL, asdict(cfg))
+        if pattern_type == "composite":
+            expression = st.text_area(
+                "Pattern expression",
+                value="diurnal(20, 300, 1800) + shift(viral(0, 10, 10, 30, 30), 120)",
+                help=(
+                    "Combine bursty/diurnal/viral/constant with "
+                    "+, *, scale, shift, clip and concat."
+                ),
+            )
+            return PatternConfig(PatternType.COMPOSITE, asdict(CompositeConfig(expression)))
+        if pattern_type == "replay":
+            path = st.text_input("Trace CSV path", value="trace.csv")
+            trace_format = st.selectbox("Trace format", ["auto", "timestamps", "rates"])
+            compression = st.number_input("Time compression", min_value=0.01, value=1.0)
+            scale = st.number_input("RPS scale", min_value=0.0, value=1.0)
+            cfg = ReplayConfig(
+                path=path,
+                format=trace_format,
+                time_compression=compression,
+                rps_scale=scale,
+            )
+            return PatternConfig(PatternType.REPLAY, asdict(cfg))
         baseline = st.number_input("Baseline RPS", min_value=1.0, value=20.0)
         multiplier = st.number_input("Spike multiplier", min_value=2.0, value=30.0)
         ramp = st.number_input("Ramp up (sec)", min_value=1, value=30)
@@ -114,12 +210,26 @@ def _pattern_config(pattern_type: str) -> PatternConfig:
 def _run_button(config: RunConfig) -> None:
     if st.sidebar.button("Start run"):
         progress = st.sidebar.progress(0, text="Running...")
+        st.subheader("Live run")
+        live_rps, live_latency = st.columns(2)
+        rps_chart, latency_chart = live_rps.empty(), live_latency.empty()
+        # Filled from the sink's writer thread; only read here on the script thread.
+        closed: list[PerSecondMetrics] = []
 
         async def on_progress(step: int, total: int) -> None:
             progress.progress(min(1.0, step / total))
+            if closed:
+                live = pd.DataFrame([asdict(row) for row in list(closed)])
+                rps_chart.plotly_chart(_plot_requested_vs_achieved(live), use_container_width=True)
+                latency_chart.plotly_chart(_plot_latency(live), use_container_width=True)
 
-        run_id = asyncio.run(run_experiment(config, storage, progress=on_progress))
+        run_id = asyncio.run(
+            run_experiment(config, storage, progress=on_progress, on_second=closed.append)
+        )
         st.sidebar.success(f"Run completed: {run_id}")
+        knee = storage.load_knee(run_id)
+        if knee is not None:
+            st.sidebar.info(f"Knee: {knee['offered_rps']:.0f} rps at p99 {knee['p99_ms']:.0f} ms")
         st.cache_data.clear()
 
 
@@ -141,14 +251,63 @@ def _plot_requested_vs_achieved(per_second: pd.DataFrame) -> go.Figure:
             mode="lines",
         )
     )
+    if "dropped_rps" in per_second and per_second["dropped_rps"].any():
+        fig.add_trace(
+            go.Scatter(
+                x=per_second["second"],
+                y=per_second["dropped_rps"],
+                name="Dropped RPS",
+                mode="lines",
+            )
+        )
+    if "retry_rps" in per_second and per_second["retry_rps"].any():
+        fig.add_trace(
+            go.Scatter(
+                x=per_second["second"],
+                y=per_second["retry_rps"],
+                name="Retry RPS",
+                mode="lines",
+            )
+        )
     fig.update_layout(height=300, margin=dict(l=10, r=10, t=30, b=10))
     return fig
 
 
+def _overlay_breaker_events(fig: go.Figure, transitions: pd.DataFrame) -> None:
+    """Shade the time each circuit breaker spent open or probing."""
+    for key, rows in transitions.groupby("key"):
+        opened_at = None
+        for at_sec, state in zip(rows["at_sec"], rows["to_state"]):
+            if state == "open" and opened_at is None:
+                opened_at = at_sec
+            elif state == "closed" and opened_at is not None:
+                fig.add_vrect(x0=opened_at, x1=at_sec, opacity=0.15, line_width=0)
+                opened_at = None
+        if opened_at is not None:
+            fig.add_vrect(x0=opened_at, x1=rows["at_sec"].max(), opacity=0.15, line_width=0)
+        fig.add_annotation(
+            x=rows["at_sec"].iloc[0], y=1, yref="paper", text=f"breaker {key}", showarrow=False
+        )
+
+
 def _plot_latency(per_second: pd.DataFrame) -> go.Figure:
     fig = go.Figure()
     for col, label in [("p50_ms", "p50"), ("p95_ms", "p95"), ("p99_ms", "p99")]:
-        fig.add_trace(go.Scatter(x=per_second["second"], y=per_second[col], name=label, mode="lines"))
+        fig.add_trace(
+            go.Scatter(x=per_second["second"], y=per_second[col], name=label, mode="lines")
+        )
+    if "response_p99_ms" in per_second:
+        response = [("response_p50_ms", "p50 (response)"), ("response_p99_ms", "p99 (response)")]
+        for col, label in response:
+            fig.add_trace(
+                go.Scatter(
+                    x=per_second["second"],
+                    y=per_second[col],
+                    name=label,
+                    mode="lines",
+                    line=dict(dash="dash"),
+                )
+            )
     fig.update_layout(height=300, margin=dict(l=10, r=10, t=30, b=10))
     return fig
 
@@ -174,14 +333,15 @@ def _plot_error_stack(events: pd.DataFrame, duration: int) -> go.Figure:
     return fig
 
 
-def _plot_latency_hist(events: pd.DataFrame, per_second: pd.DataFrame) -> go.Figure:
-    if events.empty or per_second.empty:
+def _plot_latency_hist(run_id: str, per_second: pd.DataFrame) -> go.Figure:
+    if per_second.empty:
         return go.Figure()
     peak_second = int(per_second.loc[per_second["p99_ms"].idxmax(), "second"])
-    start = events["mono_time"].min()
-    relative_sec = (events["mono_time"] - start).astype(int)
-    window = events[(relative_sec >= peak_second) & (relative_sec <= peak_second + 5)]
-    fig = px.histogram(window, x="latency_ms", nbins=30, title="Latency distribution (peak window)")
+    hist = storage.load_histogram(run_id, start_sec=peak_second, end_sec=peak_second + 6)
+    buckets, counts = hist.nonzero()
+    fig = go.Figure(go.Bar(x=bucket_values(buckets), y=counts, name="requests"))
+    fig.update_xaxes(type="log", title="latency_ms")
+    fig.update_layout(title="Latency distribution (peak window)")
     fig.update_layout(height=300, margin=dict(l=10, r=10, t=30, b=10))
     return fig
 
@@ -224,7 +384,9 @@ def _render_run_view(run_id: str) -> None:
 
     col1, col2 = st.columns(2)
     with col1:
-        st.plotly_chart(_plot_requested_vs_achieved(per_second), use_container_width=True)
+        rps = _plot_requested_vs_achieved(per_second)
+        _overlay_breaker_events(rps, storage.load_breaker_events(run_id))
+        st.plotly_chart(rps, use_container_width=True)
     with col2:
         st.plotly_chart(_plot_latency(per_second), use_container_width=True)
 
@@ -232,7 +394,15 @@ def _render_run_view(run_id: str) -> None:
     with col3:
         st.plotly_chart(_plot_error_stack(events, len(per_second)), use_container_width=True)
     with col4:
-        st.plotly_chart(_plot_latency_hist(events, per_second), use_container_width=True)
+        st.plotly_chart(_plot_latency_hist(run_id, per_second), use_container_width=True)
+
+    whole_run = storage.load_histogram(run_id)
+    if whole_run.total:
+        p50, p95, p99, p999 = whole_run.percentiles([50, 95, 99, 99.9])
+        st.caption(
+            f"Whole-run service latency: p50 {p50:.1f} ms · p95 {p95:.1f} ms · "
+            f"p99 {p99:.1f} ms · p99.9 {p999:.1f} ms"
+        )
 
     threshold = st.slider("SLO threshold (p99 ms)", 50, 2000, 500)
     st.plotly_chart(_plot_slo_breach(per_second, threshold), use_container_width=True)
@@ -255,12 +425,16 @@ def _render_comparison() -> None:
     merged = base_df.merge(cand_df, on="second", suffixes=("_base", "_cand"))
 
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=merged["second"], y=merged["achieved_rps_base"], name=f"{base} achieved"))
-    fig.add_trace(go.Scatter(x=merged["second"], y=merged["achieved_rps_cand"], name=f"{candidate} achieved"))
+    for column, name in [("achieved_rps_base", base), ("achieved_rps_cand", candidate)]:
+        fig.add_trace(go.Scatter(x=merged["second"], y=merged[column], name=f"{name} achieved"))
     fig.update_layout(height=300, margin=dict(l=10, r=10, t=30, b=10))
     st.plotly_chart(fig, use_container_width=True)
 
     regressions = compare_runs(base_df, cand_df)
+    regressions += compare_histograms(
+        storage.load_histogram(base),
+        storage.load_histogram(candidate),
+    )
     if not regressions:
         st.success("No regressions detected")
     else:
@@ -283,4 +457,7 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        storage.close()
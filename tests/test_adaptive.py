@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from lps.config import (
+    AdaptiveConfig,
+    LoadModel,
+    PatternConfig,
+    PatternType,
+    RunConfig,
+    TargetConfig,
+)
+from lps.loadgen.adaptive import AdaptiveController, StepResult, find_knee
+from lps.loadgen.runner import run_experiment
+from lps.metrics import PerSecondMetrics
+from lps.storage import Storage
+
+_CAPACITY_RPS = 50
+
+
+def _row(second: int, rate: float, p99: float, error_rate: float = 0.0) -> PerSecondMetrics:
+    return PerSecondMetrics("r", second, rate, rate, p99 / 2, p99, p99, error_rate, 0.0)
+
+
+def _step(within: bool) -> StepResult:
+    return StepResult(0, 1.0, 1.0, 1.0, 0.0, within)
+
+
+def test_controller_increases_additively_and_backs_off() -> None:
+    controller = AdaptiveController(AdaptiveConfig(start_rps=10, step_rps=10, backoff=0.5))
+    assert controller.observe(_step(True))
+    assert controller.observe(_step(True))
+    assert controller.rate == 30
+    assert controller.observe(_step(False))
+    assert (controller.rate, controller.increase) == (15, 5)
+    assert controller.observe(_step(True))
+    assert controller.rate == 20
+    assert controller.observe(_step(False))
+    assert not controller.observe(_step(False))
+
+
+def test_knee_is_the_fastest_step_within_slo() -> None:
+    config = AdaptiveConfig(step_sec=2, slo_p99_ms=100.0)
+    rows = [
+        _row(0, 10, 20), _row(1, 10, 20),
+        _row(2, 20, 300), _row(3, 20, 40),  # first second of a step is not judged
+        _row(4, 30, 40), _row(5, 30, 150),
+        _row(6, 25, 40), _row(7, 25, 50, error_rate=0.2),
+    ]
+    knee = find_knee(rows, config)
+    assert knee is not None
+    assert (knee.first_second, knee.offered_rps, knee.p99_ms) == (2, 20.0, 40.0)
+    assert find_knee(rows[4:], config) is None
+
+
+async def _handle(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, busy: asyncio.Lock
+) -> None:
+    try:
+        while True:
+            await reader.readuntil(b"\r\n\r\n")
+            async with busy:
+                await asyncio.sleep(1.0 / _CAPACITY_RPS)
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+    except (asyncio.IncompleteReadError, ConnectionError):
+        writer.close()
+
+
+@pytest.fixture
+def limited_server() -> Iterator[str]:
+    """Serves one request at a time, so requests queue up beyond _CAPACITY_RPS."""
+    loop = asyncio.new_event_loop()
+    servers: list[asyncio.Server] = []
+    started = threading.Event()
+
+    async def serve() -> None:
+        busy = asyncio.Lock()
+        server = await asyncio.start_server(lambda r, w: _handle(r, w, busy), "127.0.0.1", 0)
+        servers.append(server)
+        started.set()
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    asyncio.run_coroutine_threadsafe(serve(), loop)
+    started.wait(timeout=5.0)
+    yield f"http://127.0.0.1:{servers[0].sockets[0].getsockname()[1]}/"
+    loop.call_soon_threadsafe(servers[0].close)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(timeout=5.0)
+
+
+def test_adaptive_run_finds_capacity_and_stops(tmp_path: Path, limited_server: str) -> None:
+    config = RunConfig(
+        target=TargetConfig(base_url=limited_server),
+        pattern=PatternConfig(PatternType.VIRAL, {}),
+        duration_sec=30,
+        load_model=LoadModel.ADAPTIVE,
+        adaptive=AdaptiveConfig(
+            start_rps=20, step_rps=20, step_sec=2, slo_p99_ms=100.0, max_breaches=1
+        ),
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    per_second = storage.load_per_second(run_id)
+    assert list(per_second["requested_rps"]) == [20.0] * 2 + [40.0] * 2 + [60.0] * 2
+    knee = storage.load_knee(run_id)
+    assert knee is not None
+    assert knee["offered_rps"] == 40.0
+    assert knee["p99_ms"] < 100.0
+    restored = RunConfig.from_metadata(storage.load_run_meta(run_id))
+    assert restored.adaptive == config.adaptive
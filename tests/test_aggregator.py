@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import random
+from collections import defaultdict
+from dataclasses import replace
+
+import numpy as np
+
+from lps.metrics import ErrorType, PerSecondMetrics, RequestEvent, aggregate_per_second
+from lps.metrics.models import NO_REQUEST
+
+
+def _event(sent: float, latency_ms: float, intended: float | None = None) -> RequestEvent:
+    return RequestEvent(
+        run_id="run-a",
+        wall_time=1000.0 + sent,
+        mono_time=sent + latency_ms / 1000.0,
+        latency_ms=latency_ms,
+        status_code=200,
+        error_type=None,
+        bytes_sent=0,
+        bytes_received=0,
+        intended_mono=intended,
+        sent_mono=sent,
+    )
+
+
+def test_response_time_includes_scheduler_lag() -> None:
+    events = [_event(0.1 + i * 0.001, 10.0, intended=0.1 + i * 0.001) for i in range(50)]
+    events += [_event(0.5, 10.0, intended=0.3)]
+    per_second = aggregate_per_second("run-a", events, [51.0], start_mono=0.0)
+    row = per_second[0]
+    assert row.achieved_rps == 51.0
+    assert row.p99_ms == 10.0
+    assert row.response_p99_ms > 10.0
+    assert row.late_count == 1
+    assert abs(row.schedule_lag_max_ms - 200.0) < 1e-6
+
+
+def test_dropped_events_are_reported_separately() -> None:
+    dropped = RequestEvent(
+        run_id="run-a",
+        wall_time=1000.0,
+        mono_time=0.2,
+        latency_ms=0.0,
+        status_code=None,
+        error_type=ErrorType.DROPPED,
+        bytes_sent=0,
+        bytes_received=0,
+    )
+    per_second = aggregate_per_second("run-a", [_event(0.1, 5.0), dropped], [2.0], start_mono=0.0)
+    assert per_second[0].achieved_rps == 1.0
+    assert per_second[0].dropped_rps == 1.0
+    assert per_second[0].error_rate == 0.0
+
+
+def test_amplification_counts_attempts_per_first_attempt() -> None:
+    first = [replace(_event(0.1 + i * 0.01, 5.0), request_id=i) for i in range(10)]
+    retries = [replace(e, mono_time=e.mono_time + 0.2, attempt=1) for e in first[:5]]
+    retries += [replace(e, mono_time=e.mono_time + 0.5, attempt=2) for e in first[:2]]
+    row = aggregate_per_second("run-a", first + retries, [10.0], start_mono=0.0)[0]
+    assert row.achieved_rps == 17.0
+    assert row.retry_rps == 7.0
+    assert row.amplification == 1.7
+
+
+def test_retries_measure_each_request_once_and_add_no_schedule_lag() -> None:
+    first = [replace(_event(0.1, 5.0, intended=0.1), request_id=i) for i in range(4)]
+    retry = replace(first[0], mono_time=0.6, latency_ms=50.0, sent_mono=0.55, attempt=1)
+    row = aggregate_per_second("run-a", [*first, retry], [4.0], start_mono=0.0)[0]
+    assert row.achieved_rps == 5.0
+    assert row.retry_rps == 1.0
+    assert row.late_count == 0
+    assert row.schedule_lag_max_ms == 0.0
+    # Four logical requests: three of 5 ms and the retried one's 50 ms final try.
+    assert row.p50_ms == 5.0
+    assert row.p99_ms == np.percentile([5.0, 5.0, 5.0, 50.0], 99)
+
+
+def _reference_aggregate(
+    run_id: str,
+    events: list[RequestEvent],
+    requested_rates: list[float],
+    start_mono: float,
+) -> list[PerSecondMetrics]:
+    buckets: dict[int, list[RequestEvent]] = defaultdict(list)
+    dropped: dict[int, int] = defaultdict(int)
+    last_try: dict[int, int] = {}
+    for event in events:
+        if event.request_id != NO_REQUEST:
+            last_try[event.request_id] = max(last_try.get(event.request_id, 0), event.attempt)
+    for event in events:
+        second = max(0, int(event.mono_time - start_mono))
+        if event.error_type is ErrorType.DROPPED:
+            dropped[second] += 1
+            continue
+        buckets[second].append(event)
+    metrics: list[PerSecondMetrics] = []
+    for second in range(len(requested_rates)):
+        bucket = buckets.get(second, [])
+        final = [
+            e
+            for e in bucket
+            if e.latency_ms >= 0
+            and (e.request_id == NO_REQUEST or e.attempt == last_try[e.request_id])
+        ]
+        latencies = [e.latency_ms for e in final]
+        responses = [e.response_ms for e in final]
+        lags = [e.schedule_lag_ms for e in bucket if e.attempt == 0]
+        total = max(1, len(bucket))
+        retries = sum(1 for e in bucket if e.attempt > 0)
+        p = [float(np.percentile(latencies, q)) for q in (50, 95, 99)] if latencies else [0.0] * 3
+        r = [float(np.percentile(responses, q)) for q in (50, 95, 99)] if responses else [0.0] * 3
+        metrics.append(
+            PerSecondMetrics(
+                run_id=run_id,
+                second=second,
+                requested_rps=requested_rates[second],
+                achieved_rps=float(len(bucket)),
+                p50_ms=p[0],
+                p95_ms=p[1],
+                p99_ms=p[2],
+                error_rate=sum(1 for e in bucket if e.error_type is not None) / total,
+                timeout_rate=sum(1 for e in bucket if e.error_type is ErrorType.TIMEOUT) / total,
+                dropped_rps=float(dropped.get(second, 0)),
+                response_p50_ms=r[0],
+                response_p95_ms=r[1],
+                response_p99_ms=r[2],
+                late_count=sum(1 for lag in lags if lag > 5.0),
+                schedule_lag_max_ms=max(0.0, max(lags, default=0.0)),
+                retry_rps=float(retries),
+                amplification=len(bucket) / max(1, len(bucket) - retries),
+            )
+        )
+    return metrics
+
+
+def test_vectorized_aggregation_matches_reference() -> None:
+    rng = random.Random(3)
+    errors = [None, None, None, ErrorType.TIMEOUT, ErrorType.CONNECT, ErrorType.DROPPED]
+    events = []
+    for request_id in range(4000):
+        intended = rng.uniform(100.0, 112.0)
+        sent = intended + rng.expovariate(200.0)
+        scheduled = rng.random() > 0.2
+        for attempt in range(rng.choice((1, 1, 1, 2, 3))):
+            latency = rng.lognormvariate(2.0, 1.0) if rng.random() > 0.01 else -1.0
+            events.append(
+                RequestEvent(
+                    run_id="run-a",
+                    wall_time=intended,
+                    mono_time=sent + max(latency, 0.0) / 1000.0,
+                    latency_ms=latency,
+                    status_code=200,
+                    error_type=rng.choice(errors),
+                    bytes_sent=0,
+                    bytes_received=0,
+                    intended_mono=intended if scheduled else None,
+                    sent_mono=sent,
+                    request_id=request_id if rng.random() > 0.1 else NO_REQUEST,
+                    attempt=attempt,
+                )
+            )
+            sent += max(latency, 0.0) / 1000.0 + rng.uniform(0.01, 0.5)
+    rng.shuffle(events)
+    rates = [400.0] * 10 + [0.0]
+    assert aggregate_per_second("run-a", events, rates, 100.0) == _reference_aggregate(
+        "run-a", events, rates, 100.0
+    )
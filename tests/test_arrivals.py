@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from lps.config import ArrivalProcess
+from lps.loadgen.arrivals import arrival_offsets, iter_arrival_offsets
+
+
+def test_even_arrivals_keep_the_smooth_train() -> None:
+    offsets = arrival_offsets([4.0, 0.0, 2.0], ArrivalProcess.EVEN, seed=7)
+    assert offsets.tolist() == [0.0, 0.25, 0.5, 0.75, 2.0, 2.5]
+
+
+@pytest.mark.parametrize("process", list(ArrivalProcess))
+def test_arrivals_follow_the_rate_schedule(process: ArrivalProcess) -> None:
+    rates = [2000.0] * 5 + [0.0] * 2 + [500.0] * 5
+    offsets = arrival_offsets(rates, process, seed=11)
+    assert np.all(np.diff(offsets) >= 0)
+    counts = np.bincount(offsets.astype(int), minlength=len(rates))
+    assert counts[5:7].tolist() == [0, 0]
+    # Pareto gaps have infinite variance, so their totals converge slowly.
+    tolerance = 0.25 if process is ArrivalProcess.PARETO else 0.06
+    assert abs(counts[:5].sum() / 10_000 - 1) < tolerance
+    assert abs(counts[7:].sum() / 2_500 - 1) < tolerance
+    assert np.array_equal(offsets, arrival_offsets(rates, process, seed=11))
+
+
+def test_poisson_arrivals_burst_unlike_the_even_train() -> None:
+    rates = [1000.0] * 20
+    windows = np.arange(0, 20.001, 0.01)
+    poisson = np.histogram(arrival_offsets(rates, ArrivalProcess.POISSON, seed=3), windows)[0]
+    even = np.histogram(arrival_offsets(rates, ArrivalProcess.EVEN, seed=3), windows)[0]
+    # Counts per 10 ms window: Poisson has variance ~ mean, an even train almost none.
+    assert 0.8 < poisson.var() / poisson.mean() < 1.2
+    assert even.var() < 0.5
+    assert not np.array_equal(
+        arrival_offsets(rates, ArrivalProcess.POISSON, seed=3),
+        arrival_offsets(rates, ArrivalProcess.POISSON, seed=4),
+    )
+
+
+@pytest.mark.parametrize("process", list(ArrivalProcess))
+def test_chunked_generation_matches_the_whole_schedule(process: ArrivalProcess) -> None:
+    rates = [300.0] * 5 + [0.0] * 2 + [50.0] * 3
+    chunks = list(iter_arrival_offsets(rates, process, seed=5, chunk_size=97))
+    assert max(len(chunk) for chunk in chunks) <= 97
+    assert np.allclose(np.concatenate(chunks), arrival_offsets(rates, process, seed=5))
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from pathlib import Path
+
+import httpx
+
+from lps.config import (
+    BreakerScope,
+    BurstyConfig,
+    CircuitBreakerConfig,
+    PatternConfig,
+    PatternType,
+    RequestTemplate,
+    RunConfig,
+    TargetConfig,
+)
+from lps.loadgen.breaker import BreakerRegistry, BreakerState, CircuitBreaker
+from lps.loadgen.runner import run_experiment
+from lps.loadgen.templates import build_request_pool
+from lps.storage import Storage
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_count_window_trips_on_error_rate_and_forgets_old_outcomes() -> None:
+    breaker = CircuitBreaker(window_size=4, error_rate_threshold=0.5, open_cooldown_sec=1.0)
+    for success in (False, True, True, True, True, False):
+        breaker.record(success)
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.error_rate == 0.25
+    breaker.record(False)
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow_request()
+
+
+def test_time_window_expires_by_slice() -> None:
+    clock = _Clock()
+    breaker = CircuitBreaker(
+        window_size=3,
+        error_rate_threshold=0.5,
+        open_cooldown_sec=1.0,
+        window_sec=1.0,
+        clock=clock,
+    )
+    breaker.record(False)
+    breaker.record(False)
+    clock.now += 1.05
+    breaker.record(True)
+    breaker.record(False)
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.error_rate == 0.5
+    breaker.record(False)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_half_open_admits_limited_probes_and_reports_transitions() -> None:
+    clock = _Clock()
+    seen: list[tuple[str, str, str, float]] = []
+    breaker = CircuitBreaker(
+        window_size=2,
+        error_rate_threshold=0.5,
+        open_cooldown_sec=1.0,
+        half_open_probes=2,
+        key="svc",
+        on_transition=lambda key, old, new, at: seen.append((key, old.value, new.value, at)),
+        clock=clock,
+    )
+    breaker.record(False)
+    breaker.record(False)
+    clock.now += 1.0
+    assert [breaker.allow_request() for _ in range(3)] == [True, True, False]
+    breaker.record(True)
+    assert breaker.state is BreakerState.HALF_OPEN
+    breaker.record(False)
+    assert breaker.state is BreakerState.OPEN
+    clock.now += 1.0
+    assert breaker.allow_request() and breaker.allow_request()
+    breaker.record(True)
+    breaker.record(True)
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.allow_request()
+    assert [(old, new) for _, old, new, _ in seen] == [
+        ("closed", "open"),
+        ("open", "half_open"),
+        ("half_open", "open"),
+        ("open", "half_open"),
+        ("half_open", "closed"),
+    ]
+    assert {key for key, *_ in seen} == {"svc"}
+    assert seen[1][3] == 101.0
+
+
+def test_registry_keys_breakers_by_template_or_host() -> None:
+    target = TargetConfig(
+        base_url="http://a:8080/",
+        templates=(
+            RequestTemplate(path="/x"),
+            RequestTemplate(path="/y", method="POST"),
+            RequestTemplate(path="http://b:81/z"),
+        ),
+        pool_size=64,
+    )
+    requests = build_request_pool(target, seed=1).unique()
+    by_template = BreakerRegistry(CircuitBreakerConfig(scope=BreakerScope.TEMPLATE))
+    by_host = BreakerRegistry(CircuitBreakerConfig(scope=BreakerScope.HOST))
+    by_run = BreakerRegistry(CircuitBreakerConfig())
+    shared = by_run.for_request(httpx.Request("GET", "http://c/"))
+    for request in requests:
+        by_template.for_request(request)
+        by_host.for_request(request)
+        assert by_run.for_request(request) is shared
+    assert set(by_template.breakers) == {"GET /x", "POST /y", "GET http://b:81/z"}
+    assert set(by_host.breakers) == {"a:8080", "b:81"}
+
+
+def test_per_host_breaker_stops_only_the_failing_host(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=40.0,
+        burst_rps=40.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(
+            base_url=http_server,
+            templates=(RequestTemplate(path="/ok"), RequestTemplate(path="http://127.0.0.1:9/")),
+            timeout_sec=1.0,
+        ),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+        circuit_breaker=CircuitBreakerConfig(
+            enabled=True, window_size=5, open_cooldown_sec=0.5, scope=BreakerScope.HOST
+        ),
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    transitions = storage.load_breaker_events(run_id)
+    assert set(transitions["key"]) == {"127.0.0.1:9"}
+    assert transitions["to_state"].iloc[0] == "open"
+    assert {"half_open", "open"} <= set(transitions["to_state"])
+    assert transitions["at_sec"].between(0.0, 2.5).all()
+    events = storage.load_request_events(run_id)
+    failed = events["error_type"].notna().sum()
+    assert 5 <= failed < 20
+    assert (events["status_code"] == 200).sum() >= 30
+    restored = RunConfig.from_metadata(storage.load_run_meta(run_id))
+    assert restored.circuit_breaker == config.circuit_breaker
@@ -2,7 +2,8 @@ from __future__ import annotations
 
 from dataclasses import asdict
 
-from lps.config import BurstyConfig, PatternConfig, PatternType
+from lps.config import ArrivalProcess, BurstyConfig, PatternConfig, PatternType
+from lps.loadgen.arrivals import arrival_offsets
 from lps.patterns import schedule_for
 
 
@@ -23,3 +24,23 @@ def test_bursty_pattern_intervals() -> None:
             assert rate == 100.0
         else:
             assert rate == 10.0
+
+
+def test_sub_second_bursts_survive_scheduling() -> None:
+    cfg = BurstyConfig(
+        baseline_rps=20.0,
+        burst_rps=400.0,
+        burst_duration_sec=0.5,
+        burst_interval_sec=2,
+        jitter_pct=0.0,
+    )
+    pattern = PatternConfig(PatternType.BURSTY, asdict(cfg))
+    schedule = schedule_for(pattern, duration_sec=4, seed=1, resolution_sec=0.1)
+    assert schedule.duration_sec() == 4
+    assert schedule.rates.tolist()[:10] == [400.0] * 5 + [20.0] * 5
+    assert schedule.rates_per_sec == [210.0, 20.0, 210.0, 20.0]
+
+    offsets = arrival_offsets(schedule.rates, ArrivalProcess.EVEN, 1, schedule.resolution_sec)
+    in_burst = (offsets % 2) < 0.5
+    assert in_burst.sum() == 400
+    assert (~in_burst).sum() == 60
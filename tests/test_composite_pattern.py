@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from lps.config import CompositeConfig, DiurnalConfig, PatternConfig, PatternType, ViralSpikeConfig
+from lps.patterns import CompositePattern, schedule_for
+from lps.patterns.diurnal import DiurnalPattern
+from lps.patterns.viral import ViralSpikePattern
+
+
+def _rates(expression: str, duration_sec: int, resolution_sec: float = 1.0) -> np.ndarray:
+    pattern = CompositePattern(CompositeConfig(expression))
+    return pattern.schedule(duration_sec, resolution_sec).rates
+
+
+def test_sum_of_diurnal_and_shifted_spike() -> None:
+    rates = _rates("diurnal(20, 300, 600) + shift(viral(10, 5, 10, 20, 30), 100)", 600)
+    diurnal = DiurnalPattern(DiurnalConfig(20, 300, 600)).schedule(600).rates
+    spike = ViralSpikePattern(ViralSpikeConfig(10, 5, 10, 20, 30)).schedule(500).rates
+    assert np.allclose(rates[:100], diurnal[:100])
+    assert np.allclose(rates[100:], diurnal[100:] + spike)
+
+
+def test_operators_and_functions() -> None:
+    assert np.allclose(_rates("2 * constant(10) + 5", 3), 25.0)
+    assert np.allclose(_rates("product(constant(3), 4)", 3), 12.0)
+    assert np.allclose(_rates("clip(constant(500), max_rps=100)", 3), 100.0)
+    assert np.allclose(_rates("scale(constant(10), 0.5)", 3), 5.0)
+    assert _rates("concat(constant(1), 2.5, constant(7))", 5, 0.5).tolist() == [1.0] * 5 + [7.0] * 5
+
+
+def test_chunked_evaluation_matches_schedule() -> None:
+    expression = "bursty(50, 500, 5, 60) + diurnal(0, 100, 7200)"
+    pattern = CompositePattern(CompositeConfig(expression), seed=3)
+    chunks = list(pattern.iter_rates(7300, chunk_sec=3600))
+    assert [len(c) for c in chunks] == [3600, 3600, 100]
+    assert np.array_equal(np.concatenate(chunks), pattern.schedule(7300).rates)
+
+
+def test_composite_from_pattern_config() -> None:
+    config = PatternConfig(PatternType.COMPOSITE, {"expression": "constant(40)"})
+    assert schedule_for(config, duration_sec=4, seed=1).rates_per_sec == [40.0] * 4
+
+
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "__import__('os')",
+        "constant(1) - constant(2)",
+        "nope(1)",
+        "shift(constant(1))",
+        "concat(constant(1), 5)",
+    ],
+)
+def test_rejects_invalid_expressions(expression: str) -> None:
+    with pytest.raises(ValueError):
+        _rates(expression, 2)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from lps.config import BurstyConfig, PatternConfig, PatternType, RunConfig, TargetConfig
+from lps.loadgen import distributed
+from lps.loadgen.distributed import Coordinator, decode_columns, encode_columns, run_agent
+from lps.metrics import ErrorType, EventBuffer, RequestEvent
+from lps.storage import Storage
+
+
+def test_event_columns_round_trip_as_bytes() -> None:
+    buffer = EventBuffer("run")
+    buffer.append(RequestEvent("run", 1.0, 100.25, 12.5, 200, None, 10, 20, 100.2, 100.21))
+    buffer.append(
+        RequestEvent(
+            "run", 2.0, 101.5, 3.0, None, ErrorType.TIMEOUT, 10, 0, request_id=7, attempt=1
+        )
+    )
+    columns = buffer.drain()
+
+    payload = encode_columns(columns, start_at=100.0)
+    assert len(payload) == 68 * len(columns)
+    decoded = decode_columns(payload, started_mono=500.0)
+    np.testing.assert_allclose(decoded.mono_time, columns.mono_time + 400.0)
+    np.testing.assert_allclose(decoded.intended_mono, columns.intended_mono + 400.0)
+    np.testing.assert_array_equal(decoded.status_code, columns.status_code)
+    np.testing.assert_array_equal(decoded.error_code, columns.error_code)
+    np.testing.assert_array_equal(decoded.request_id, columns.request_id)
+    np.testing.assert_array_equal(decoded.attempt, columns.attempt)
+    with pytest.raises(ValueError, match="whole number"):
+        decode_columns(payload[:-1], started_mono=0.0)
+
+
+@pytest.mark.asyncio
+async def test_coordinator_merges_agent_events(
+    tmp_path: Path,
+    http_server: str,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # One bin per frame, so every agent's schedule arrives in several chunks.
+    monkeypatch.setattr(distributed, "_RATES_PER_FRAME", 1)
+    cfg = BurstyConfig(
+        baseline_rps=30.0,
+        burst_rps=30.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    coordinator = Coordinator(config, storage, expected_agents=3)
+    port = await coordinator.start()
+    agents = [asyncio.create_task(run_agent("127.0.0.1", port, f"agent-{i}")) for i in range(3)]
+    run_id = await asyncio.wait_for(coordinator.run(), timeout=30.0)
+    await asyncio.gather(*agents)
+
+    per_second = storage.load_per_second(run_id)
+    assert per_second["second"].tolist() == [0, 1]
+    assert per_second["requested_rps"].tolist() == [30.0, 30.0]
+    assert abs(per_second["achieved_rps"].sum() - 60.0) <= 3.0
+    assert per_second["error_rate"].max() == 0.0
+    events = storage.load_request_events(run_id)
+    assert (events["mono_time"] - events["intended_mono"]).min() >= 0.0
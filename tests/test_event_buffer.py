@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from array import array
+
+import numpy as np
+import pytest
+
+from lps.metrics import ErrorType, EventBuffer, EventColumns, RequestEvent
+
+
+def _event(i: int, run_id: str = "run-a") -> RequestEvent:
+    error = (None, ErrorType.TIMEOUT, ErrorType.DROPPED)[i % 3]
+    return RequestEvent(
+        run_id=run_id,
+        wall_time=1000.0 + i,
+        mono_time=10.0 + i * 0.01,
+        latency_ms=float(i % 17),
+        status_code=None if error else 200,
+        error_type=error,
+        bytes_sent=i,
+        bytes_received=512,
+        intended_mono=None if i % 4 else 9.99 + i * 0.01,
+        sent_mono=10.0 + i * 0.01,
+    )
+
+
+def test_drain_returns_columns_matching_events_without_copying() -> None:
+    events = [_event(i) for i in range(1000)]
+    buffer = EventBuffer()
+    for event in events:
+        buffer.append(event)
+    assert buffer.nbytes / len(buffer) <= 68
+    columns = buffer.drain()
+    assert len(buffer) == 0
+    assert isinstance(columns.mono_time.base.obj, array)
+    assert columns.to_events("run-a") == events
+    expected = EventColumns.from_events(events)
+    assert np.array_equal(columns.error_code, expected.error_code)
+    assert np.array_equal(columns.intended_mono, expected.intended_mono, equal_nan=True)
+
+
+def test_extend_appends_column_batches_for_the_same_run() -> None:
+    buffer = EventBuffer("run-a")
+    buffer.extend("run-a", EventColumns.from_events([_event(i) for i in range(10)]))
+    buffer.append(_event(10))
+    assert buffer.drain().to_events("run-a") == [_event(i) for i in range(11)]
+    with pytest.raises(ValueError):
+        buffer.append(_event(0, run_id="run-b"))
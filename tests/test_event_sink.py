@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+from lps.loadgen.sink import StorageEventSink
+from lps.metrics import ErrorType, RequestEvent
+from lps.storage import Storage
+
+
+def _event(i: int) -> RequestEvent:
+    return RequestEvent(
+        run_id="run-a",
+        wall_time=1000.0 + i,
+        mono_time=float(i),
+        latency_ms=1.5,
+        status_code=200 if i % 2 else None,
+        error_type=None if i % 2 else ErrorType.TIMEOUT,
+        bytes_sent=0,
+        bytes_received=10,
+    )
+
+
+def test_storage_sink_flushes_in_batches(tmp_path: Path) -> None:
+    storage = Storage(tmp_path / "lps.duckdb")
+    sink = StorageEventSink(storage, batch_size=100, max_pending=200)
+    for i in range(1050):
+        sink.emit(_event(i))
+    sink.close()
+    assert sink.written == 1050
+    events = list(storage.iter_request_events("run-a", chunk_size=64))
+    assert len(events) == 1050
+    assert events[0].error_type is ErrorType.TIMEOUT
+    assert events[1].status_code == 200
+
+
+def test_storage_sink_flushes_partial_batch_on_interval(tmp_path: Path) -> None:
+    storage = Storage(tmp_path / "lps.duckdb")
+    sink = StorageEventSink(storage, batch_size=1000, flush_interval_sec=0.05)
+    for i in range(10):
+        sink.emit(_event(i))
+    deadline = time.monotonic() + 5.0
+    while sink.written < 10 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(storage.load_request_events("run-a")) == 10
+    sink.close()
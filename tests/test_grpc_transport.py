@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator
+
+import httpx
+import pytest
+
+grpc = pytest.importorskip("grpc")
+
+from lps.config import (  # noqa: E402
+    BurstyConfig,
+    ClientEngine,
+    PatternConfig,
+    PatternType,
+    RequestTemplate,
+    RetryConfig,
+    RunConfig,
+    TargetConfig,
+    TransportConfig,
+)
+from lps.loadgen.client import send_request  # noqa: E402
+from lps.loadgen.retry import RetryPolicy  # noqa: E402
+from lps.loadgen.runner import run_experiment  # noqa: E402
+from lps.loadgen.templates import build_request_pool  # noqa: E402
+from lps.loadgen.transport import open_transport  # noqa: E402
+from lps.metrics import ErrorType  # noqa: E402
+from lps.storage import Storage  # noqa: E402
+
+
+def _echo(request: bytes, context: grpc.ServicerContext) -> bytes:
+    """Echoes the request prefixed with the caller's tenant, or fails as asked."""
+    metadata = dict(context.invocation_metadata())
+    if "x-status" in metadata:
+        context.abort(grpc.StatusCode[metadata["x-status"]], "as requested")
+    if "x-sleep" in metadata:
+        time.sleep(float(metadata["x-sleep"]))
+    return metadata.get("x-tenant", "").encode() + b":" + request
+
+
+@pytest.fixture
+def grpc_server() -> Iterator[str]:
+    server = grpc.server(ThreadPoolExecutor(max_workers=8))
+    handler = grpc.method_handlers_generic_handler(
+        "echo.Echo", {"Say": grpc.unary_unary_rpc_method_handler(_echo)}
+    )
+    server.add_generic_rpc_handlers((handler,))
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield f"grpc://127.0.0.1:{port}"
+    server.stop(grace=None)
+
+
+def _config(url: str, *templates: RequestTemplate, timeout_sec: float = 5.0) -> RunConfig:
+    return RunConfig(
+        target=TargetConfig(base_url=url, timeout_sec=timeout_sec, templates=templates),
+        pattern=PatternConfig(PatternType.VIRAL, {}),
+        duration_sec=1,
+        transport=TransportConfig(
+            engine=ClientEngine.GRPC,
+            http2_connections=2,
+            streams_per_connection=4,
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_unary_calls_over_persistent_channels(grpc_server: str) -> None:
+    template = RequestTemplate(
+        path="/echo.Echo/Say",
+        headers={"X-Tenant": "acme"},
+        body="aGk=",  # b"hi"
+        body_base64=True,
+    )
+    config = _config(grpc_server, template)
+    pool = build_request_pool(config.target, seed=1)
+    async with open_transport(config, pool) as transport:
+        await transport.warm_up(2)
+        exchanges = await asyncio.gather(*(transport.send(pool.next()) for _ in range(20)))
+    assert {(e.status_code, e.bytes_received) for e in exchanges} == {(200, len(b"acme:hi"))}
+    assert all(e.connect_ms == 0.0 for e in exchanges)
+
+
+@pytest.mark.asyncio
+async def test_status_codes_map_to_http_statuses_and_errors(grpc_server: str) -> None:
+    def request(**headers: str) -> RequestTemplate:
+        return RequestTemplate(path="/echo.Echo/Say", headers=headers, body="")
+
+    config = _config(
+        grpc_server,
+        request(**{"X-Status": "NOT_FOUND"}),
+        request(**{"X-Status": "RESOURCE_EXHAUSTED"}),
+        request(**{"X-Status": "INTERNAL"}),
+        request(**{"X-Status": "UNAVAILABLE"}),
+        request(**{"X-Sleep": "1"}),
+        timeout_sec=0.3,
+    )
+    pool = build_request_pool(config.target, seed=1)
+    cases = {r.headers.get("x-status", "slow"): r for r in pool.unique()}
+    async with open_transport(config, pool) as transport:
+        assert (await transport.send(cases["NOT_FOUND"])).status_code == 404
+        assert (await transport.send(cases["RESOURCE_EXHAUSTED"])).status_code == 429
+        internal = await send_request(
+            transport, "run-a", cases["INTERNAL"], RetryPolicy(RetryConfig(enabled=True))
+        )
+        assert internal.event.status_code == 500
+        assert internal.event.error_type is ErrorType.STATUS
+        assert len(internal.events) == 1 and not internal.success
+        with pytest.raises(httpx.ConnectError):
+            await transport.send(cases["UNAVAILABLE"])
+        with pytest.raises(httpx.TimeoutException):
+            await transport.send(cases["slow"])
+
+
+def test_rejects_non_grpc_target() -> None:
+    config = _config("http://127.0.0.1:1/", RequestTemplate(path="/echo.Echo/Say"))
+    pool = build_request_pool(config.target, seed=1)
+
+    async def open_it() -> None:
+        async with open_transport(config, pool):
+            pass
+
+    with pytest.raises(ValueError, match="grpc://"):
+        asyncio.run(open_it())
+
+
+def test_run_with_grpc_engine(tmp_path: Path, grpc_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=30.0,
+        burst_rps=30.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(
+            base_url=grpc_server,
+            templates=(RequestTemplate(path="/echo.Echo/Say", body="ping"),),
+        ),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+        transport=TransportConfig(engine=ClientEngine.GRPC),
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    events = storage.load_request_events(run_id)
+    assert len(events) == 60
+    assert set(events["status_code"]) == {200}
+    assert set(events["bytes_received"]) == {len(b":ping")}
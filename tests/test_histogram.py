@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from lps.metrics import EventColumns, RequestEvent
+from lps.metrics.histogram import LatencyHistogram, PerSecondHistograms
+from lps.storage import Storage
+
+
+def test_histogram_percentiles_within_bucket_precision() -> None:
+    rng = np.random.default_rng(5)
+    values = rng.lognormal(3.0, 1.0, 50_000)
+    hist = LatencyHistogram.from_values(values)
+    assert hist.total == len(values)
+    for q in (50, 90, 99, 99.9):
+        exact = float(np.percentile(values, q, method="inverted_cdf"))
+        assert abs(hist.percentile(q) - exact) / exact < 0.01
+
+
+def test_histograms_merge_by_adding_counts() -> None:
+    rng = np.random.default_rng(6)
+    left = rng.exponential(20.0, 10_000)
+    right = rng.exponential(200.0, 10_000)
+    merged = LatencyHistogram.from_values(left) + LatencyHistogram.from_values(right)
+    whole = LatencyHistogram.from_values(np.concatenate([left, right]))
+    assert np.array_equal(merged.counts, whole.counts)
+
+
+def test_per_second_histograms_round_trip_through_storage(tmp_path: Path) -> None:
+    events = [
+        RequestEvent(
+            run_id="run-a",
+            wall_time=0.0,
+            mono_time=100.0 + second + 0.5,
+            latency_ms=float(10 * (second + 1)),
+            status_code=200,
+            error_type=None,
+            bytes_sent=0,
+            bytes_received=0,
+        )
+        for second in range(10)
+        for _ in range(20)
+    ]
+    recorder = PerSecondHistograms("run-a", close_after_sec=2)
+    recorder.start(100.0)
+    recorder.record(EventColumns.from_events(events))
+    closed = recorder.pop_closed()
+    assert sorted(closed) == list(range(7))
+    storage = Storage(tmp_path / "lps.duckdb")
+    storage.append_histograms("run-a", closed)
+    storage.append_histograms("run-a", recorder.pop_all())
+
+    window = storage.load_histogram("run-a", start_sec=2, end_sec=4)
+    assert window.total == 40
+    assert abs(window.percentile(100) - 40.0) / 40.0 < 0.01
+    assert storage.load_histogram("run-a").total == 200
+    assert storage.load_histogram("run-a", metric="response").total == 200
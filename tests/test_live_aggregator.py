@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from lps.config import BurstyConfig, PatternConfig, PatternType, RunConfig, TargetConfig
+from lps.loadgen.runner import run_experiment
+from lps.metrics import (
+    EventColumns,
+    LiveAggregator,
+    PerSecondMetrics,
+    RequestEvent,
+    aggregate_per_second,
+)
+from lps.storage import Storage
+
+
+def _event(mono_time: float, latency_ms: float) -> RequestEvent:
+    return RequestEvent(
+        run_id="run-a",
+        wall_time=mono_time,
+        mono_time=mono_time,
+        latency_ms=latency_ms,
+        status_code=200,
+        error_type=None,
+        bytes_sent=0,
+        bytes_received=0,
+    )
+
+
+def test_seconds_close_after_grace_and_match_final_rows() -> None:
+    events = [_event(10.0 + i * 0.01, float(i % 37)) for i in range(400)]
+    published: list[PerSecondMetrics] = []
+    live = LiveAggregator("run-a", [100.0] * 4, grace_sec=1.0, on_second=published.append)
+    live.start(10.0)
+    live.record(EventColumns.from_events(events[:150]))
+    assert live.pop_closed(now=11.9) == []
+    first = live.pop_closed(now=12.0)
+    assert [row.second for row in first] == [0]
+    live.record(EventColumns.from_events(events[150:]))
+    rest = live.pop_all()
+    assert [row.second for row in rest] == [1, 2, 3]
+    assert published == first + rest
+    assert published == aggregate_per_second("run-a", events, [100.0] * 4, 10.0)
+
+
+@pytest.mark.asyncio
+async def test_run_publishes_every_second_once(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=20.0,
+        burst_rps=20.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=3,
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    published: list[PerSecondMetrics] = []
+    run_id = await run_experiment(config, storage, on_second=published.append)
+    assert [row.second for row in published] == [0, 1, 2]
+    assert storage.load_per_second(run_id)["second"].tolist() == [0, 1, 2]
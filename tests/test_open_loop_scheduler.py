@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pytest
+
+from lps.config import (
+    ArrivalProcess,
+    BurstyConfig,
+    PatternConfig,
+    PatternType,
+    RunConfig,
+    TargetConfig,
+)
+from lps.loadgen import runner
+from lps.loadgen.arrivals import arrivals_by_second
+from lps.loadgen.scheduler import OpenLoopScheduler
+from lps.patterns import PatternSchedule
+from lps.storage import Storage
+
+
+@pytest.mark.asyncio
+async def test_scheduler_drops_arrivals_over_in_flight_cap() -> None:
+    release = asyncio.Event()
+    launched: list[float] = []
+    dropped: list[float] = []
+
+    async def launch(due: float) -> None:
+        launched.append(due)
+        await release.wait()
+
+    scheduler = OpenLoopScheduler(3, launch, dropped.append)
+    start = time.perf_counter()
+    scheduler.push(start + i * 0.001 for i in range(10))
+    await scheduler.run_until(start + 0.05)
+    assert scheduler.in_flight == 3
+    assert len(launched) == 3
+    assert len(dropped) == 7
+    release.set()
+    await scheduler.drain(timeout=1.0)
+    assert scheduler.in_flight == 0
+    assert scheduler.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_releases_finished_tasks() -> None:
+    async def launch(due: float) -> None:
+        return None
+
+    scheduler = OpenLoopScheduler(2, launch, lambda due: None)
+    start = time.perf_counter()
+    for step in range(5):
+        scheduler.push([start + step * 0.01])
+        await scheduler.run_until(start + (step + 1) * 0.01)
+    await scheduler.drain(timeout=1.0)
+    assert scheduler.dispatched == 5
+    assert scheduler.dropped == 0
+    assert scheduler.in_flight == 0
+
+
+def test_slow_arrival_generation_neither_loses_nor_hides_seconds(
+    tmp_path: Path, http_server: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def slow_arrivals(
+        schedule: PatternSchedule, process: ArrivalProcess, seed: int
+    ) -> Iterator[np.ndarray]:
+        # Each of the first two seconds takes longer than a second to generate.
+        for second, offsets in enumerate(arrivals_by_second(schedule, process, seed)):
+            if second < 2:
+                time.sleep(1.2)
+            yield offsets
+
+    monkeypatch.setattr(runner, "arrivals_by_second", slow_arrivals)
+    cfg = BurstyConfig(
+        baseline_rps=20.0,
+        burst_rps=20.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=3,
+    )
+    with Storage(tmp_path / "lps.duckdb") as storage:
+        run_id = asyncio.run(runner.run_experiment(config, storage))
+        events = storage.load_request_events(run_id)
+    intended = events["intended_mono"] - events["intended_mono"].min()
+    sent = events["error_type"].isna()
+    # The first second was generated before t=0; the overrun second is recorded as dropped.
+    assert sent[intended < 1].sum() == 20
+    assert (events["error_type"][(intended >= 1) & (intended < 2)] == "dropped").sum() == 20
+    assert sent[intended >= 2].sum() == 20
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from lps.config import BurstyConfig, LoadModel, PatternConfig, PatternType, RunConfig, TargetConfig
+from lps.loadgen.pacing import GcraLimiter, workers_needed
+from lps.loadgen.runner import run_experiment
+from lps.storage import Storage
+
+
+async def _grants(limiter: GcraLimiter, workers: int) -> list[float]:
+    granted: list[float] = []
+
+    async def worker() -> None:
+        while await limiter.acquire():
+            granted.append(time.perf_counter())
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return granted
+
+
+@pytest.mark.asyncio
+async def test_limiter_paces_shared_workers_at_the_rate() -> None:
+    start = time.perf_counter()
+    limiter = GcraLimiter(lambda t: 200.0, start, start + 0.5)
+    granted = await _grants(limiter, workers=20)
+    assert 95 <= len(granted) <= 101
+    gaps = sorted(b - a for a, b in zip(granted, granted[1:]))
+    assert gaps[len(gaps) // 2] == pytest.approx(0.005, abs=0.001)
+
+
+@pytest.mark.asyncio
+async def test_limiter_follows_rate_changes_and_idles_at_zero() -> None:
+    start = time.perf_counter()
+    limiter = GcraLimiter(lambda t: 0.0 if t < 0.2 else 100.0, start, start + 0.6)
+    granted = await _grants(limiter, workers=4)
+    assert min(granted) - start >= 0.2
+    assert 36 <= len(granted) <= 42
+
+
+def test_workers_needed_follows_littles_law() -> None:
+    assert workers_needed(100.0, 0.2, active=1, behind=False, maximum=500) == 26
+    assert workers_needed(100.0, 0.2, active=40, behind=True, maximum=500) == 80
+    assert workers_needed(100.0, 0.2, active=40, behind=True, maximum=50) == 50
+    assert workers_needed(0.0, 0.2, active=10, behind=False, maximum=50) == 1
+
+
+def test_closed_loop_tracks_requested_rate(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=40.0,
+        burst_rps=120.0,
+        burst_duration_sec=1,
+        burst_interval_sec=2,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+        load_model=LoadModel.CLOSED_LOOP,
+        closed_loop_workers=20,
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    per_second = storage.load_per_second(run_id)
+    assert per_second["requested_rps"].sum() == pytest.approx(160.0)
+    assert len(storage.load_request_events(run_id)) == pytest.approx(160, abs=4)
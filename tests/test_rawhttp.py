@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from dataclasses import asdict
+from pathlib import Path
+
+import httpx
+import pytest
+
+from lps.config import (
+    BurstyConfig,
+    ClientEngine,
+    PatternConfig,
+    PatternType,
+    RunConfig,
+    TargetConfig,
+    TransportConfig,
+)
+from lps.loadgen.rawhttp import RawHttpClient, encode_request
+from lps.loadgen.runner import run_experiment
+from lps.storage import Storage
+
+
+async def _chunked_server(responses: list[bytes]) -> tuple[asyncio.Server, str]:
+    """Answers each request with the next canned response (split into small writes)."""
+    replies = iter(responses)
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                reply = next(replies)
+                for i in range(0, len(reply), 7):
+                    writer.write(reply[i : i + 7])
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, StopIteration):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+
+def test_encode_request() -> None:
+    request = httpx.Request("POST", "http://svc:8080/a/b?x=1", headers={"X-A": "1"}, content=b"hi")
+    payload = encode_request(request)
+    head, body = payload.split(b"\r\n\r\n")
+    lines = head.split(b"\r\n")
+    assert lines[0] == b"POST /a/b?x=1 HTTP/1.1"
+    assert b"host: svc:8080" in [line.lower() for line in lines]
+    assert b"content-length: 2" in [line.lower() for line in lines]
+    assert body == b"hi"
+
+
+@pytest.mark.asyncio
+async def test_parses_chunked_and_length_framed_responses() -> None:
+    server, url = await _chunked_server(
+        [
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5;ext=1\r\nhello\r\n6\r\n world\r\n0\r\nX-Trailer: 1\r\n\r\n",
+            b"HTTP/1.1 404 Not Found\r\nContent-Length: 3\r\n\r\nnop",
+            b"HTTP/1.1 204 No Content\r\n\r\n",
+        ]
+    )
+    async with server, RawHttpClient(url, 5.0, max_connections=1, body_digest="sha256") as client:
+        request = httpx.Request("GET", url)
+        responses = [await client.send(request) for _ in range(3)]
+    assert [(r.status_code, r.received) for r in responses] == [(200, 11), (404, 3), (204, 0)]
+    assert responses[0].digest.hexdigest() == hashlib.sha256(b"hello world").hexdigest()
+    assert responses[1].digest.hexdigest() == hashlib.sha256(b"nop").hexdigest()
+    assert responses[0].connect_ms > 0
+    assert [r.connect_ms for r in responses[1:]] == [0.0, 0.0]
+    assert all(r.ttfb_ms > 0 for r in responses)
+
+
+@pytest.mark.asyncio
+async def test_pipelines_over_few_connections(http_server: str) -> None:
+    async with RawHttpClient(http_server, max_connections=2, pipeline_depth=8) as client:
+        request = httpx.Request("GET", http_server)
+        results = await asyncio.gather(*(client.send(request) for _ in range(50)))
+        assert [(r.status_code, r.received) for r in results] == [(200, 110)] * 50
+        assert len(client._connections) == 2
+
+
+@pytest.mark.asyncio
+async def test_connect_failure_maps_to_httpx_error() -> None:
+    async with RawHttpClient("http://127.0.0.1:9/", timeout_sec=2.0) as client:
+        with pytest.raises(httpx.ConnectError):
+            await client.send(httpx.Request("GET", "http://127.0.0.1:9/"))
+
+
+async def _slow_server(delay_sec: float) -> tuple[asyncio.Server, str]:
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                await reader.readuntil(b"\r\n\r\n")
+                await asyncio.sleep(delay_sec)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+
+@pytest.mark.asyncio
+async def test_ttfb_excludes_waiting_for_a_connection() -> None:
+    server, url = await _slow_server(0.2)
+    async with server, RawHttpClient(url, 5.0, max_connections=1) as client:
+        request = httpx.Request("GET", url)
+        first, second = await asyncio.gather(client.send(request), client.send(request))
+    assert first.ttfb_ms >= 200.0
+    assert 200.0 <= second.ttfb_ms < 350.0
+
+
+@pytest.mark.asyncio
+async def test_waiting_for_a_connection_times_out() -> None:
+    server, url = await _slow_server(5.0)
+    async with server, RawHttpClient(url, 5.0, max_connections=1) as client:
+        request = httpx.Request("GET", url)
+        busy = asyncio.create_task(client.send(request))
+        await asyncio.sleep(0.1)
+        client.timeout_sec = 0.2
+        with pytest.raises(httpx.PoolTimeout):
+            await client.send(request)
+        busy.cancel()
+
+
+def test_run_with_raw_engine(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=40.0,
+        burst_rps=40.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+        transport=TransportConfig(engine=ClientEngine.RAW),
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    events = storage.load_request_events(run_id)
+    assert len(events) == 80
+    assert set(events["status_code"]) == {200}
+    assert set(events["bytes_received"]) == {110}
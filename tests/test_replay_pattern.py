@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from lps.config import ArrivalProcess, PatternConfig, PatternType, ReplayConfig
+from lps.loadgen.arrivals import arrivals_by_second, split_by_second
+from lps.loadgen.workers import split_schedule
+from lps.patterns import TraceArrivals, schedule_for
+
+
+def _trace(tmp_path: Path, lines: list[str]) -> str:
+    path = tmp_path / "trace.csv"
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+def test_timestamp_trace_replays_recorded_offsets(tmp_path: Path) -> None:
+    stamps = [1_700_000_000.0 + t for t in (0.0, 0.25, 0.5, 1.1, 2.75, 5.0)]
+    path = _trace(tmp_path, ["timestamp", *map(str, stamps)])
+    pattern = PatternConfig(PatternType.REPLAY, {"path": path})
+    schedule = schedule_for(pattern, duration_sec=4, seed=1, resolution_sec=0.1)
+    seconds = list(arrivals_by_second(schedule, ArrivalProcess.EVEN, seed=1))
+    assert [len(s) for s in seconds] == [3, 1, 1, 0]
+    assert np.allclose(np.concatenate(seconds), [0.0, 0.25, 0.5, 1.1, 2.75])
+    assert np.allclose(schedule.rates_per_sec, [3.0, 1.0, 1.0, 0.0])
+
+
+def test_time_compression_and_scale(tmp_path: Path) -> None:
+    path = _trace(tmp_path, [str(t / 10) for t in range(200)])
+    config = ReplayConfig(path=path, time_compression=2.0, rps_scale=3.0)
+    offsets = np.concatenate(list(TraceArrivals(config, duration_sec=10).chunks()))
+    assert len(offsets) == 3 * 200
+    assert offsets.max() < 10.0
+    assert np.all(np.diff(offsets) >= 0)
+
+
+def test_chunked_split_covers_trace_once(tmp_path: Path) -> None:
+    rng = np.random.default_rng(4)
+    stamps = np.sort(rng.uniform(0, 30, 5000))
+    path = _trace(tmp_path, [f"{t:.6f}" for t in stamps])
+    config = ReplayConfig(path=path, rps_scale=0.6)
+    whole = TraceArrivals(config, duration_sec=30, chunk_rows=700)
+    parts = whole.split(3)
+    combined = np.sort(np.concatenate([np.concatenate(list(p.chunks())) for p in parts]))
+    assert np.array_equal(combined, np.concatenate(list(whole.chunks())))
+    seconds = list(split_by_second(parts[0].chunks(), 30))
+    assert len(seconds) == 30
+    assert sum(len(s) for s in seconds) == sum(len(c) for c in parts[0].chunks())
+
+
+def test_out_of_order_trace_is_sorted_across_chunks(tmp_path: Path) -> None:
+    # Each chunk of 4 rows overlaps its neighbours, and the earliest stamp is not first.
+    stamps = [10.5, 10.0, 11.0, 10.8, 10.9, 12.0, 11.5, 12.5, 12.2, 13.0]
+    path = _trace(tmp_path, [str(t) for t in stamps])
+    arrivals = TraceArrivals(ReplayConfig(path=path), duration_sec=5, chunk_rows=4)
+    offsets = np.concatenate(list(arrivals.chunks()))
+    assert np.allclose(offsets, np.sort(stamps) - 10.0)
+    seconds = list(split_by_second(arrivals.chunks(), 5))
+    assert [len(s) for s in seconds] == [4, 2, 3, 1, 0]
+
+
+def test_trace_going_back_past_a_chunk_is_rejected(tmp_path: Path) -> None:
+    path = _trace(tmp_path, ["5", "6", "7", "8", "1", "9"])
+    arrivals = TraceArrivals(ReplayConfig(path=path), duration_sec=10, chunk_rows=2)
+    with pytest.raises(ValueError, match="sort it by time"):
+        list(arrivals.chunks())
+
+
+def test_rate_trace_spreads_rows(tmp_path: Path) -> None:
+    path = _trace(tmp_path, ["ts,rps", "100,10", "101,20", "102,40"])
+    pattern = PatternConfig(PatternType.REPLAY, {"path": path, "time_compression": 2.0})
+    schedule = schedule_for(pattern, duration_sec=2, seed=1, resolution_sec=0.1)
+    assert schedule.arrivals is None
+    assert np.allclose(schedule.rates[:5], 20.0)
+    assert np.allclose(schedule.rates[5:10], 40.0)
+    assert np.allclose(schedule.rates[10:15], 80.0)
+    assert np.allclose(schedule.rates[15:], 0.0)
+
+
+def test_split_schedule_partitions_trace(tmp_path: Path) -> None:
+    path = _trace(tmp_path, [str(t / 100) for t in range(300)])
+    schedule = schedule_for(PatternConfig(PatternType.REPLAY, {"path": path}), 3, seed=1)
+    shares = split_schedule(schedule, 2)
+    counts = [sum(len(c) for c in share.arrivals.chunks()) for share in shares]
+    assert counts == [150, 150]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from lps.config import (
+    BurstyConfig,
+    PatternConfig,
+    PatternType,
+    RequestTemplate,
+    RunConfig,
+    TargetConfig,
+)
+from lps.loadgen.runner import run_experiment
+from lps.loadgen.templates import build_request_pool
+from lps.storage import Storage
+
+
+def test_pool_fills_templates_from_csv(tmp_path: Path) -> None:
+    data = tmp_path / "users.csv"
+    data.write_text("user_id,name\n1,ann\n2,bob\n")
+    target = TargetConfig(
+        base_url="http://svc/api/",
+        headers={"X-Run": "lps"},
+        templates=(
+            RequestTemplate(path="users/${user_id}?v=1", weight=3.0),
+            RequestTemplate(
+                path="/echo",
+                method="POST",
+                headers={"X-User": "${name}"},
+                body='{"id": "${user_id}"}',
+                weight=1.0,
+            ),
+        ),
+        data_file=str(data),
+        pool_size=400,
+    )
+    pool = build_request_pool(target, seed=1)
+    requests = [pool.next() for _ in range(len(pool))]
+    assert len({id(r) for r in requests}) == 4
+    urls = Counter(str(r.url) for r in requests)
+    assert set(urls) == {
+        "http://svc/api/users/1?v=1",
+        "http://svc/api/users/2?v=1",
+        "http://svc/api/echo",
+    }
+    users = urls["http://svc/api/users/1?v=1"] + urls["http://svc/api/users/2?v=1"]
+    assert 0.65 < users / 400 < 0.85
+    post = next(r for r in requests if r.method == "POST")
+    assert post.headers["X-Run"] == "lps"
+    assert post.headers["X-User"] in {"ann", "bob"}
+    assert post.content in {b'{"id": "1"}', b'{"id": "2"}'}
+    assert pool.next() is requests[0]
+
+
+def test_pool_reads_jsonl_and_rejects_unknown_fields(tmp_path: Path) -> None:
+    data = tmp_path / "rows.jsonl"
+    data.write_text('{"q": "shoes", "page": 2}\n')
+    target = TargetConfig(
+        base_url="http://svc",
+        templates=(RequestTemplate(path="/search?q=${q}&page=${page}"),),
+        data_file=str(data),
+    )
+    assert str(build_request_pool(target, seed=1).next().url) == "http://svc/search?q=shoes&page=2"
+    bad = TargetConfig(base_url="http://svc", templates=(RequestTemplate(path="/${missing}"),))
+    with pytest.raises(ValueError, match="missing"):
+        build_request_pool(bad, seed=1)
+
+
+def test_templates_survive_run_metadata() -> None:
+    target = TargetConfig(
+        base_url="http://svc",
+        templates=(RequestTemplate(path="/a", headers={"A": "b"}, body="x", weight=2.0),),
+        data_file="rows.csv",
+        pool_size=10,
+    )
+    config = RunConfig(target=target, pattern=PatternConfig(PatternType.BURSTY, {}), duration_sec=1)
+    assert RunConfig.from_metadata(config.to_metadata()).target == target
+
+
+def test_run_sends_template_bodies(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=20.0,
+        burst_rps=20.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(
+            base_url=http_server,
+            templates=(RequestTemplate(path="/upload", method="PUT", body="0123456789"),),
+        ),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=1,
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    events = storage.load_request_events(run_id)
+    assert len(events) == 20
+    assert events["bytes_sent"].tolist() == [10] * 20
+    assert events["status_code"].tolist() == [200] * 20
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from pathlib import Path
+
+import pytest
+
+from lps.config import (
+    BurstyConfig,
+    PatternConfig,
+    PatternType,
+    RetryConfig,
+    RunConfig,
+    TargetConfig,
+    TransportConfig,
+)
+from lps.loadgen.client import send_request
+from lps.loadgen.retry import RetryBudget, RetryPolicy
+from lps.loadgen.runner import _maybe_send, run_experiment
+from lps.loadgen.sink import ListEventSink
+from lps.loadgen.templates import build_request_pool
+from lps.loadgen.transport import open_transport
+from lps.metrics import EventColumns, RequestEvent
+from lps.storage import Storage
+
+_DEAD_URL = "http://127.0.0.1:9/"
+_FAST = RetryConfig(enabled=True, max_retries=2, base_delay_sec=0.001, max_delay_sec=0.002)
+
+
+def test_budget_refills_by_ratio_up_to_burst() -> None:
+    budget = RetryBudget(ratio=0.25, burst=2)
+    assert budget.withdraw() and budget.withdraw()
+    assert not budget.withdraw()
+    for _ in range(3):
+        budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+    for _ in range(100):
+        budget.deposit()
+    assert budget.tokens == 2.0
+
+
+def test_decorrelated_backoff_stays_between_base_and_three_times_previous() -> None:
+    config = RetryConfig(base_delay_sec=0.1, max_delay_sec=5.0)
+    policy = RetryPolicy(config, seed=3)
+    delay = 0.0
+    delays = []
+    for attempt in range(1, 200):
+        previous, delay = delay, policy.backoff(attempt, delay)
+        assert 0.1 <= delay <= max(0.1, min(5.0, previous * 3))
+        delays.append(delay)
+    assert len(set(delays)) > 100
+    fixed = RetryPolicy(RetryConfig(base_delay_sec=0.1, max_delay_sec=0.5, jitter=False))
+    assert [fixed.backoff(a, 0.0) for a in (1, 2, 3, 4)] == [0.1, 0.2, 0.4, 0.5]
+
+
+@pytest.mark.asyncio
+async def test_each_attempt_is_an_event_and_the_budget_limits_retries() -> None:
+    config = RunConfig(
+        target=TargetConfig(base_url=_DEAD_URL),
+        pattern=PatternConfig(PatternType.VIRAL, {}),
+        duration_sec=1,
+        transport=TransportConfig(),
+    )
+    pool = build_request_pool(config.target, seed=1)
+    policy = RetryPolicy(RetryConfig(**{**asdict(_FAST), "budget_ratio": 0.0, "budget_burst": 3}))
+    async with open_transport(config, pool) as transport:
+        responses = [await send_request(transport, "r", pool.next(), policy) for _ in range(3)]
+    assert [len(r.events) for r in responses] == [3, 2, 1]
+    first = responses[0].events
+    assert [e.attempt for e in first] == [0, 1, 2]
+    assert len({e.request_id for e in first}) == 1
+    assert responses[1].event.request_id == first[0].request_id + 1
+    assert all(e.sent_mono is not None and e.sent_mono < e.mono_time for e in first)
+    assert first[1].sent_mono > first[0].mono_time
+    assert not any(r.success for r in responses)
+
+
+class _BatchRecorder(ListEventSink):
+    def __init__(self) -> None:
+        super().__init__()
+        self.batches: list[list[int]] = []
+
+    def emit(self, event: RequestEvent) -> None:
+        self.batches.append([event.attempt])
+
+    def emit_columns(self, run_id: str, columns: EventColumns) -> None:
+        self.batches.append(columns.attempt.tolist())
+
+
+@pytest.mark.asyncio
+async def test_tries_of_a_request_are_emitted_as_one_batch() -> None:
+    config = RunConfig(
+        target=TargetConfig(base_url=_DEAD_URL),
+        pattern=PatternConfig(PatternType.VIRAL, {}),
+        duration_sec=1,
+        retry=_FAST,
+    )
+    pool = build_request_pool(config.target, seed=1)
+    sink = _BatchRecorder()
+    async with open_transport(config, pool) as transport:
+        await _maybe_send(transport, pool, "r", config, sink, None, RetryPolicy(_FAST))
+    assert sink.batches == [[0, 1, 2]]
+
+
+def test_run_records_attempts_and_amplification(tmp_path: Path) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=40.0,
+        burst_rps=40.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=_DEAD_URL, timeout_sec=1.0),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=2,
+        retry=RetryConfig(**{**asdict(_FAST), "budget_ratio": 0.5, "budget_burst": 0}),
+    )
+    storage = Storage(tmp_path / "lps.duckdb")
+    run_id = asyncio.run(run_experiment(config, storage))
+    events = storage.load_request_events(run_id)
+    assert (events["attempt"] == 0).sum() == 80
+    assert events["request_id"].nunique() == 80
+    assert 35 <= (events["attempt"] > 0).sum() <= 40
+    per_second = storage.load_per_second(run_id)
+    assert per_second["retry_rps"].sum() == (events["attempt"] > 0).sum()
+    assert all(1.3 <= a <= 1.6 for a in per_second["amplification"])
+    assert RunConfig.from_metadata(storage.load_run_meta(run_id)).retry == config.retry
+
+
+def test_policy_rejects_more_retries_than_the_attempt_column_holds() -> None:
+    with pytest.raises(ValueError):
+        RetryPolicy(RetryConfig(enabled=True, max_retries=128))
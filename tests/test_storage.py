@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import replace
+from pathlib import Path
+
+import duckdb
+import numpy as np
+
+from lps.metrics import ErrorType, EventColumns, RequestEvent
+from lps.storage import Storage
+
+
+def _event(index: int, error: ErrorType | None) -> RequestEvent:
+    return RequestEvent(
+        run_id="run-a",
+        wall_time=1000.0 + index,
+        mono_time=10.0 + index,
+        latency_ms=-1.0 if error else 5.0,
+        status_code=None if error else 200,
+        error_type=error,
+        bytes_sent=10,
+        bytes_received=0 if error else 512,
+        intended_mono=None if index % 2 else 9.5 + index,
+        sent_mono=10.0 + index,
+    )
+
+
+def test_column_insert_round_trips_nulls_and_error_types(tmp_path: Path) -> None:
+    errors = [None, ErrorType.TIMEOUT, None, ErrorType.CONNECT, ErrorType.DROPPED]
+    events = [_event(i, error) for i, error in enumerate(errors)]
+    with Storage(tmp_path / "lps.duckdb") as storage:
+        storage.append_events(events)
+        assert list(storage.iter_request_events("run-a")) == events
+        stored = storage.load_event_columns("run-a")
+    expected = EventColumns.from_events(events)
+    for name in ("error_code", "status_code", "latency_ms"):
+        assert np.array_equal(getattr(stored, name), getattr(expected, name))
+    assert np.array_equal(stored.intended_mono, expected.intended_mono, equal_nan=True)
+
+
+def test_request_events_round_trip_every_column(tmp_path: Path) -> None:
+    events = [
+        replace(_event(i, None), connect_ms=1.5 * i, ttfb_ms=2.25, request_id=7, attempt=i)
+        for i in range(3)
+    ]
+    with Storage(tmp_path / "lps.duckdb") as storage:
+        storage.append_event_columns("run-a", EventColumns.from_events(events))
+        assert list(storage.iter_request_events("run-a")) == events
+        assert storage.load_event_columns("run-a").to_events("run-a") == events
+
+
+def test_storage_is_shared_across_threads(tmp_path: Path) -> None:
+    with Storage(tmp_path / "lps.duckdb") as storage:
+        columns = EventColumns.from_events([_event(i, None) for i in range(100)])
+        threads = [
+            threading.Thread(target=storage.append_event_columns, args=(f"run-{i}", columns))
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(len(storage.load_event_columns(f"run-{i}")) == 100 for i in range(4))
+
+
+def test_legacy_database_is_moved_onto_run_keys(tmp_path: Path) -> None:
+    db_path = tmp_path / "lps.duckdb"
+    with duckdb.connect(str(db_path)) as con:
+        con.execute(
+            "CREATE TABLE run_meta (run_id TEXT PRIMARY KEY, created_at TIMESTAMP, "
+            "config_json TEXT, notes TEXT)"
+        )
+        con.execute(
+            "CREATE TABLE request_events (run_id TEXT, wall_time DOUBLE, mono_time DOUBLE, "
+            "latency_ms DOUBLE, status_code INTEGER, error_type TEXT, bytes_sent INTEGER, "
+            "bytes_received INTEGER)"
+        )
+        con.execute(
+            "CREATE TABLE per_second (run_id TEXT, second INTEGER, requested_rps DOUBLE, "
+            "achieved_rps DOUBLE, p50_ms DOUBLE, p95_ms DOUBLE, p99_ms DOUBLE, "
+            "error_rate DOUBLE, timeout_rate DOUBLE)"
+        )
+        con.execute(
+            "INSERT INTO run_meta VALUES ('run-b', now(), '{}', ''), ('run-a', now(), '{}', '')"
+        )
+        con.execute(
+            "INSERT INTO request_events VALUES "
+            "('run-b', 1, 11, 5, 200, NULL, 0, 1), ('run-a', 1, 12, 5, 200, NULL, 0, 1), "
+            "('run-b', 1, 10, 5, NULL, 'timeout', 0, 0)"
+        )
+        con.execute("INSERT INTO per_second VALUES ('run-a', 0, 1, 1, 5, 5, 5, 0, 0)")
+    with Storage(db_path) as storage:
+        events = storage.load_request_events("run-b")
+        assert list(events["mono_time"]) == [10.0, 11.0]
+        assert list(events["run_id"]) == ["run-b", "run-b"]
+        assert list(events["attempt"]) == [0, 0]
+        assert storage.load_per_second("run-a")["achieved_rps"].tolist() == [1.0]
+        assert len(storage.load_event_columns("missing")) == 0
+        storage.append_event_columns("run-c", EventColumns.from_events([_event(0, None)]))
+        with storage._cursor() as con:
+            keys = dict(con.execute("SELECT run_id, run_key FROM run_keys").fetchall())
+            legacy = con.execute(
+                "SELECT COUNT(*) FROM information_schema.columns WHERE column_name = 'run_id' "
+                "AND table_name NOT IN ('run_meta', 'run_keys')"
+            ).fetchone()
+    assert keys == {"run-a": 1, "run-b": 2, "run-c": 3}
+    assert legacy == (0,)
+    with Storage(db_path) as storage:
+        assert len(storage.load_event_columns("run-c")) == 1
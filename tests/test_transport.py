@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+
+import httpx
+import pytest
+
+from lps.config import (
+    ClientEngine,
+    PatternConfig,
+    PatternType,
+    RetryConfig,
+    RunConfig,
+    TargetConfig,
+    TransportConfig,
+)
+from lps.loadgen.client import send_request
+from lps.loadgen.retry import RetryPolicy
+from lps.loadgen.templates import build_request_pool
+from lps.loadgen.transport import open_transport
+from lps.metrics import ErrorType
+
+
+def _config(url: str, **transport: object) -> RunConfig:
+    return RunConfig(
+        target=TargetConfig(base_url=url),
+        pattern=PatternConfig(PatternType.VIRAL, {}),
+        duration_sec=1,
+        transport=TransportConfig(**transport),  # type: ignore[arg-type]
+    )
+
+
+def test_transport_metadata_roundtrip() -> None:
+    config = _config(
+        "http://svc/",
+        engine=ClientEngine.HTTP2,
+        http2_connections=4,
+        streams_per_connection=50,
+        warm_up_connections=8,
+    )
+    restored = RunConfig.from_metadata(config.to_metadata())
+    assert restored.transport == config.transport
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", [ClientEngine.HTTPX, ClientEngine.RAW])
+async def test_connect_time_reported_only_for_new_connections(
+    http_server: str, engine: ClientEngine
+) -> None:
+    config = _config(http_server, engine=engine, max_connections=2)
+    pool = build_request_pool(config.target, seed=1)
+    async with open_transport(config, pool) as transport:
+        first = await transport.send(pool.next())
+        second = await transport.send(pool.next())
+    assert (first.status_code, first.bytes_received) == (200, 110)
+    assert first.connect_ms > 0
+    assert second.connect_ms == 0.0
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("engine", [ClientEngine.HTTPX, ClientEngine.RAW])
+async def test_warm_up_opens_connections_before_requests(
+    http_server: str, engine: ClientEngine
+) -> None:
+    config = _config(http_server, engine=engine, max_connections=4)
+    pool = build_request_pool(config.target, seed=1)
+    async with open_transport(config, pool) as transport:
+        await transport.warm_up(4)
+        exchanges = await asyncio.gather(*(transport.send(pool.next()) for _ in range(4)))
+    assert [e.connect_ms for e in exchanges] == [0.0] * 4
+
+
+async def _h2c_server() -> tuple[asyncio.Server, str]:
+    """HTTP/2 with prior knowledge over cleartext, answering every stream with ``ok``."""
+    from h2.config import H2Configuration
+    from h2.connection import H2Connection
+    from h2.events import RequestReceived
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        conn = H2Connection(H2Configuration(client_side=False))
+        conn.initiate_connection()
+        writer.write(conn.data_to_send())
+        while data := await reader.read(65536):
+            for event in conn.receive_data(data):
+                if isinstance(event, RequestReceived):
+                    headers = [(":status", "200"), ("content-length", "2")]
+                    conn.send_headers(event.stream_id, headers)
+                    conn.send_data(event.stream_id, b"ok", end_stream=True)
+            writer.write(conn.data_to_send())
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+
+@pytest.mark.asyncio
+async def test_http2_multiplexes_over_configured_connections() -> None:
+    pytest.importorskip("h2")
+    server, url = await _h2c_server()
+    config = _config(url, engine=ClientEngine.HTTP2, http2_connections=2, streams_per_connection=8)
+    pool = build_request_pool(config.target, seed=1)
+    async with server, open_transport(config, pool) as transport:
+        exchanges = await asyncio.gather(*(transport.send(pool.next()) for _ in range(40)))
+        assert {(e.status_code, e.bytes_received) for e in exchanges} == {(200, 2)}
+        assert sum(e.connect_ms > 0 for e in exchanges) <= 2
+        response = await transport._clients[0].get(url)  # type: ignore[attr-defined]
+        assert response.http_version == "HTTP/2"
+        assert isinstance(response, httpx.Response)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("stream_body", [False, True])
+async def test_body_is_counted_hashed_and_timed(http_server: str, stream_body: bool) -> None:
+    config = _config(http_server, stream_body=stream_body, body_digest="sha256")
+    pool = build_request_pool(config.target, seed=1)
+    async with open_transport(config, pool) as transport:
+        exchange = await transport.send(pool.next())
+    assert exchange.bytes_received == 110
+    assert exchange.digest == hashlib.sha256(b"hello world" * 10).hexdigest()
+    assert 0 < exchange.ttfb_ms
+
+
+@pytest.mark.asyncio
+async def test_digest_mismatch_fails_validation(http_server: str) -> None:
+    config = _config(http_server, body_digest="sha256", expected_digest="00" * 32)
+    pool = build_request_pool(config.target, seed=1)
+    async with open_transport(config, pool) as transport:
+        response = await send_request(
+            transport, "r", pool.next(), RetryPolicy(RetryConfig()), expected_digest="00" * 32
+        )
+    assert not response.success
+    assert response.event.status_code == 200
+    assert response.event.error_type is ErrorType.VALIDATION
+    assert response.event.ttfb_ms <= response.event.latency_ms
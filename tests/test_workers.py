@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+from dataclasses import asdict
+from pathlib import Path
+
+import numpy as np
+
+from lps.config import (
+    ArrivalProcess,
+    BurstyConfig,
+    PatternConfig,
+    PatternType,
+    RunConfig,
+    TargetConfig,
+    ViralSpikeConfig,
+)
+from lps.loadgen.arrivals import arrivals_by_second
+from lps.loadgen.runner import run_experiment
+from lps.loadgen.sink import ListEventSink
+from lps.loadgen.workers import _PoolState, _pump, split_schedule, worker_config
+from lps.patterns import PatternSchedule
+from lps.storage import Storage
+
+
+def test_split_schedule_preserves_total() -> None:
+    rates = [10.0, 99.0, 0.0, 1500.0]
+    shares = split_schedule(PatternSchedule(np.asarray(rates)), 4)
+    assert len(shares) == 4
+    for second, rate in enumerate(rates):
+        assert abs(sum(share.rates[second] for share in shares) - rate) < 1e-9
+
+
+def test_even_shares_interleave_into_one_smooth_train() -> None:
+    shares = split_schedule(PatternSchedule(np.full(3, 20.0)), 4)
+    merged = np.sort(
+        np.concatenate(
+            [
+                np.concatenate(list(arrivals_by_second(share, ArrivalProcess.EVEN, seed=7)))
+                for share in shares
+            ]
+        )
+    )
+    assert len(merged) == 60
+    assert np.allclose(np.diff(merged), 0.05)
+
+
+class _Exited:
+    def __init__(self, exitcode: int | None) -> None:
+        self.exitcode = exitcode
+
+
+def test_a_worker_that_dies_before_reporting_fails_the_pool() -> None:
+    state = _PoolState(total=2, spawned_mono=0.0)
+    workers = [_Exited(1), _Exited(None)]
+    empty: queue.Queue[object] = queue.Queue()
+    for _ in range(2):
+        asyncio.run(_pump(empty, "run-a", ListEventSink(), state, workers))  # type: ignore[arg-type]
+    assert state.errors == ["worker 0 exited without reporting (exit code 1)"]
+    assert state.ready == state.done == 2
+
+
+def test_worker_config_splits_limits_and_seeds() -> None:
+    cfg = ViralSpikeConfig(
+        baseline_rps=10.0,
+        spike_multiplier=5.0,
+        ramp_up_sec=4,
+        peak_hold_sec=3,
+        decay_half_life_sec=2,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url="http://localhost"),
+        pattern=PatternConfig(PatternType.VIRAL, asdict(cfg)),
+        duration_sec=10,
+        closed_loop_workers=50,
+        max_in_flight=1000,
+        processes=4,
+    )
+    children = [worker_config(config, i, 4) for i in range(4)]
+    assert {child.seed for child in children} == {7, 8, 9, 10}
+    assert all(child.processes == 1 for child in children)
+    assert all(child.max_in_flight == 250 for child in children)
+    assert all(child.closed_loop_workers == 12 for child in children)
+
+
+def test_worker_processes_merge_onto_one_time_base(tmp_path: Path, http_server: str) -> None:
+    cfg = BurstyConfig(
+        baseline_rps=20.0,
+        burst_rps=20.0,
+        burst_duration_sec=1,
+        burst_interval_sec=10,
+        jitter_pct=0.0,
+    )
+    config = RunConfig(
+        target=TargetConfig(base_url=http_server),
+        pattern=PatternConfig(PatternType.BURSTY, asdict(cfg)),
+        duration_sec=3,
+        processes=2,
+    )
+    with Storage(tmp_path / "lps.duckdb") as storage:
+        run_id = asyncio.run(run_experiment(config, storage))
+        events = storage.load_request_events(run_id)
+        per_second = storage.load_per_second(run_id)
+    assert len(events) == 60
+    assert events["error_type"].isna().all()
+    # Each process sends 10 RPS; merged by completion second they add up to the schedule.
+    assert per_second["achieved_rps"].tolist() == [20.0, 20.0, 20.0]
+    assert per_second["requested_rps"].tolist() == [20.0, 20.0, 20.0]